@@ -0,0 +1,2 @@
+# pyright: strict
+"""Micro-benchmarks for the signaling server."""
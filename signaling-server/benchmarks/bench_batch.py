@@ -0,0 +1,66 @@
+# pyright: strict
+
+"""
+Per-packet POSTs vs one batched POST per game frame.
+
+Simulates a chatty scene emitting PACKETS_PER_FRAME call_func packets per
+frame into a lobby of LOBBY_SIZE SSE peers, and reports wall time and
+server-side handler time per frame for both request styles.
+
+Run with: uv run python -m benchmarks.bench_batch
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from benchmarks.common import Client, HandlerTimer, create_sse_lobby, drain_queues, start_client
+
+LOBBY_SIZE = 16
+PACKETS_PER_FRAME = 32
+FRAMES = 100
+PACKET = "Q" * 120  # ~90 byte call_func packet, base64
+
+
+async def per_packet(client: Client, host_id: int) -> None:
+    for _ in range(PACKETS_PER_FRAME):
+        resp = await client.post(
+            "/api/lobby/broadcast", json={"peer_id": host_id, "packet": PACKET, "target": -1}
+        )
+        await resp.read()
+
+
+async def batched(client: Client, host_id: int) -> None:
+    packets = [{"packet": PACKET, "target": -1}] * PACKETS_PER_FRAME
+    resp = await client.post(
+        "/api/lobby/broadcast/batch", json={"peer_id": host_id, "packets": packets}
+    )
+    await resp.read()
+
+
+async def main() -> None:
+    timer = HandlerTimer()
+    client = await start_client(timer)
+    try:
+        host_id = (await create_sse_lobby(client, LOBBY_SIZE))[0]
+        print(f"Lobby of {LOBBY_SIZE}, {PACKETS_PER_FRAME} packets/frame, {FRAMES} frames")
+
+        for name, send in (("per-packet", per_packet), ("batched", batched)):
+            timer.reset()
+            start = time.perf_counter()
+            for _ in range(FRAMES):
+                await send(client, host_id)
+                drain_queues()
+            wall_ms = (time.perf_counter() - start) / FRAMES * 1000
+            handler_ms = timer.total / FRAMES * 1000
+            print(
+                f"  {name:<11} requests/frame={timer.requests // FRAMES:3d}  "
+                f"wall={wall_ms:7.2f} ms/frame  handler={handler_ms:6.2f} ms/frame"
+            )
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+# pyright: strict
+
+"""
+JSON codec backends over the messages the server actually sends.
+
+For each message shape, times encoding to bytes and decoding from bytes
+with every available backend, plus the old path (json.dumps with default
+separators, then .encode(), as web.json_response and ws.send_json did):
+- game_packet: a 64-byte state update, base64-encoded
+- peer_joined: lobby event with player data
+- lobby_list:  /api/lobby/list page of 100 lobbies
+- ice:         WebRTC ICE candidate relayed over the signaling socket
+- sdp:         WebRTC offer with a realistic ~1.5 KB session description
+
+Run with: uv run python -m benchmarks.bench_codec
+"""
+
+from __future__ import annotations
+
+import base64
+import importlib.util
+import json
+import time
+from collections.abc import Callable
+from typing import Any
+
+from server import codec
+
+ROUNDS = 20_000
+
+SDP = "\r\n".join(
+    [
+        "v=0",
+        "o=- 4611731400430051336 2 IN IP4 127.0.0.1",
+        "s=-",
+        "t=0 0",
+        "a=group:BUNDLE 0",
+        "a=extmap-allow-mixed",
+        "a=msid-semantic: WMS",
+        "m=application 9 UDP/DTLS/SCTP webrtc-datachannel",
+        "c=IN IP4 0.0.0.0",
+        "a=ice-ufrag:Vt3L",
+        "a=ice-pwd:vO2HlNsr0JU8ymH9xWb5y3Oq",
+        "a=ice-options:trickle",
+        "a=fingerprint:sha-256 " + ":".join(f"{(i * 37) % 256:02X}" for i in range(32)),
+        "a=setup:actpass",
+        "a=mid:0",
+        "a=sctp-port:5000",
+        "a=max-message-size:262144",
+    ]
+    * 3
+)
+
+SHAPES: dict[str, Any] = {
+    "game_packet": {
+        "t": "game_packet",
+        "from": 3,
+        "packet": base64.b64encode(bytes(range(64))).decode(),
+    },
+    "peer_joined": {
+        "t": "peer_joined",
+        "peer_id": 12,
+        "player": {"name": "Player 12", "color": "#33aaff", "ready": False, "team": 1},
+    },
+    "lobby_list": {
+        "success": True,
+        "lobbies": [
+            {
+                "code": f"AB{i:02d}",
+                "name": f"Lobby {i}",
+                "players": i % 8,
+                "public": True,
+                "player_limit": 8,
+            }
+            for i in range(100)
+        ],
+        "next_cursor": "c100",
+    },
+    "ice": {
+        "data_type": "candidate",
+        "to": 2,
+        "from": 1,
+        "mid": "0",
+        "index": 0,
+        "sdp": "candidate:842163049 1 udp 1677729535 203.0.113.7 49203 typ srflx "
+        "raddr 192.168.1.20 rport 49203 generation 0 ufrag Vt3L network-cost 999",
+    },
+    "sdp": {"data_type": "offer", "to": 2, "from": 1, "type": "offer", "sdp": SDP},
+}
+
+Codec = tuple[Callable[[Any], bytes], Callable[[bytes], Any]]
+
+
+def _old_dumps(obj: Any) -> bytes:
+    return json.dumps(obj).encode()
+
+
+def _codecs() -> dict[str, Codec]:
+    codecs: dict[str, Codec] = {"old json": (_old_dumps, json.loads)}
+    names = ["json"] + (["orjson"] if importlib.util.find_spec("orjson") else [])
+    for name in names:
+        _, dumps, loads = codec._select(name)  # pyright: ignore[reportPrivateUsage]
+        codecs[name] = (dumps, loads)
+    return codecs
+
+
+def timed(fn: Callable[[Any], object], arg: Any) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn(arg)
+    return (time.perf_counter() - start) / ROUNDS
+
+
+def main() -> None:
+    codecs = _codecs()
+    print(f"Selected backend: {codec.BACKEND}")
+    print(f"{'':12}" + "".join(f"{name:>24}" for name in codecs))
+    print(f"{'':12}" + "".join(f"{'encode / decode us':>24}" for _ in codecs))
+    for shape, message in SHAPES.items():
+        cells: list[str] = []
+        for dumps, loads in codecs.values():
+            encode = timed(dumps, message)
+            decode = timed(loads, dumps(message))
+            cells.append(f"{encode * 1e6:10.2f} / {decode * 1e6:7.2f}")
+        size = len(codecs["json"][0](message))
+        print(f"{shape:12}" + "".join(f"{c:>24}" for c in cells) + f"   ({size} B)")
+
+
+if __name__ == "__main__":
+    main()
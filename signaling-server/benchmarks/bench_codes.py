@@ -0,0 +1,84 @@
+# pyright: strict
+
+"""
+Code allocation cost as the 4-character code space fills to 90%.
+
+"retry" is the old generate_unique_code(): draw random codes until one is
+not in use. "allocator" is CodeAllocator with expansion disabled, so both
+fill the same ~1M-code space. Reports the mean time per allocation and the
+mean and worst number of codes drawn per allocation for each occupancy decile.
+
+Run with: uv run python -m benchmarks.bench_codes
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from collections.abc import Callable
+
+from server.codes import CodeAllocator
+from server.config import CONFIG
+
+CHARS = CONFIG.room_code_chars
+LENGTH = CONFIG.room_code_length
+SPACE = len(CHARS) ** LENGTH
+TARGET = 0.9
+DECILE = SPACE // 10
+
+
+def make_retry() -> tuple[Callable[[], str], Callable[[], int]]:
+    used: set[str] = set()
+    draws = 0
+
+    def allocate() -> str:
+        nonlocal draws
+        code = "".join(random.choice(CHARS) for _ in range(LENGTH))
+        draws += 1
+        while code in used:
+            code = "".join(random.choice(CHARS) for _ in range(LENGTH))
+            draws += 1
+        used.add(code)
+        return code
+
+    return allocate, lambda: draws
+
+
+def make_allocator() -> tuple[Callable[[], str], Callable[[], int]]:
+    codes = CodeAllocator(CHARS, LENGTH, max_occupancy=1.0)
+    calls = 0
+
+    def allocate() -> str:
+        nonlocal calls
+        calls += 1
+        return codes.allocate()
+
+    return allocate, lambda: calls
+
+
+def run(name: str, allocate: Callable[[], str], draws: Callable[[], int]) -> None:
+    print(f"{name}:")
+    for decile in range(int(TARGET * 10)):
+        start_draws = draws()
+        worst = 0
+        start = time.perf_counter()
+        for _ in range(DECILE):
+            before = draws()
+            allocate()
+            worst = max(worst, draws() - before)
+        elapsed = time.perf_counter() - start
+        print(
+            f"  {decile * 10:2d}-{decile * 10 + 10:3d}%  "
+            f"{elapsed / DECILE * 1e6:6.2f} us/alloc  "
+            f"draws/alloc={(draws() - start_draws) / DECILE:5.2f}  worst={worst:3d}"
+        )
+
+
+def main() -> None:
+    print(f"{SPACE} codes of length {LENGTH}, filling to {TARGET:.0%}")
+    run("retry", *make_retry())
+    run("allocator", *make_allocator())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# pyright: strict
+
+"""
+JSON encodes per broadcast packet, before and after serialize-once frames.
+
+"before" reproduces the old per-recipient path: ws.send_json() for every
+WebSocket peer and json.dumps() + f-string framing for every SSE peer.
+"after" is EncodedMessage.encode() once, shared by every recipient.
+
+Run with: uv run python -m benchmarks.bench_encode
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Callable
+from typing import Any
+
+from server.frames import EncodedMessage
+
+RECIPIENTS = 15  # 16-peer lobby minus the sender
+WS_RECIPIENTS = 7
+PACKETS = 20_000
+
+_encodes = 0
+_dumps = json.dumps
+
+
+def counting_dumps(obj: Any, **kwargs: Any) -> str:
+    global _encodes
+    _encodes += 1
+    return _dumps(obj, **kwargs)
+
+
+def before(message: dict[str, Any]) -> None:
+    for i in range(RECIPIENTS):
+        if i < WS_RECIPIENTS:
+            counting_dumps(message).encode("utf-8")  # ws.send_json
+        else:
+            data = counting_dumps(message)  # handle_events
+            f"event: {message['t']}\ndata: {data}\n\n".encode()
+
+
+def after(message: dict[str, Any]) -> None:
+    encoded = EncodedMessage.encode(message)
+    for i in range(RECIPIENTS):
+        _ = encoded.data if i < WS_RECIPIENTS else encoded.sse
+
+
+def measure(name: str, broadcast: Callable[[dict[str, Any]], None]) -> None:
+    global _encodes
+    _encodes = 0
+    message = {"t": "game_packet", "from": 1, "packet": "A" * 256}
+
+    start = time.perf_counter()
+    for _ in range(PACKETS):
+        broadcast(message)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"  {name:<7} encodes/packet={_encodes / PACKETS:5.1f}   "
+        f"{elapsed / PACKETS * 1e6:7.2f} us/packet"
+    )
+
+
+def main() -> None:
+    print(f"{RECIPIENTS} recipients ({WS_RECIPIENTS} WS, {RECIPIENTS - WS_RECIPIENTS} SSE)")
+    measure("before", before)
+    json.dumps = counting_dumps
+    try:
+        measure("after", after)
+    finally:
+        json.dumps = _dumps
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# pyright: strict
+
+"""
+Broadcast latency with one stalled peer in a 16-player lobby.
+
+Compares the old sequential send loop against fan_out(). One WebSocket peer
+takes STALL seconds per send (a full TCP send buffer); the other 15 are fast.
+
+Run with: uv run python -m benchmarks.bench_fanout
+"""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, cast
+
+from aiohttp import WSMsgType, web
+
+from server.fanout import fan_out
+from server.models import Peer
+
+LOBBY_SIZE = 16
+STALL = 0.2
+DEADLINE = 0.02
+ROUNDS = 25
+
+
+class StallingWebSocket:
+    """WebSocket stand-in whose send takes a fixed amount of time."""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.closed = False
+
+    async def send_json(self, _data: dict[str, Any]) -> None:
+        await asyncio.sleep(self.delay)
+
+    async def send_frame(self, _message: bytes, _opcode: WSMsgType) -> None:
+        await asyncio.sleep(self.delay)
+
+    async def close(self, **_kwargs: Any) -> None:
+        # Keep the stalled peer around so every round hits it
+        pass
+
+
+def make_lobby() -> list[Peer]:
+    peers = [Peer(peer_id=1, ws=cast(web.WebSocketResponse, StallingWebSocket(STALL)))]
+    for peer_id in range(2, LOBBY_SIZE + 1):
+        peers.append(Peer(peer_id=peer_id, ws=cast(web.WebSocketResponse, StallingWebSocket(0))))
+    return peers
+
+
+async def sequential(peers: list[Peer], message: dict[str, Any]) -> None:
+    """The pre-fan-out behaviour: await each peer in turn."""
+    for peer in peers:
+        assert peer.ws is not None
+        await peer.ws.send_json(message)
+
+
+async def concurrent(peers: list[Peer], message: dict[str, Any]) -> None:
+    await fan_out(peers, message, deadline=DEADLINE)
+
+
+async def measure(
+    name: str, broadcast: Callable[[list[Peer], dict[str, Any]], Awaitable[None]]
+) -> None:
+    peers = make_lobby()
+    message = {"t": "game_packet", "from": 2, "packet": "AAAA"}
+    samples: list[float] = []
+
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        await broadcast(peers, message)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    p50 = statistics.median(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"  {name:<12} p50={p50:8.2f} ms   p99={p99:8.2f} ms")
+
+
+async def main() -> None:
+    print(f"Lobby of {LOBBY_SIZE}, one peer stalled {STALL * 1000:.0f} ms per send")
+    print(f"fan_out deadline: {DEADLINE * 1000:.0f} ms, {ROUNDS} broadcasts")
+    await measure("sequential", sequential)
+    await measure("fan_out", concurrent)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+# pyright: strict
+
+"""
+Heartbeat cost against the number of open event streams.
+
+N tasks stand in for SSE streams reading their peer queues. Every stream
+gets a few messages, then all go idle until their heartbeat is due.
+Compares:
+- wait_for: every get() wrapped in asyncio.wait_for(timeout), as the streams
+  used to do, with a JSON heartbeat encoded per stream
+- ticker:   plain get(), the shared HeartbeatTicker waking idle queues
+
+Run with: uv run python -m benchmarks.bench_heartbeat
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+from server.enums import SSEEventType
+from server.frames import EncodedMessage, sse_frame
+from server.heartbeat import SUBTICKS, HeartbeatTicker
+from server.peer_queue import PeerQueue, PeerQueueIdle
+
+SIZES = (1_000, 10_000)
+MESSAGES = 5
+INTERVAL = 0.2  # Seconds; short so the run finishes quickly
+
+
+async def with_wait_for(queue: PeerQueue, beats: list[int]) -> None:
+    while True:
+        try:
+            await asyncio.wait_for(queue.get(), timeout=INTERVAL)
+        except TimeoutError:
+            data = json.dumps({"ts": asyncio.get_running_loop().time()}).encode()
+            sse_frame(SSEEventType.HEARTBEAT, data)
+            beats[0] += 1
+            return
+
+
+async def with_ticker(queue: PeerQueue, ticker: HeartbeatTicker, beats: list[int]) -> None:
+    ticker.add(queue)
+    while True:
+        try:
+            await queue.get()
+        except PeerQueueIdle:
+            beats[0] += 1
+            ticker.remove(queue)
+            return
+        ticker.touch(queue)
+
+
+async def run(count: int, use_ticker: bool) -> float:
+    message = EncodedMessage.encode({"t": "game_packet", "packet": "aGk="})
+    ticker = HeartbeatTicker(INTERVAL)
+    queues = [PeerQueue() for _ in range(count)]
+    beats = [0]
+    start = time.process_time()
+    if use_ticker:
+        tasks = [asyncio.create_task(with_ticker(q, ticker, beats)) for q in queues]
+        driver = asyncio.create_task(ticker.run())
+    else:
+        tasks = [asyncio.create_task(with_wait_for(q, beats)) for q in queues]
+        driver = None
+
+    for _ in range(MESSAGES):
+        for queue in queues:
+            queue.put_nowait(message)
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    cpu = time.process_time() - start
+    if driver:
+        driver.cancel()
+    assert beats[0] == count
+    return cpu
+
+
+async def main() -> None:
+    print(f"{MESSAGES} messages per stream, then one heartbeat ({SUBTICKS} ticks per interval)")
+    for count in SIZES:
+        old = await run(count, use_ticker=False)
+        new = await run(count, use_ticker=True)
+        print(
+            f"  {count:>6} streams  wait_for={old * 1e3:7.1f} ms CPU  ticker={new * 1e3:7.1f} ms CPU"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+# pyright: strict
+
+"""
+Lobby list polling with 10k lobbies at 500 polls/sec.
+
+Polls GET /api/lobby/list through the real handler in-process and reports
+server-side handler time per poll and the CPU share that 500 polls/sec would
+take, against a scan-and-encode handler equivalent to the old implementation:
+- static: nothing changes between polls (served from the cached payload)
+- churn:  a player joins or leaves a listed lobby every CHURN_EVERY polls
+The "etag" rows poll like a browser that sends back the last ETag it saw,
+so unchanged polls are answered with a bodiless 304. The "page" rows fetch
+one 20-row page of non-full lobbies by player count through the search API.
+
+Run with: uv run python -m benchmarks.bench_lobby_list
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+
+from aiohttp import web
+
+from benchmarks.common import Client, HandlerTimer, start_client
+from server.models import Peer
+from server.state import state
+
+LOBBIES = 10_000
+POLL_RATE = 500  # polls/sec
+POLLS = 1000
+CHURN_EVERY = 10
+
+
+async def handle_list_scan(_request: web.Request) -> web.Response:
+    """The pre-index handler: scan every lobby and encode the list on each poll."""
+    lobbies = [s for s in state.sessions.values() if s.is_lobby and s.public and s.open]
+    items = [lobby.to_list_item() for lobby in lobbies]
+    return web.json_response({"success": True, "lobbies": items})
+
+
+def populate() -> None:
+    for i in range(LOBBIES):
+        host = Peer(peer_id=state.get_next_peer_id())
+        state.add_lobby_peer(host)
+        state.create_lobby(f"lobby-{i}", host, public=i % 4 != 0)
+
+
+async def poll(
+    client: Client, timer: HandlerTimer, path: str, churn: bool, etag: bool
+) -> tuple[float, int]:
+    guest = Peer(peer_id=state.get_next_peer_id())
+    listed = state.get_public_lobbies()
+    last_etag = ""
+    received = 0
+    timer.reset()
+    for i in range(POLLS):
+        if churn and i % CHURN_EVERY == 0:
+            if guest.lobby_code:
+                lobby = state.get_lobby(guest.lobby_code)
+                assert lobby is not None
+                state.leave_lobby(lobby, guest.peer_id)
+            else:
+                state.join_lobby(random.choice(listed), guest)
+        headers = {"If-None-Match": last_etag} if etag and last_etag else {}
+        resp = await client.get(path, headers=headers)
+        received += len(await resp.read())
+        last_etag = resp.headers.get("ETag", "")
+    return timer.total / POLLS, received // POLLS
+
+
+async def main() -> None:
+    timer = HandlerTimer()
+    client = await start_client(timer, [web.get("/bench/list-scan", handle_list_scan)])
+    try:
+        populate()
+        resp = await client.get("/api/lobby/list")
+        size = len(await resp.read())
+        print(f"{LOBBIES} lobbies ({len(state.public_lobbies)} listed, {size} B), {POLLS} polls")
+
+        for name, churn in (("static", False), ("churn", True)):
+            for label, path, etag in (
+                ("scan", "/bench/list-scan", False),
+                ("indexed", "/api/lobby/list", False),
+                ("etag", "/api/lobby/list", True),
+                ("page", "/api/lobby/list?limit=20&sort=most_players&not_full=1", False),
+            ):
+                per_poll, body = await poll(client, timer, path, churn, etag)
+                print(
+                    f"  {name:<7} {label:<8} {per_poll * 1e6:9.1f} us/poll  "
+                    f"cpu at {POLL_RATE}/s={per_poll * POLL_RATE * 100:6.1f}%  "
+                    f"body={body:7d} B/poll"
+                )
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+# pyright: strict
+
+"""
+Event-loop time spent on per-packet logging at 5k packets/sec.
+
+Broadcasts RATE game packets/sec (in 60 Hz bursts) into a lobby of
+LOBBY_SIZE SSE peers, emitting the per-packet lines the lobby used to print
+(one "Broadcasting" line plus one "Queued" line per recipient), with stdout
+redirected to a pipe drained by another thread, like a terminal or a process
+supervisor. Reports the share of each second the loop spent busy:
+- print:          synchronous f-string print() calls (the old behaviour)
+- logger (DEBUG): the same lines through the queue-backed logger, enabled
+- logger (INFO):  the default level, where per-packet lines are skipped
+
+Run with: uv run python -m benchmarks.bench_logging
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable
+
+from server.fanout import fan_out
+from server.frames import EncodedMessage
+from server.log import get_logger, setup_logging, shutdown_logging
+from server.models import Peer, Session
+from server.peer_queue import PeerQueue
+
+RATE = 5000  # packets/sec
+FRAME_HZ = 60
+DURATION = 2.0
+LOBBY_SIZE = 16
+
+log = get_logger("lobby")
+
+
+def make_lobby() -> Session:
+    peers = [Peer(peer_id=i, sse_queue=PeerQueue()) for i in range(1, LOBBY_SIZE + 1)]
+    lobby = Session.create_lobby("BNCH", "bench", peers[0])
+    for peer in peers[1:]:
+        lobby.add_peer(peer)
+    return lobby
+
+
+def print_lines(lobby: Session, encoded: EncodedMessage) -> None:
+    print(f"[LOBBY] Broadcasting {encoded.event} to lobby {lobby.code} (peers={list(lobby.peers)})")
+    for peer in lobby.peers.values():
+        assert peer.sse_queue is not None
+        print(
+            f"[LOBBY] Queued {encoded.event} for peer {peer.peer_id} via SSE "
+            f"(queue_size={peer.sse_queue.qsize()})"
+        )
+
+
+def logger_lines(lobby: Session, encoded: EncodedMessage) -> None:
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(
+            "Broadcasting %s to lobby %s (peers=%s)", encoded.event, lobby.code, list(lobby.peers)
+        )
+    for peer in lobby.peers.values():
+        assert peer.sse_queue is not None
+        log.debug(
+            "Queued %s for peer %s via SSE (queue_size=%d)",
+            encoded.event,
+            peer.peer_id,
+            peer.sse_queue.qsize(),
+        )
+
+
+async def run(emit: Callable[[Session, EncodedMessage], None]) -> float:
+    """Return the fraction of wall time the loop spent sending packets."""
+    lobby = make_lobby()
+    encoded = EncodedMessage.encode({"t": "game_packet", "from": 1, "packet": "A" * 96})
+    per_frame = RATE // FRAME_HZ
+    busy = 0.0
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        frame_start = time.perf_counter()
+        for _ in range(per_frame):
+            emit(lobby, encoded)
+            await fan_out(lobby.peers.values(), encoded)
+        for peer in lobby.peers.values():
+            assert peer.sse_queue is not None
+            peer.sse_queue.drain(1 << 30, 1 << 62)
+        busy += time.perf_counter() - frame_start
+        await asyncio.sleep(max(0.0, 1 / FRAME_HZ - (time.perf_counter() - frame_start)))
+    return busy / (time.perf_counter() - start)
+
+
+def drain_pipe(fd: int) -> None:
+    while os.read(fd, 65536):
+        pass
+
+
+async def main() -> None:
+    read_fd, write_fd = os.pipe()
+    reader = threading.Thread(target=drain_pipe, args=(read_fd,), daemon=True)
+    reader.start()
+    console = sys.stdout
+    sys.stdout = os.fdopen(write_fd, "w", buffering=1)
+
+    results: dict[str, float] = {}
+    try:
+        results["print"] = await run(print_lines)
+        for level in ("DEBUG", "INFO"):
+            setup_logging(level)
+            try:
+                results[f"logger ({level})"] = await run(logger_lines)
+            finally:
+                shutdown_logging()
+    finally:
+        sys.stdout.close()
+        sys.stdout = console
+
+    print(f"{RATE} packets/sec to {LOBBY_SIZE} SSE peers for {DURATION:.0f}s, stdout -> pipe")
+    for name, share in results.items():
+        print(f"  {name:<15} loop busy={share * 100:5.1f}%  ({share * 1000:6.1f} ms per second)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
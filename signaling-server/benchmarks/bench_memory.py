@@ -0,0 +1,74 @@
+# pyright: strict
+
+"""
+Memory held per idle connected peer and per lobby.
+
+Uses tracemalloc to count the bytes still allocated after:
+- peer:  PEERS peers connected as over HTTP (Peer + SSE queue, registered in state)
+- lobby: LOBBIES lobbies each created by a fresh host (Session, index
+         entries, code and name bookkeeping), the host peer included
+Exits non-zero if either exceeds its budget, so it can run in CI.
+
+Run with: uv run python -m benchmarks.bench_memory
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+from collections.abc import Callable
+
+from server.models import Peer
+from server.peer_queue import PeerQueue
+from server.state import state
+
+PEERS = 20_000
+LOBBIES = 5_000
+
+# Bytes per item; headroom for interpreter differences, not for a regression
+PEER_BUDGET = 400
+LOBBY_BUDGET = 2_000
+
+
+def connect_peer() -> Peer:
+    peer = Peer(peer_id=state.get_next_peer_id(), sse_queue=PeerQueue())
+    state.add_lobby_peer(peer)
+    return peer
+
+
+def create_lobby() -> None:
+    host = connect_peer()
+    state.create_lobby(f"Lobby {host.peer_id}", host)
+
+
+def measure(count: int, build: Callable[[], object]) -> float:
+    """Bytes per call of `build` still allocated afterwards (state holds the results)."""
+    state.clear_all()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(count):
+        build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    state.clear_all()
+    return (after - before) / count
+
+
+def main() -> None:
+    ok = True
+    for label, count, build, budget in (
+        ("peer", PEERS, connect_peer, PEER_BUDGET),
+        ("lobby", LOBBIES, create_lobby, LOBBY_BUDGET),
+    ):
+        per_item = measure(count, build)
+        verdict = "ok" if per_item <= budget else "OVER BUDGET"
+        ok = ok and per_item <= budget
+        print(f"  {label:<6} {per_item:8.0f} B each  (budget {budget} B, n={count})  {verdict}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# pyright: strict
+
+"""
+Cost of the packet rate limit check.
+
+Times admit() against a peer and a lobby bucket, for packets that are
+admitted and for a flood that is rejected, and checks with tracemalloc
+that the check leaves no allocations behind.
+
+Run with: uv run python -m benchmarks.bench_ratelimit
+"""
+
+from __future__ import annotations
+
+import time
+import tracemalloc
+
+from server.ratelimit import TokenBucket, admit
+
+ROUNDS = 1_000_000
+
+
+def timed(sender: TokenBucket, lobby: TokenBucket) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        admit(sender, lobby, 1, 64)
+    return (time.perf_counter() - start) / ROUNDS
+
+
+def main() -> None:
+    unlimited = TokenBucket(0.0, 0.0)
+    admitted = timed(TokenBucket(1e12, 1e12), unlimited)
+    rejected = timed(TokenBucket(1.0, 1e12), unlimited)
+    print(f"admitted: {admitted * 1e9:6.0f} ns per check")
+    print(f"rejected: {rejected * 1e9:6.0f} ns per check")
+
+    sender, lobby = TokenBucket(1e12, 1e12), TokenBucket(1e12, 1e12)
+    admit(sender, lobby, 1, 64)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(10_000):
+        admit(sender, lobby, 1, 64)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"memory retained by 10k checks: {after - before} bytes")
+
+
+if __name__ == "__main__":
+    main()
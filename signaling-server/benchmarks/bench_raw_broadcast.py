@@ -0,0 +1,67 @@
+# pyright: strict
+
+"""
+JSON vs raw binary game-packet ingestion for 64 B, 1 KB and 16 KB packets.
+
+Posts packets through the real handlers in-process to a lobby of LOBBY_SIZE
+SSE peers and reports server-side handler time per request (body read,
+parse, encode and fan-out) and upload size for /api/lobby/broadcast
+(base64 in a JSON body) and /api/lobby/broadcast/raw (octet-stream body).
+
+Run with: uv run python -m benchmarks.bench_raw_broadcast
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+
+from benchmarks.common import Client, HandlerTimer, create_sse_lobby, drain_queues, start_client
+
+LOBBY_SIZE = 16
+REQUESTS = 1500
+SIZES = {"64 B": 64, "1 KB": 1024, "16 KB": 16 * 1024}
+
+
+async def measure(
+    client: Client, timer: HandlerTimer, host_id: int, packet: bytes, raw: bool
+) -> tuple[float, int]:
+    if raw:
+        path = f"/api/lobby/broadcast/raw?peer_id={host_id}"
+        body = packet
+        headers = {"Content-Type": "application/octet-stream"}
+    else:
+        path = "/api/lobby/broadcast"
+        body = json.dumps(
+            {"peer_id": host_id, "packet": base64.b64encode(packet).decode(), "target": -1}
+        ).encode()
+        headers = {"Content-Type": "application/json"}
+
+    timer.reset()
+    for _ in range(REQUESTS):
+        resp = await client.post(path, data=body, headers=headers)
+        await resp.read()
+        drain_queues()
+    return timer.total / REQUESTS * 1e6, len(body)
+
+
+async def main() -> None:
+    timer = HandlerTimer()
+    client = await start_client(timer)
+    try:
+        host_id = (await create_sse_lobby(client, LOBBY_SIZE))[0]
+        print(f"Lobby of {LOBBY_SIZE} SSE peers, {REQUESTS} requests per case")
+        for label, size in SIZES.items():
+            packet = os.urandom(size)
+            for raw in (False, True):
+                handler_us, upload = await measure(client, timer, host_id, packet, raw)
+                name = "raw" if raw else "json"
+                print(f"  {label:>6} {name:<5} {handler_us:7.1f} us/request  upload={upload:6d} B")
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+# pyright: strict
+
+"""
+Reaper tick cost against the number of connected peers.
+
+Connects N peers spread evenly over one attach TTL, all of which keep their
+event stream open (so each check just reschedules them), then runs one
+TTL's worth of reaper ticks. Compares with a sweep that scans every peer on
+each tick. The wheel's cost per tick follows the peers due in that tick, so
+with a steady connect rate it stays flat per peer as N grows.
+
+Run with: uv run python -m benchmarks.bench_reaper
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from server.config import CONFIG
+from server.models import Peer
+from server.reaper import reap_peers
+from server.state import state
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def sweep(now: float) -> int:
+    """The alternative: scan every peer on every tick."""
+    due = 0
+    for peer in state.lobby_peers.values():
+        ttl = CONFIG.peer_attach_ttl if peer.sse_replay is None else CONFIG.peer_idle_ttl
+        if peer.last_activity + ttl <= now and peer.sse_stream is None:
+            due += 1
+    return due
+
+
+async def run(count: int) -> tuple[float, float]:
+    state.clear_all()
+    start = time.monotonic()
+    stream = asyncio.create_task(asyncio.sleep(3600))
+    for i in range(count):
+        peer = Peer(peer_id=state.get_next_peer_id())
+        peer.last_activity = start + i * CONFIG.peer_attach_ttl / count - CONFIG.peer_attach_ttl
+        peer.sse_stream = stream
+        state.add_lobby_peer(peer)
+
+    ticks = int(CONFIG.peer_attach_ttl / CONFIG.reaper_tick)
+    t = time.perf_counter()
+    for tick in range(ticks):
+        await reap_peers(start + tick * CONFIG.reaper_tick)
+    wheel = (time.perf_counter() - t) / ticks
+
+    t = time.perf_counter()
+    for tick in range(ticks):
+        sweep(start + tick * CONFIG.reaper_tick)
+    scan = (time.perf_counter() - t) / ticks
+
+    stream.cancel()
+    state.clear_all()
+    return wheel, scan
+
+
+async def main() -> None:
+    print(f"{CONFIG.peer_attach_ttl:.0f}s TTL, {CONFIG.reaper_tick:.0f}s ticks")
+    for count in SIZES:
+        wheel, scan = await run(count)
+        print(
+            f"  {count:>7} peers  wheel={wheel * 1e6:9.1f} us/tick "
+            f"({wheel / count * CONFIG.peer_attach_ttl * 1e9:5.0f} ns/peer-check)  "
+            f"scan={scan * 1e6:9.1f} us/tick"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+# pyright: strict
+
+"""
+Warm-restart snapshot cost against the number of lobbies.
+
+Builds N public lobbies of four peers each (the host with player data),
+then times dump(), load() into a fresh state and the snapshot size.
+
+Run with: uv run python -m benchmarks.bench_snapshot
+"""
+
+from __future__ import annotations
+
+import time
+
+from server import snapshot
+from server.models import Peer
+from server.state import State
+
+SIZES = (1_000, 10_000, 50_000)
+LOBBY_SIZE = 4
+
+
+def build(lobbies: int) -> State:
+    source = State()
+    for i in range(lobbies):
+        peers = [Peer(peer_id=source.get_next_peer_id()) for _ in range(LOBBY_SIZE)]
+        peers[0].player_data = {"name": f"Host {i}", "level": i % 50}
+        for peer in peers:
+            source.add_lobby_peer(peer)
+        lobby = source.create_lobby(f"Lobby {i}", peers[0], player_limit=8)
+        for peer in peers[1:]:
+            source.join_lobby(lobby, peer)
+    return source
+
+
+def main() -> None:
+    print(f"{LOBBY_SIZE} peers per lobby")
+    for count in SIZES:
+        source = build(count)
+        t = time.perf_counter()
+        data = snapshot.dump(source)
+        dump = time.perf_counter() - t
+
+        t = time.perf_counter()
+        snapshot.load(State(), data)
+        load = time.perf_counter() - t
+        print(
+            f"  {count:>6} lobbies  dump={dump * 1e3:7.1f} ms  load={load * 1e3:7.1f} ms  "
+            f"size={len(data) / 1024:8.0f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
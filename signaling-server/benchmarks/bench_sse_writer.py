@@ -0,0 +1,104 @@
+# pyright: strict
+
+"""
+SSE writer throughput: events/sec per core for a consumer receiving 1k packets/sec.
+
+Runs the real /api/lobby/events handler in-process, feeds the peer's queue at
+RATE packets/sec (in 60 Hz bursts, like a game sending per frame) and reads
+the stream with an aiohttp client. Events per CPU-second covers both ends,
+so the difference between settings is what matters.
+
+Run with: uv run python -m benchmarks.bench_sse_writer
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import replace
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from server import http_lobby_handlers
+from server.app import create_app
+from server.config import CONFIG
+from server.fanout import fan_out
+from server.state import state
+
+RATE = 1000  # packets/sec
+FRAME_HZ = 60
+DURATION = 3.0
+
+SETTINGS = {
+    "one write per event": replace(CONFIG, sse_write_max_messages=1),
+    "coalesced": CONFIG,
+    "coalesced + 5ms linger": replace(CONFIG, sse_write_linger=0.005),
+}
+
+
+async def run(name: str) -> None:
+    http_lobby_handlers.CONFIG = SETTINGS[name]
+    state.clear_all()
+    writes = 0
+    original_write = web.StreamResponse.write
+
+    async def counting_write(self: web.StreamResponse, data: bytes) -> None:
+        nonlocal writes
+        writes += 1
+        await original_write(self, data)
+
+    web.StreamResponse.write = counting_write  # type: ignore[method-assign]
+    client = TestClient(TestServer(create_app()))
+    await client.start_server()
+    try:
+        resp = await client.post("/api/lobby/connect", json={})
+        peer_id = (await resp.json())["peer_id"]
+        peer = state.get_lobby_peer(peer_id)
+        assert peer is not None
+
+        stream = await client.get(f"/api/lobby/events?peer_id={peer_id}")
+        received = 0
+
+        async def consume() -> None:
+            nonlocal received
+            async for line in stream.content:
+                if line.startswith(b"event: game_packet"):
+                    received += 1
+
+        consumer = asyncio.ensure_future(consume())
+        per_frame = RATE // FRAME_HZ
+        message = {"t": "game_packet", "from": 0, "packet": "A" * 96}
+
+        cpu_start = time.process_time()
+        sent = 0
+        deadline = time.perf_counter() + DURATION
+        while time.perf_counter() < deadline:
+            for _ in range(per_frame):
+                await fan_out([peer], message)
+            sent += per_frame
+            await asyncio.sleep(1 / FRAME_HZ)
+        await asyncio.sleep(0.1)
+        cpu = time.process_time() - cpu_start
+
+        consumer.cancel()
+        stream.close()
+        print(
+            f"  {name:<24} events={received:6d}/{sent}  writes={writes:6d}  "
+            f"events/write={received / max(writes, 1):5.1f}  "
+            f"events/cpu-sec={received / cpu:9.0f}"
+        )
+    finally:
+        web.StreamResponse.write = original_write  # type: ignore[method-assign]
+        http_lobby_handlers.CONFIG = CONFIG
+        await client.close()
+
+
+async def main() -> None:
+    print(f"{RATE} packets/sec for {DURATION:.0f}s, {FRAME_HZ} Hz bursts")
+    for name in SETTINGS:
+        await run(name)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+# pyright: strict
+
+"""
+Game-packet round-trip latency: HTTP POST + SSE vs the /lobby WebSocket.
+
+A sender and a receiver share a lobby. Each sample is the time from the
+sender issuing a packet to the receiver reading it off its stream:
+- http: POST /api/lobby/broadcast, received on /api/lobby/events
+- ws:   {"t": "broadcast"} on /lobby, received on the receiver's /lobby socket
+
+Run with: uv run python -m benchmarks.bench_ws_broadcast
+"""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+
+from benchmarks.common import Client, create_sse_lobby, start_client
+
+SAMPLES = 500
+
+
+def report(name: str, samples: list[float]) -> None:
+    samples.sort()
+    p50 = statistics.median(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"  {name:<5} p50={p50:7.3f} ms   p99={p99:7.3f} ms")
+
+
+async def http_round_trips(client: Client) -> list[float]:
+    sender_id, receiver_id = await create_sse_lobby(client, 2)
+    stream = await client.get(f"/api/lobby/events?peer_id={receiver_id}")
+    await stream.content.readuntil(b"\n\n")  # welcome
+
+    samples: list[float] = []
+    for _ in range(SAMPLES):
+        start = time.perf_counter()
+        resp = await client.post(
+            "/api/lobby/broadcast", json={"peer_id": sender_id, "packet": "AAAA", "target": -1}
+        )
+        await resp.read()
+        # Frames start with their "id:" line, so look for the event line anywhere in the frame
+        while b"\nevent: game_packet" not in b"\n" + await stream.content.readuntil(b"\n\n"):
+            pass
+        samples.append((time.perf_counter() - start) * 1000)
+
+    stream.close()
+    return samples
+
+
+async def ws_round_trips(client: Client) -> list[float]:
+    async with client.ws_connect("/lobby") as sender, client.ws_connect("/lobby") as receiver:
+        await sender.receive_json()
+        await receiver.receive_json()
+        await sender.send_json({"t": "create_lobby", "name": "bench-ws"})
+        code = (await sender.receive_json())["code"]
+        await receiver.send_json({"t": "join_lobby", "code": code})
+        await receiver.receive_json()
+        await sender.receive_json()  # peer_joined
+
+        samples: list[float] = []
+        for _ in range(SAMPLES):
+            start = time.perf_counter()
+            await sender.send_json({"t": "broadcast", "packet": "AAAA", "ack": False})
+            await receiver.receive_json()
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples
+
+
+async def main() -> None:
+    client = await start_client()
+    try:
+        print(f"{SAMPLES} packets, sender -> receiver")
+        report("http", await http_round_trips(client))
+        report("ws", await ws_round_trips(client))
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+# pyright: strict
+
+"""Shared helpers for the HTTP benchmarks."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import replace
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from server import ratelimit
+from server.app import create_app
+from server.config import CONFIG
+from server.state import state
+
+Client = TestClient[web.Request, web.Application]
+
+# The benchmarks send far faster than one client may; they measure the server, not its limits
+UNLIMITED = replace(
+    CONFIG, peer_packet_rate=0, peer_byte_rate=0, lobby_packet_rate=0, lobby_byte_rate=0
+)
+
+
+class HandlerTimer:
+    """Middleware that accumulates server-side handler time."""
+
+    def __init__(self) -> None:
+        self.total = 0.0
+        self.requests = 0
+
+    def reset(self) -> None:
+        self.total = 0.0
+        self.requests = 0
+
+    @web.middleware
+    async def middleware(
+        self,
+        request: web.Request,
+        handler: Callable[[web.Request], Awaitable[web.StreamResponse]],
+    ) -> web.StreamResponse:
+        start = time.perf_counter()
+        try:
+            return await handler(request)
+        finally:
+            self.total += time.perf_counter() - start
+            self.requests += 1
+
+
+async def start_client(
+    timer: HandlerTimer | None = None, routes: list[web.RouteDef] | None = None
+) -> Client:
+    """Start the real app in-process on a fresh state, plus any extra benchmark routes.
+
+    Packet rate limits are turned off.
+    """
+    ratelimit.CONFIG = UNLIMITED
+    state.clear_all()
+    app = create_app()
+    if timer:
+        app.middlewares.append(timer.middleware)
+    if routes:
+        app.add_routes(routes)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    return client
+
+
+async def create_sse_lobby(client: Client, size: int) -> list[int]:
+    """Create a lobby of `size` SSE peers; returns their peer IDs, host first."""
+    peer_ids: list[int] = []
+    for _ in range(size):
+        resp = await client.post("/api/lobby/connect", json={})
+        peer_ids.append((await resp.json())["peer_id"])
+
+    resp = await client.post("/api/lobby/create", json={"peer_id": peer_ids[0], "name": "bench"})
+    code = (await resp.json())["code"]
+    for peer_id in peer_ids[1:]:
+        await client.post("/api/lobby/join", json={"peer_id": peer_id, "code": code})
+    return peer_ids
+
+
+def drain_queues() -> None:
+    """Empty every SSE queue, standing in for connected consumers."""
+    for peer in state.lobby_peers.values():
+        if peer.sse_queue:
+            peer.sse_queue.drain(1 << 30, 1 << 62)
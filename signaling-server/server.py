@@ -11,11 +11,13 @@ It provides:
 3. Real-time game state broadcasting via Server-Sent Events (SSE)
 
 Usage:
-    python server.py [--port PORT]
-    Default port: 3000
+    python server.py [--port PORT] [--log-level LEVEL] [--workers N] [--snapshot PATH]
+    Default port: 3000, default log level: INFO, default workers: 1, no snapshot
+    Per-subsystem levels: LOG_LEVELS=lobby=DEBUG,signal=DEBUG
 
 Requirements:
     pip install aiohttp
+    pip install orjson   (optional: faster JSON; SERVER_JSON_BACKEND=json to disable)
 
 Then in Godot (via GDSync Web Patch), set:
     var relay_server_url: String = "https://localhost:3000"
@@ -32,17 +34,43 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--port", "-p", type=int, default=None, help="Port to run the server on (default: 3000)"
     )
+    parser.add_argument(
+        "--log-level",
+        default=None,
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        type=str.upper,
+        help="Log level for all subsystems (default: INFO)",
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=None,
+        help="Worker processes sharing the port via SO_REUSEPORT (Linux; default: 1)",
+    )
+    parser.add_argument(
+        "--snapshot",
+        "-s",
+        default=None,
+        help="State snapshot file, saved on shutdown and restored on startup (single process)",
+    )
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = parse_args()
 
-    # Set port in environment if provided via CLI
-    if args.port is not None:
-        import os
+    import os
 
+    # Set port, log level, workers and snapshot in environment if provided via CLI
+    if args.port is not None:
         os.environ["SERVER_PORT"] = str(args.port)
+    if args.log_level is not None:
+        os.environ["LOG_LEVEL"] = args.log_level
+    if args.workers is not None:
+        os.environ["SERVER_WORKERS"] = str(args.workers)
+    if args.snapshot is not None:
+        os.environ["SERVER_SNAPSHOT"] = args.snapshot
 
     from server.app import main
 
@@ -8,20 +8,33 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import multiprocessing
+import shutil
+import signal
+import socket
 import ssl
 import sys
+import tempfile
 from collections.abc import Awaitable, Callable
 from pathlib import Path
-from typing import Any
 
 from aiohttp import web
 
-from .config import CONFIG, LOCAL_IP, PORT
+from . import bus, snapshot
+from .cluster import cluster_context
+from .codec import send_json
+from .config import CONFIG, LOCAL_IP, PORT, SNAPSHOT_PATH, SOCKET_DIR, WORKERS
 from .enums import ResponseType, SignalingDataType
+from .heartbeat import heartbeat_context
 from .http_handlers import register_http_routes
 from .http_lobby_handlers import register_http_lobby_routes
+from .log import get_logger, setup_logging, shutdown_logging
+from .reaper import reaper_context
+from .router import Router
 from .state import state
-from .websocket_handlers import register_websocket_routes
+from .websocket_handlers import receive_signal, register_websocket_routes
+
+log = get_logger("server")
 
 # Type alias for middleware handler
 Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
@@ -45,7 +58,11 @@ async def cors_middleware(request: web.Request, handler: Handler) -> web.StreamR
 
     response.headers["Access-Control-Allow-Origin"] = CONFIG.cors_origins
     response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
-    response.headers["Access-Control-Allow-Headers"] = "Content-Type, Accept, Cache-Control"
+    response.headers["Access-Control-Allow-Headers"] = (
+        "Content-Type, Accept, Cache-Control, If-None-Match, Last-Event-ID, "
+        "X-Peer-Id, X-Target, X-Exclude, X-Packet-Key"
+    )
+    response.headers["Access-Control-Expose-Headers"] = "ETag"
     return response
 
 
@@ -56,24 +73,23 @@ async def cors_middleware(request: web.Request, handler: Handler) -> web.StreamR
 
 async def cleanup_all_connections() -> None:
     """Close all WebSocket connections gracefully."""
-    print("\n[SHUTDOWN] Closing all connections...")
+    log.info("Closing all connections...")
 
     # Close lobby WebSocket connections
     for peer in list(state.lobby_peers.values()):
         if peer.ws and not peer.ws.closed:
             try:
-                await peer.ws.send_json({"t": ResponseType.SERVER_SHUTDOWN})
+                await send_json(peer.ws, {"t": ResponseType.SERVER_SHUTDOWN})
                 await peer.ws.close(code=1001, message=b"Server shutdown")
             except Exception:
                 pass
 
     # Close signaling WebSocket connections
-    for code in list(state.ws_connections.keys()):
-        connections: dict[int, Any] = state.ws_connections.get(code, {})
-        for _peer_id, ws in connections.items():
+    for session in list(state.sessions.values()):
+        for ws in list(session.connections.values()):
             if not ws.closed:
                 try:
-                    await ws.send_json({"data_type": SignalingDataType.SERVER_SHUTDOWN})
+                    await send_json(ws, {"data_type": SignalingDataType.SERVER_SHUTDOWN})
                     await ws.close(code=1001, message=b"Server shutdown")
                 except Exception:
                     pass
@@ -81,11 +97,22 @@ async def cleanup_all_connections() -> None:
     # Clear all state
     state.clear_all()
 
-    print("[SHUTDOWN] All connections closed")
+    log.info("All connections closed")
+
+
+def save_snapshot() -> None:
+    """Write the state snapshot, if one is configured (single process only)."""
+    if not SNAPSHOT_PATH or bus.link is not None:
+        return
+    try:
+        snapshot.save(state, SNAPSHOT_PATH)
+    except OSError as e:
+        log.error("Failed to save snapshot to %s: %s", SNAPSHOT_PATH, e)
 
 
 async def on_shutdown(_app: web.Application) -> None:
     """Called when the application is shutting down."""
+    save_snapshot()
     await cleanup_all_connections()
 
 
@@ -105,16 +132,22 @@ async def keyboard_listener() -> None:
             cmd = line.strip().lower()
 
             if cmd == "r":
-                print("\n[RESTART] Clearing all connections and state...")
+                log.info("Restart: clearing all connections and state...")
                 await cleanup_all_connections()
-                print("[RESTART] Server state reset. Ready for new connections.\n")
+                log.info("Restart: server state reset. Ready for new connections.")
+            elif cmd == "s":
+                if SNAPSHOT_PATH:
+                    save_snapshot()
+                else:
+                    print("  No snapshot file (start with --snapshot PATH)")
             elif cmd == "q":
-                print("\n[QUIT] Shutting down server...")
+                log.info("Shutting down server...")
                 # Raise SystemExit to trigger graceful shutdown
                 raise SystemExit(0)
             elif cmd == "h" or cmd == "help":
                 print("\n  Commands:")
                 print("    r     - Reset server state (disconnect all clients)")
+                print("    s     - Save a state snapshot now")
                 print("    q     - Quit server")
                 print("    h     - Show this help\n")
             elif cmd:
@@ -125,7 +158,7 @@ async def keyboard_listener() -> None:
         except SystemExit:
             raise
         except Exception as e:
-            print(f"[ERROR] Keyboard listener error: {e}")
+            log.error("Keyboard listener error: %s", e)
 
 
 # =============================================================================
@@ -137,8 +170,10 @@ def create_app() -> web.Application:
     """Create and configure the aiohttp application."""
     app = web.Application(middlewares=[cors_middleware])
 
-    # Register shutdown handler
+    # Register shutdown handler and background tasks
     app.on_shutdown.append(on_shutdown)
+    app.cleanup_ctx.append(reaper_context)
+    app.cleanup_ctx.append(heartbeat_context)
 
     # Register routes
     register_http_routes(app)
@@ -167,6 +202,8 @@ def print_banner() -> None:
     print()
     print(f"  Local IP:       {LOCAL_IP}:{PORT}")
     print(f"  Full URL:       https://{LOCAL_IP}:{PORT}")
+    if WORKERS > 1:
+        print(f"  Workers:        {WORKERS}")
     print()
     print("  HTTP API (recommended for web):")
     print("    POST /api/lobby/connect     - Get peer ID")
@@ -175,7 +212,11 @@ def print_banner() -> None:
     print("    POST /api/lobby/leave       - Leave lobby")
     print("    GET  /api/lobby/list        - List lobbies")
     print("    POST /api/lobby/broadcast   - Send game packets")
+    print("    POST /api/lobby/broadcast/raw - Send raw binary game packets")
+    print("    POST /api/lobby/broadcast/batch - Send many game packets at once")
     print("    GET  /api/lobby/events      - SSE event stream")
+    print("    GET  /api/lobby/poll        - Long-poll events (when proxies buffer SSE)")
+    print("    POST /api/lobby/ack         - Acknowledge events (flow control)")
     print("    GET  /api/server/info       - Server info")
     print()
     print("  Legacy WebSocket (backward compatible):")
@@ -184,7 +225,10 @@ def print_banner() -> None:
     print()
     print("=" * 60)
     print()
-    print("  Commands: r = reset state, q = quit, h = help")
+    if WORKERS > 1:
+        print("  Stop with Ctrl+C")
+    else:
+        print("  Commands: r = reset state, s = save snapshot, q = quit, h = help")
     print()
     print("[SERVER] Waiting for connections...")
     print()
@@ -195,13 +239,8 @@ def print_banner() -> None:
 # =============================================================================
 
 
-async def run_server() -> None:
-    """Run the server with keyboard input support."""
-    app = create_app()
-    runner = web.AppRunner(app)
-    await runner.setup()
-
-    # Load SSL certificates
+def load_ssl_context() -> ssl.SSLContext | None:
+    """The LAN certificate, or None (plain HTTP) if it cannot be loaded."""
     ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
 
     # Path relative to app.py -> server -> signaling-server -> game root -> exports/certs
@@ -212,10 +251,22 @@ async def run_server() -> None:
     try:
         ssl_context.load_cert_chain(certfile=str(cert_path), keyfile=str(key_path))
     except Exception as e:
-        print(f"[SERVER] Failed to load SSL certificates: {e}")
-        print("[SERVER] Starting without SSL (HTTP only)")
-        ssl_context = None
+        log.warning("Failed to load SSL certificates: %s", e)
+        log.warning("Starting without SSL (HTTP only)")
+        return None
+    return ssl_context
+
+
+async def run_server() -> None:
+    """Run the server with keyboard input support."""
+    if SNAPSHOT_PATH:
+        snapshot.restore(state, SNAPSHOT_PATH)
 
+    app = create_app()
+    runner = web.AppRunner(app)
+    await runner.setup()
+
+    ssl_context = load_ssl_context()
     if ssl_context:
         site = web.TCPSite(runner, CONFIG.host, PORT, ssl_context=ssl_context)
     else:
@@ -229,15 +280,115 @@ async def run_server() -> None:
         await runner.cleanup()
 
 
+# =============================================================================
+# Multi-worker Mode
+# =============================================================================
+
+# Seconds a stopping worker waits for open requests (event streams) before cancelling them
+WORKER_SHUTDOWN_TIMEOUT = 5.0
+
+
+async def wait_for_stop_signal() -> None:
+    """Return on SIGINT or SIGTERM."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    await stop.wait()
+
+
+async def serve_worker(index: int, workers: int, socket_dir: str) -> None:
+    """Serve one worker: the shared port plus an internal socket other workers forward to."""
+    app = create_app()
+    app.cleanup_ctx.append(cluster_context(index, workers, socket_dir, {"signal": receive_signal}))
+    runner = web.AppRunner(app, shutdown_timeout=WORKER_SHUTDOWN_TIMEOUT)
+    await runner.setup()  # Connects to the router
+
+    await web.TCPSite(
+        runner, CONFIG.host, PORT, ssl_context=load_ssl_context(), reuse_port=True
+    ).start()
+    await web.UnixSite(runner, bus.worker_socket(socket_dir, index)).start()
+
+    # Stop on a signal, or with an error once the router link is gone
+    assert bus.link is not None
+    stop = asyncio.ensure_future(wait_for_stop_signal())
+    lost = asyncio.ensure_future(bus.link.lost.wait())
+    try:
+        await asyncio.wait([stop, lost], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        stop.cancel()
+        lost.cancel()
+        await runner.cleanup()
+    if lost.done() and not lost.cancelled():
+        raise SystemExit(f"Worker {index} lost its router link")
+
+
+def run_worker(index: int, workers: int, socket_dir: str) -> None:
+    """Entry point of a worker process."""
+    suppress_connection_reset_errors()
+    setup_logging()
+    try:
+        asyncio.run(serve_worker(index, workers, socket_dir))
+    finally:
+        shutdown_logging()
+
+
+async def run_cluster(workers: int) -> None:
+    """Run the router here and `workers` worker processes; stop them all if one exits."""
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise SystemExit("--workers needs SO_REUSEPORT (Linux)")
+    if SNAPSHOT_PATH:
+        log.warning("Snapshots are not supported with --workers; %s is ignored", SNAPSHOT_PATH)
+
+    socket_dir = SOCKET_DIR or tempfile.mkdtemp(prefix="signaling-")
+    server = await Router().start(bus.router_socket(socket_dir))
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=run_worker, args=(index, workers, socket_dir), name=f"worker-{index}"
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    stop = asyncio.ensure_future(wait_for_stop_signal())
+    try:
+        while not stop.done():
+            await asyncio.wait([stop], timeout=0.5)
+            exited = [process.name for process in processes if not process.is_alive()]
+            if exited:
+                log.error("Worker process %s exited, stopping", ", ".join(exited))
+                break
+    finally:
+        stop.cancel()
+        for process in processes:
+            if process.is_alive():
+                process.terminate()  # SIGTERM: the worker shuts down gracefully
+        loop = asyncio.get_running_loop()
+        for process in processes:
+            await loop.run_in_executor(None, process.join, WORKER_SHUTDOWN_TIMEOUT * 2)
+            if process.is_alive():
+                process.kill()
+        server.close()
+        await server.wait_closed()
+        if not SOCKET_DIR:
+            shutil.rmtree(socket_dir, ignore_errors=True)
+
+
 def main() -> None:
     """Main entry point for the server."""
     suppress_connection_reset_errors()
+    setup_logging()
     print_banner()
 
     try:
-        asyncio.run(run_server())
+        asyncio.run(run_cluster(WORKERS) if WORKERS > 1 else run_server())
     except KeyboardInterrupt:
-        print("\n[SERVER] Stopped.")
+        log.info("Stopped.")
+    finally:
+        shutdown_logging()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,165 @@
+# pyright: strict
+
+"""
+Inter-process Event Bus
+
+With --workers N, the worker processes talk to each other through the
+router process over Unix stream sockets. Every frame is a small header
+followed by a marshal-encoded tuple whose first item names the message:
+
+    !Ii  payload length, destination (a worker index, or ROUTER)
+
+Frames addressed to a worker (deliveries, signaling messages) are relayed by
+the router without being decoded. Frames addressed to ROUTER are requests it
+answers itself (see router.py).
+
+BusLink is a worker's end of the connection. Requests sent with call() are
+answered by the router on the same connection; handlers passed to the link
+settle them (see membership.py). A worker whose link is lost or fail()s can
+no longer keep its replica in step with the router, so it shuts down.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import marshal
+import os
+import struct
+from collections.abc import Callable
+from typing import Any
+
+from .log import get_logger
+
+log = get_logger("bus")
+
+HEADER = struct.Struct("!Ii")
+ROUTER = -1  # Destination of frames the router handles itself
+
+# Message kind -> handler called with the remaining tuple items
+BusHandler = Callable[..., None]
+
+
+def router_socket(socket_dir: str) -> str:
+    return os.path.join(socket_dir, "router.sock")
+
+
+def worker_socket(socket_dir: str, index: int) -> str:
+    """Path of the worker's internal HTTP socket, used to forward requests to it."""
+    return os.path.join(socket_dir, f"worker-{index}.sock")
+
+
+def pack(dest: int, message: tuple[Any, ...]) -> bytes:
+    """Encode one frame."""
+    payload = marshal.dumps(message)
+    return HEADER.pack(len(payload), dest) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    """Read one frame; returns (destination, payload). Raises IncompleteReadError at EOF."""
+    size, dest = HEADER.unpack(await reader.readexactly(HEADER.size))
+    return dest, await reader.readexactly(size)
+
+
+class BusLink:
+    """A worker's connection to the router."""
+
+    def __init__(self, index: int, handlers: dict[str, BusHandler]) -> None:
+        self.index = index
+        self.handlers = handlers
+        self._writer: asyncio.StreamWriter | None = None
+        self._receiver: asyncio.Task[None] | None = None
+        self._pending: dict[int, asyncio.Future[Any]] = {}
+        self._request_ids = itertools.count(1)
+        # Set once the link is gone for good: closed, lost or failed
+        self.lost = asyncio.Event()
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self, path: str) -> None:
+        reader, self._writer = await asyncio.open_unix_connection(path)
+        self.send(ROUTER, ("hello", self.index))
+        self._receiver = asyncio.create_task(self._receive(reader))
+
+    async def close(self) -> None:
+        if self._receiver:
+            self._receiver.cancel()
+            await asyncio.gather(self._receiver, return_exceptions=True)
+        if self._writer:
+            self._writer.close()
+        self._fail_pending()
+
+    def fail(self, reason: str) -> None:
+        """Drop the link because this worker's replica can no longer be trusted."""
+        log.error("Worker %d leaving the bus: %s", self.index, reason)
+        if self._writer:
+            self._writer.close()
+        self._fail_pending()
+        self.lost.set()
+
+    def send(self, dest: int, message: tuple[Any, ...]) -> None:
+        """Queue a frame for `dest` (a worker index or ROUTER)."""
+        if not self.connected:
+            raise ConnectionError("Not connected to the router")
+        assert self._writer is not None
+        self._writer.write(pack(dest, message))
+
+    async def call(self, kind: str, *fields: Any) -> Any:
+        """Send a request to the router and wait until a handler settles it."""
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            self.send(ROUTER, (kind, request_id, *fields))
+            return await future
+        finally:
+            del self._pending[request_id]
+
+    def settle(
+        self, request_id: int, result: Any = None, error: BaseException | None = None
+    ) -> None:
+        """Complete a call() made by this worker."""
+        future = self._pending.get(request_id)
+        if future is None or future.done():
+            return
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    async def _receive(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                _dest, payload = await read_frame(reader)
+                kind, *fields = marshal.loads(payload)
+                handler = self.handlers.get(kind)
+                if handler is None:
+                    log.warning("Unknown bus message %r", kind)
+                    continue
+                try:
+                    handler(*fields)
+                except Exception:
+                    log.exception("Bus handler for %r failed", kind)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            log.error("Worker %d lost its router connection", self.index)
+        finally:
+            if self._writer:
+                self._writer.close()
+            self._fail_pending()
+            self.lost.set()
+
+    def _fail_pending(self) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Router connection lost"))
+
+
+# This process's link to the router; None when running as a single process
+link: BusLink | None = None
+
+
+def here() -> int:
+    """Index of this worker (0 when running as a single process)."""
+    return link.index if link else 0
@@ -0,0 +1,101 @@
+# pyright: strict
+
+"""
+Worker Side of Multi-worker Mode
+
+With --workers N the server runs N worker processes, all accepting on the
+same port (SO_REUSEPORT, the kernel spreads connections between them), plus
+the router process they talk to over the bus (see bus.py and router.py):
+- lobby membership changes go through the router (membership.py), so
+  every worker sees every peer, lobby and room
+- a peer's transport (SSE queue, WebSocket) lives on the worker it connected
+  through, its home; messages for it are forwarded there (fanout.py)
+- an event stream opened through another worker is passed through to the
+  peer's home over the home's internal HTTP socket (proxy())
+- legacy WebRTC signaling messages are forwarded to the worker holding the
+  target's socket (websocket_handlers.py)
+
+Peer reaping runs on each peer's home; the lobby and room sweep runs on
+worker 0 only.
+"""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Callable
+
+import aiohttp
+from aiohttp import web
+
+from . import bus
+from .fanout import receive_delivery
+from .log import get_logger
+from .membership import BUS_HANDLERS
+
+log = get_logger("bus")
+
+# Response headers that describe the hop to the worker, not the response
+_HOP_HEADERS = frozenset(("connection", "keep-alive", "transfer-encoding", "content-length"))
+
+# Sessions to the other workers' internal HTTP sockets, by worker index
+_clients: dict[int, aiohttp.ClientSession] = {}
+
+
+def cluster_context(
+    index: int,
+    workers: int,
+    socket_dir: str,
+    handlers: dict[str, bus.BusHandler],
+) -> Callable[[web.Application], AsyncIterator[None]]:
+    """aiohttp cleanup context connecting worker `index` to the router for the app's lifetime.
+
+    `handlers` are bus handlers beyond the ones membership and fan-out need.
+    """
+
+    async def context(_app: web.Application) -> AsyncIterator[None]:
+        link = bus.BusLink(index, {**BUS_HANDLERS, "deliver": receive_delivery, **handlers})
+        await link.connect(bus.router_socket(socket_dir))
+        bus.link = link
+        for other in range(workers):
+            if other != index:
+                _clients[other] = aiohttp.ClientSession(
+                    connector=aiohttp.UnixConnector(path=bus.worker_socket(socket_dir, other)),
+                    timeout=aiohttp.ClientTimeout(total=None),
+                )
+        log.info("Worker %d of %d joined the bus", index, workers)
+        try:
+            yield
+        finally:
+            for client in _clients.values():
+                await client.close()
+            _clients.clear()
+            await link.close()
+            bus.link = None
+
+    return context
+
+
+async def proxy(request: web.Request, index: int) -> web.StreamResponse:
+    """Pass a request through to worker `index`, streaming its response back."""
+    body = await request.read() if request.can_read_body else None
+    async with _clients[index].request(
+        request.method, f"http://worker{request.rel_url}", headers=request.headers, data=body
+    ) as upstream:
+        response = web.StreamResponse(
+            status=upstream.status,
+            reason=upstream.reason,
+            headers={
+                name: value
+                for name, value in upstream.headers.items()
+                if name.lower() not in _HOP_HEADERS
+            },
+        )
+        await response.prepare(request)
+        try:
+            async for chunk in upstream.content.iter_any():
+                await response.write(chunk)
+        except aiohttp.ClientError:
+            # The home worker went away mid-stream; end ours, the client reconnects
+            log.warning("Lost worker %d while passing through %s", index, request.path)
+            return response
+        await response.write_eof()
+        return response
@@ -0,0 +1,80 @@
+# pyright: strict
+
+"""
+JSON Codec
+
+Every JSON encode and decode in the server goes through this module: HTTP
+request bodies and responses, lobby and signaling WebSocket messages, SSE
+payloads and the lobby and room listings.
+
+The backend is chosen once, at import, from SERVER_JSON_BACKEND:
+- orjson: the orjson package (pip install orjson), encoding straight to bytes
+- json:   the standard library
+- auto:   orjson when it is installed, else json (the default)
+
+Both produce compact JSON (no spaces after separators) and UTF-8 bytes;
+the stdlib backend escapes non-ASCII characters, orjson writes them as
+UTF-8. Decoding accepts str or bytes and raises JSONDecodeError (orjson's
+error is a subclass of the stdlib one).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Callable
+from typing import Any
+
+from aiohttp import WSMsgType, web
+
+from .log import get_logger
+
+log = get_logger("server")
+
+JSONDecodeError = json.JSONDecodeError
+
+Dumps = Callable[[Any], bytes]
+Loads = Callable[[bytes | str], Any]
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _select(name: str) -> tuple[str, Dumps, Loads]:
+    """The backend called `name` ("auto", "orjson" or "json") as (name, dumps, loads)."""
+    if name in ("auto", "orjson"):
+        try:
+            import orjson
+        except ImportError:
+            if name == "orjson":
+                log.warning("SERVER_JSON_BACKEND=orjson but orjson is not installed; using json")
+        else:
+            option = orjson.OPT_NON_STR_KEYS  # Integer keys become strings, as with json
+
+            def orjson_dumps(obj: Any) -> bytes:
+                return orjson.dumps(obj, option=option)
+
+            return "orjson", orjson_dumps, orjson.loads
+    elif name != "json":
+        log.warning("Unknown SERVER_JSON_BACKEND %r; using json", name)
+    return "json", _stdlib_dumps, json.loads
+
+
+# dumps(obj) -> compact UTF-8 JSON bytes; loads(str or bytes) -> value
+BACKEND, dumps, loads = _select(os.environ.get("SERVER_JSON_BACKEND", "auto").lower())
+
+
+def json_response(data: Any, status: int = 200) -> web.Response:
+    """A JSON HTTP response encoded with the selected backend."""
+    return web.Response(body=dumps(data), status=status, content_type="application/json")
+
+
+async def read_json(request: web.Request) -> Any:
+    """Decode a request's JSON body. Raises JSONDecodeError (also for an empty body)."""
+    return loads(await request.read())
+
+
+async def send_json(ws: web.WebSocketResponse, data: Any) -> None:
+    """Send `data` as a JSON text message."""
+    await ws.send_frame(dumps(data), WSMsgType.TEXT)
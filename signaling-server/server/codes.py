@@ -0,0 +1,173 @@
+# pyright: strict
+
+"""
+Lobby/Room Code Allocator
+
+Hands out unique codes in O(1) without retrying against the set of live
+codes, however full the code space is:
+- each code length is a space of len(alphabet) ** length codes
+- fresh codes come from a counter pushed through a random affine permutation
+  (i -> (a * i + c) mod N, with a coprime to N), so they look scattered but
+  never repeat
+- released codes go to a FIFO free list and are reused only once the counter
+  has run out, oldest release first
+- reserved codes (e.g. the fixed debug room code) are never allocated; they
+  can only be claimed by name
+
+When the live and reserved codes reach CONFIG.room_code_max_occupancy of the current
+space, allocation moves on to codes one character longer. Shorter codes
+still in use stay valid.
+
+Codes are unguessable only in the casual sense; they are not secrets.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+
+@dataclass
+class _CodeSpace:
+    """All codes of one length, in permuted counter order."""
+
+    length: int
+    size: int
+    multiplier: int
+    inverse: int  # multiplier ** -1 mod size
+    offset: int
+    counter: int = 0
+    live: int = 0
+    reserved: int = 0  # Reserved codes of this length, never allocated
+    free: deque[int] = field(default_factory=lambda: deque[int]())
+
+    @classmethod
+    def create(cls, length: int, base: int) -> _CodeSpace:
+        size: int = base**length
+        multiplier = random.randrange(1, size)
+        while math.gcd(multiplier, size) != 1:
+            multiplier += 1
+        inverse = pow(multiplier, -1, size)
+        return cls(length, size, multiplier, inverse, random.randrange(size))
+
+    def value(self, index: int) -> int:
+        """The code value at position `index` of the permutation."""
+        return (self.multiplier * index + self.offset) % self.size
+
+    def index(self, value: int) -> int:
+        """Inverse of value()."""
+        return (self.inverse * (value - self.offset)) % self.size
+
+
+class CodeAllocator:
+    """O(1) allocation and release of unique fixed-alphabet codes."""
+
+    def __init__(
+        self, alphabet: str, length: int, max_occupancy: float, reserved: Iterable[str] = ()
+    ) -> None:
+        self.alphabet = alphabet
+        self.max_occupancy = max_occupancy
+        self._digits = {char: i for i, char in enumerate(alphabet)}
+        self._spaces: dict[int, _CodeSpace] = {}
+        self._in_use: set[str] = set()
+        self._reserved = frozenset(reserved)
+        self._current = self._add_space(length)
+
+    def __len__(self) -> int:
+        return len(self._in_use)
+
+    def __contains__(self, code: object) -> bool:
+        return code in self._in_use
+
+    @property
+    def length(self) -> int:
+        """Length of newly allocated codes."""
+        return self._current.length
+
+    @property
+    def occupancy(self) -> float:
+        """Share of the current code space in use or reserved."""
+        space = self._current
+        return (space.live + space.reserved) / space.size
+
+    def allocate(self) -> str:
+        """Return a code that is not in use and mark it used."""
+        space = self._current
+        used = space.live + space.reserved
+        if used + 1 > space.size * self.max_occupancy or used == space.size:
+            space = self._current = self._add_space(space.length + 1)
+
+        while True:
+            if space.counter < space.size:
+                value = space.value(space.counter)
+                space.counter += 1
+            else:
+                value = space.free.popleft()
+            code = self._encode(value, space.length)
+            # Only codes claimed by name (see claim()) can already be in use here
+            if code not in self._in_use and code not in self._reserved:
+                break
+
+        self._in_use.add(code)
+        space.live += 1
+        return code
+
+    def claim(self, code: str) -> bool:
+        """Mark a specific code (e.g. a reserved debug code) used. False if already taken."""
+        if code in self._in_use:
+            return False
+        self._in_use.add(code)
+        space = self._space_of(code)
+        if space and code not in self._reserved:  # Reserved codes are counted already
+            space.live += 1
+        return True
+
+    def release(self, code: str) -> None:
+        """Return a code to the pool. Releasing an unused code does nothing."""
+        if code not in self._in_use:
+            return
+        self._in_use.discard(code)
+        space = self._space_of(code)
+        if space is None or code in self._reserved:
+            return
+        space.live -= 1
+        value = self._decode(code)
+        # Codes the counter has not reached yet will come up again on their own
+        if space.index(value) < space.counter:
+            space.free.append(value)
+
+    def _add_space(self, length: int) -> _CodeSpace:
+        space = self._spaces.get(length)
+        if space is None:
+            space = self._spaces[length] = _CodeSpace.create(length, len(self.alphabet))
+            space.reserved = sum(
+                1
+                for code in self._reserved
+                if len(code) == length and not code.strip(self.alphabet)
+            )
+        return space
+
+    def _space_of(self, code: str) -> _CodeSpace | None:
+        space = self._spaces.get(len(code))
+        # strip() leaves nothing only if every character is in the alphabet
+        if space is None or code.strip(self.alphabet):
+            return None
+        return space
+
+    def _encode(self, value: int, length: int) -> str:
+        base = len(self.alphabet)
+        chars: list[str] = []
+        for _ in range(length):
+            value, digit = divmod(value, base)
+            chars.append(self.alphabet[digit])
+        return "".join(chars)
+
+    def _decode(self, code: str) -> int:
+        base = len(self.alphabet)
+        value = 0
+        for char in reversed(code):
+            value = value * base + self._digits[char]
+        return value
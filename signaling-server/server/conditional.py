@@ -0,0 +1,32 @@
+# pyright: strict
+
+"""
+Conditional GET Responses
+
+Listing endpoints tag their body with an ETag built from state version
+counters. A poll whose If-None-Match already holds the current tag gets a
+bodiless 304 and the body is never built.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from aiohttp import web
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header value matches `etag` (weak comparison, per RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def conditional_json(request: web.Request, etag: str, build: Callable[[], bytes]) -> web.Response:
+    """Return 304 if the client already has `etag`, else the JSON body from `build()`."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=build(), content_type="application/json", headers=headers)
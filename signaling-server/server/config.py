@@ -9,6 +9,11 @@ import socket
 import sys
 from dataclasses import dataclass
 
+from .enums import OverflowPolicy
+from .log import get_logger
+
+log = get_logger("config")
+
 
 # Global immutable config instance
 @dataclass(frozen=True)
@@ -20,7 +25,61 @@ class ServerConfig:
     cors_origins: str = "*"
     room_code_length: int = 4
     room_code_chars: str = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+    # Share of the current code space in use before new codes get one character longer
+    room_code_max_occupancy: float = 0.75
     default_channel: str = "gdsync-hpc-sorting"
+    # Fan-out: seconds a single WebSocket send may take before the peer is marked slow
+    send_deadline: float = 0.25
+    # Consecutive missed deadlines before a slow peer is dropped
+    slow_peer_strikes: int = 3
+    # Per-peer SSE queue capacity and what to do when it is exceeded
+    sse_queue_max_messages: int = 512
+    sse_queue_max_bytes: int = 1024 * 1024
+    sse_overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST
+    # SSE writer: max messages/bytes flushed per socket write, and how long to wait
+    # for a burst to build up before flushing (0 = write as soon as anything is queued)
+    sse_write_max_messages: int = 64
+    sse_write_max_bytes: int = 64 * 1024
+    sse_write_linger: float = 0.0
+    # SSE resume: frames kept per peer for Last-Event-ID replay, and how long a dropped
+    # stream keeps its lobby seat before the peer is disconnected (0 = immediately)
+    sse_replay_size: int = 256
+    sse_resume_grace: float = 10.0
+    # Long poll: seconds a poll waits for an event by default, and the most a client may ask for
+    long_poll_timeout: float = 25.0
+    long_poll_max_timeout: float = 60.0
+    # Credit window: unacknowledged events/bytes after which a peer that acknowledges what it
+    # reads is reported to senders as congested (0 = no limit)
+    credit_window_events: int = 64
+    credit_window_bytes: int = 64 * 1024
+    # Packet rate limits (0 = no limit): packets and bytes per second one peer (or signaling
+    # connection) and one whole lobby (or room) may send, in bursts of up to rate_limit_burst
+    # seconds' worth
+    peer_packet_rate: float = 240.0
+    peer_byte_rate: float = 512 * 1024
+    lobby_packet_rate: float = 2000.0
+    lobby_byte_rate: float = 4 * 1024 * 1024
+    rate_limit_burst: float = 1.0
+    # Seconds an SSE stream may go without writing before it gets a heartbeat
+    sse_heartbeat_interval: float = 15.0
+    # Idle peer reaper: seconds a connected peer may take to open its event stream, seconds
+    # without requests before a peer with no open stream or socket is dropped, and how
+    # often to check
+    peer_attach_ttl: float = 60.0
+    peer_idle_ttl: float = 300.0
+    reaper_tick: float = 1.0
+    # Lobby/room collection: how often to sweep, and seconds a room not backed by a lobby
+    # may sit without signaling connections or host updates
+    session_sweep_interval: float = 30.0
+    room_idle_ttl: float = 300.0
+    # Multi-worker mode: bytes the router may hold unsent for one worker before it drops
+    # that worker as stuck (the worker then exits and the cluster stops)
+    bus_buffer_max_bytes: int = 16 * 1024 * 1024
+    # Max packets in one /api/lobby/broadcast/batch request
+    broadcast_batch_max: int = 256
+    # Lobby search page size: default and maximum `limit`
+    lobby_page_size: int = 20
+    lobby_page_max: int = 100
 
 
 def get_local_ip() -> str:
@@ -31,7 +90,7 @@ def get_local_ip() -> str:
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         s.connect(("8.8.8.8", 80))
         ip = s.getsockname()[0]
-        print(f"[CONFIG] Detected local IP: {ip}")
+        log.debug("Detected local IP: %s", ip)
         s.close()
         return ip
     except Exception:
@@ -58,7 +117,21 @@ def _get_port() -> int:
     return CONFIG.default_port
 
 
+def _get_workers() -> int:
+    """Get the number of worker processes from the environment (1 = single process)."""
+    try:
+        return max(1, int(os.environ.get("SERVER_WORKERS", "1")))
+    except ValueError:
+        return 1
+
+
 CONFIG = ServerConfig()
 LOCAL_IP = get_local_ip()
 # Port can be overridden from command line or environment
 PORT = _get_port()
+# Multi-worker mode: worker processes, and the directory for the bus sockets
+# (a temporary directory when unset)
+WORKERS = _get_workers()
+SOCKET_DIR = os.environ.get("SERVER_SOCKET_DIR") or None
+# Warm restart: state snapshot written on shutdown and restored on startup (unset = off)
+SNAPSHOT_PATH = os.environ.get("SERVER_SNAPSHOT") or None
@@ -0,0 +1,65 @@
+# pyright: strict
+
+"""
+Per-Peer Credit Windows
+
+Tracks, for a peer reading events over SSE or long polling, the events
+queued or written to it that it has not acknowledged yet. A peer
+acknowledges an event ID (cumulatively) with POST /api/lobby/ack, or by
+passing it as the cursor of its next poll.
+
+Tracking is opt-in: a peer gets a window with its first acknowledgement, so
+clients that never acknowledge cost nothing. A peer whose backlog reaches
+CONFIG.credit_window_events events or CONFIG.credit_window_bytes bytes has
+no credit left and is reported as congested to senders, who can then slow
+down their state sync to it. The server itself still delivers everything.
+
+WebSocket peers are not tracked: their sends complete (or time out) before
+the broadcast responds.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+
+from .config import CONFIG
+from .frames import EncodedMessage
+
+
+class CreditWindow:
+    """Unacknowledged events of one peer, oldest first."""
+
+    __slots__ = ("bytes", "_inflight")
+
+    def __init__(self) -> None:
+        self.bytes = 0  # Total size of the unacknowledged SSE frames
+        self._inflight: deque[tuple[int, int]] = deque()  # (event ID, frame size)
+
+    @property
+    def events(self) -> int:
+        return len(self._inflight)
+
+    @property
+    def congested(self) -> bool:
+        """Whether the backlog has used up the window (a limit of 0 is no limit)."""
+        events, size = CONFIG.credit_window_events, CONFIG.credit_window_bytes
+        return bool(events and len(self._inflight) >= events) or bool(size and self.bytes >= size)
+
+    def sent(self, message: EncodedMessage) -> None:
+        """Count a message handed to the peer."""
+        size = len(message.sse)
+        self._inflight.append((message.seq, size))
+        self.bytes += size
+
+    def ack(self, seq: int) -> int:
+        """Acknowledge every event up to and including ID `seq`; returns how many."""
+        inflight = self._inflight
+        acked = 0
+        while inflight and inflight[0][0] <= seq:
+            self.bytes -= inflight.popleft()[1]
+            acked += 1
+        return acked
+
+    def to_dict(self) -> dict[str, int]:
+        """Convert to dictionary for JSON serialization."""
+        return {"events": len(self._inflight), "bytes": self.bytes}
@@ -17,6 +17,7 @@ class MessageType(StrEnum):
     JOIN_LOBBY = "join_lobby"
     LEAVE_LOBBY = "leave_lobby"
     PING = "ping"
+    BROADCAST = "broadcast"  # Game packet to the lobby, a peer or a subset
 
 
 class ResponseType(StrEnum):
@@ -28,6 +29,7 @@ class ResponseType(StrEnum):
     LOBBY_LIST = "lobby_list"
     LOBBY_JOINED = "lobby_joined"
     LOBBY_LEFT = "lobby_left"
+    BROADCAST_SENT = "broadcast_sent"
     PONG = "pong"
     ERROR = "error"
 
@@ -35,6 +37,7 @@ class ResponseType(StrEnum):
     PEER_JOINED = "peer_joined"
     PEER_LEFT = "peer_left"
     LOBBY_CLOSED = "lobby_closed"
+    GAME_PACKET = "game_packet"
     SERVER_SHUTDOWN = "server_shutdown"
 
 
@@ -48,9 +51,11 @@ class ErrorCode(StrEnum):
     NOT_IN_LOBBY = "NOT_IN_LOBBY"
     UNKNOWN_COMMAND = "UNKNOWN_COMMAND"
     INVALID_JSON = "INVALID_JSON"
+    INVALID_REQUEST = "INVALID_REQUEST"
     ROOM_NOT_FOUND = "ROOM_NOT_FOUND"
     PEER_NOT_FOUND = "PEER_NOT_FOUND"
     PEER_ID_IN_USE = "PEER_ID_IN_USE"
+    RATE_LIMITED = "RATE_LIMITED"
 
 
 class SignalingDataType(StrEnum):
@@ -64,6 +69,7 @@ class SignalingDataType(StrEnum):
     ANSWER = "answer"
     ICE = "ice"
     SERVER_SHUTDOWN = "server_shutdown"
+    ERROR = "error"
 
 
 class LobbyCloseReason(StrEnum):
@@ -72,6 +78,7 @@ class LobbyCloseReason(StrEnum):
     HOST_LEFT = "host_left"
     HOST_DISCONNECTED = "host_disconnected"
     HOST_CLOSED = "host_closed"
+    EXPIRED = "expired"
     CLOSED = "closed"
 
 
@@ -87,3 +94,31 @@ class SSEEventType(StrEnum):
     ERROR = "error"
     HEARTBEAT = "heartbeat"
     SERVER_SHUTDOWN = "server_shutdown"
+
+
+class DeliveryStatus(StrEnum):
+    """Per-target outcome of a fan-out."""
+
+    DELIVERED = "delivered"  # Written to the peer's WebSocket
+    QUEUED = "queued"  # Put on the peer's SSE queue
+    FORWARDED = "forwarded"  # Handed to the worker holding the peer's transport
+    TIMED_OUT = "timed_out"  # WebSocket send missed the deadline
+    DROPPED = "dropped"  # SSE queue full, rejected by its overflow policy
+    FAILED = "failed"  # No transport or the send raised
+
+
+class OverflowPolicy(StrEnum):
+    """What a full per-peer SSE queue does with a new message."""
+
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    DISCONNECT = "disconnect"
+    COALESCE = "coalesce"
+
+
+class LobbySort(StrEnum):
+    """Sort orders for lobby search."""
+
+    NEWEST = "newest"
+    MOST_PLAYERS = "most_players"  # Ties: newest first
+    FEWEST_PLAYERS = "fewest_players"  # Ties: oldest first
@@ -0,0 +1,217 @@
+# pyright: strict
+
+"""
+Concurrent Fan-out Engine
+
+Delivers one message to many peers at once:
+- SSE peers are enqueued synchronously (never blocks; bounded by PeerQueue)
+- WebSocket sends run concurrently, bounded by a shared deadline
+
+A WebSocket peer that misses the deadline is reported as timed out and
+marked slow; after CONFIG.slow_peer_strikes consecutive misses it is dropped.
+
+The report also carries the credit window (see credit.py) of each queued
+recipient that acknowledges what it reads, so senders can see its backlog.
+
+With --workers, peers whose transport another worker holds are sent there
+over the bus, one frame per worker carrying each message once, and
+reported as forwarded.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiohttp import WSMsgType
+
+from . import bus
+from .config import CONFIG
+from .credit import CreditWindow
+from .enums import DeliveryStatus
+from .frames import EncodedMessage, ensure_encoded
+from .log import get_logger
+from .models import Peer
+from .state import state
+
+log = get_logger("fanout")
+
+# Sends that outlived their deadline keep running here so they are not garbage collected
+_background_tasks: set[asyncio.Task[Any]] = set()
+
+
+@dataclass
+class FanoutReport:
+    """Per-target outcomes of a single fan-out."""
+
+    outcomes: dict[int, DeliveryStatus] = field(default_factory=lambda: {})
+    # Credit windows of the recipients that acknowledge what they read
+    credits: dict[int, CreditWindow] = field(default_factory=lambda: {})
+
+    @property
+    def delivered_to(self) -> list[int]:
+        """Peer IDs that received (WS), queued (SSE) or were forwarded the message."""
+        return [
+            peer_id
+            for peer_id, status in self.outcomes.items()
+            if status in (DeliveryStatus.DELIVERED, DeliveryStatus.QUEUED, DeliveryStatus.FORWARDED)
+        ]
+
+    @property
+    def congested(self) -> list[int]:
+        """Peer IDs whose unacknowledged backlog has used up their credit window."""
+        return [peer_id for peer_id, credit in self.credits.items() if credit.congested]
+
+    def to_dict(self) -> dict[str, str]:
+        """Convert to dictionary for JSON serialization (JSON keys are strings)."""
+        return {str(peer_id): str(status) for peer_id, status in self.outcomes.items()}
+
+    def backlog_dict(self) -> dict[str, dict[str, int]]:
+        """Unacknowledged events and bytes per tracked recipient, after this fan-out."""
+        return {str(peer_id): credit.to_dict() for peer_id, credit in self.credits.items()}
+
+
+def _on_background_done(task: asyncio.Task[Any]) -> None:
+    """Release a finished background task and swallow its error (peer is already marked)."""
+    _background_tasks.discard(task)
+    if not task.cancelled():
+        task.exception()
+
+
+def keep_alive(task: asyncio.Task[Any]) -> None:
+    """Hold a reference to a task until it finishes."""
+    _background_tasks.add(task)
+    task.add_done_callback(_on_background_done)
+
+
+async def _send_ws(peer: Peer, messages: Sequence[EncodedMessage]) -> None:
+    """Send pre-encoded messages, in order, over a peer's WebSocket."""
+    assert peer.ws is not None
+    for encoded in messages:
+        await peer.ws.send_frame(encoded.data, WSMsgType.TEXT)
+
+
+def _mark_slow(peer: Peer) -> None:
+    """Record a missed deadline and drop the peer once it runs out of strikes."""
+    peer.slow_strikes += 1
+    log.warning("Peer %s missed send deadline (strikes=%d)", peer.peer_id, peer.slow_strikes)
+
+    if peer.slow_strikes >= CONFIG.slow_peer_strikes and peer.ws and not peer.ws.closed:
+        log.warning("Dropping slow peer %s", peer.peer_id)
+        # Closing ends the WebSocket handler loop, which runs the normal disconnect path
+        keep_alive(asyncio.ensure_future(peer.ws.close(code=1008, message=b"Too slow")))
+
+
+async def fan_out(
+    targets: Iterable[Peer],
+    message: dict[str, Any] | EncodedMessage,
+    deadline: float | None = None,
+) -> FanoutReport:
+    """Send a message to all targets concurrently, waiting at most `deadline` seconds.
+
+    The message is encoded once and the same bytes are handed to every target.
+    """
+    encoded = (ensure_encoded(message),)
+    return await deliver(((peer, encoded) for peer in targets), deadline)
+
+
+async def deliver(
+    deliveries: Iterable[tuple[Peer, Sequence[EncodedMessage]]],
+    deadline: float | None = None,
+) -> FanoutReport:
+    """Deliver each peer its own ordered list of messages, all peers concurrently.
+
+    SSE peers get the whole list queued at once, so the writer flushes it in a
+    single write. A peer's outcome is the outcome of its whole list.
+    """
+    report = FanoutReport()
+    pending: dict[asyncio.Task[None], Peer] = {}
+    remote: dict[int, list[tuple[int, Sequence[EncodedMessage]]]] = {}
+    here = bus.here()
+
+    for peer, messages in deliveries:
+        if peer.home != here:
+            remote.setdefault(peer.home, []).append((peer.peer_id, messages))
+            report.outcomes[peer.peer_id] = DeliveryStatus.FORWARDED
+        elif peer.ws and not peer.ws.closed:
+            pending[asyncio.ensure_future(_send_ws(peer, messages))] = peer
+        elif peer.sse_queue:
+            queued = [peer.sse_queue.put_nowait(encoded) for encoded in messages]
+            if all(queued):
+                report.outcomes[peer.peer_id] = DeliveryStatus.QUEUED
+            else:
+                report.outcomes[peer.peer_id] = DeliveryStatus.DROPPED
+            credit = peer.credit
+            if credit is not None:
+                for encoded, ok in zip(messages, queued, strict=True):
+                    if ok:
+                        credit.sent(encoded)
+                report.credits[peer.peer_id] = credit
+        else:
+            report.outcomes[peer.peer_id] = DeliveryStatus.FAILED
+
+    for home, items in remote.items():
+        _forward(home, items)
+
+    if not pending:
+        return report
+
+    timeout = CONFIG.send_deadline if deadline is None else deadline
+    done, not_done = await asyncio.wait(pending, timeout=timeout)
+
+    for task in done:
+        peer = pending[task]
+        if task.exception() is None:
+            peer.slow_strikes = 0
+            report.outcomes[peer.peer_id] = DeliveryStatus.DELIVERED
+        else:
+            log.warning("Error sending WS to peer %s: %s", peer.peer_id, task.exception())
+            report.outcomes[peer.peer_id] = DeliveryStatus.FAILED
+
+    for task in not_done:
+        # Not cancelled: interrupting a frame mid-write would corrupt the stream
+        keep_alive(task)
+        peer = pending[task]
+        report.outcomes[peer.peer_id] = DeliveryStatus.TIMED_OUT
+        _mark_slow(peer)
+
+    return report
+
+
+# =============================================================================
+# Deliveries Across Workers
+# =============================================================================
+
+
+def _forward(home: int, items: list[tuple[int, Sequence[EncodedMessage]]]) -> None:
+    """Send deliveries to worker `home`, each distinct message once."""
+    assert bus.link is not None
+    index: dict[int, int] = {}  # id(message) -> position in `messages`
+    messages: list[tuple[str, bytes, str | None]] = []
+    targets: list[tuple[int, list[int]]] = []
+    for peer_id, peer_messages in items:
+        positions: list[int] = []
+        for encoded in peer_messages:
+            position = index.get(id(encoded))
+            if position is None:
+                position = index[id(encoded)] = len(messages)
+                messages.append((encoded.event, encoded.data, encoded.key))
+            positions.append(position)
+        targets.append((peer_id, positions))
+    bus.link.send(home, ("deliver", messages, targets))
+
+
+def receive_delivery(
+    messages: list[tuple[str, bytes, str | None]], targets: list[tuple[int, list[int]]]
+) -> None:
+    """Bus handler: deliver what another worker forwarded to peers held here."""
+    encoded = [EncodedMessage.from_data(event, data, key) for event, data, key in messages]
+    deliveries: list[tuple[Peer, Sequence[EncodedMessage]]] = []
+    for peer_id, positions in targets:
+        peer = state.get_lobby_peer(peer_id)
+        if peer is not None and peer.home == bus.here():
+            deliveries.append((peer, [encoded[i] for i in positions]))
+    if deliveries:
+        keep_alive(asyncio.ensure_future(deliver(deliveries)))
@@ -0,0 +1,89 @@
+# pyright: strict
+
+"""
+Pre-encoded Messages
+
+A message is serialized once per broadcast and the resulting immutable bytes
+are shared by every recipient:
+- data: JSON payload, sent as-is in a WebSocket text frame
+- sse:  complete "id:/event:/data:" frame, written as-is to SSE streams
+
+Every encoded message takes the next value of one server-wide sequence as
+its SSE event ID, so IDs increase monotonically on every stream and a client
+can resume with Last-Event-ID. With --workers, a message forwarded to
+another worker gets a new ID there, from the sequence of the worker that
+writes it to the stream. State snapshots save the sequence, so IDs keep
+increasing across a warm restart.
+
+Raw binary game packets skip JSON entirely: the payload is assembled around
+the base64 text (see encode_game_packet).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from .codec import dumps
+from .enums import SSEEventType
+
+# Server-wide SSE event ID sequence: the ID the next encoded message gets
+_next_seq = 1
+
+
+def next_event_id() -> int:
+    """The SSE event ID the next encoded message will get."""
+    return _next_seq
+
+
+def resume_event_ids(value: int) -> None:
+    """Continue the event ID sequence from `value`, unless it is already past it."""
+    global _next_seq
+    if value > _next_seq:
+        _next_seq = value
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class EncodedMessage:
+    """A message encoded once for every transport (compared by identity)."""
+
+    event: str
+    data: bytes
+    sse: bytes
+    key: str | None = None  # Coalescing key: a newer message with the same key supersedes it
+    seq: int = 0  # SSE event ID
+
+    @classmethod
+    def encode(cls, message: dict[str, Any], key: str | None = None) -> EncodedMessage:
+        """Encode a message dict; its "t" field becomes the SSE event name."""
+        event = str(message.get("t", "message"))
+        data = dumps(message)
+        return cls.from_data(event, data, key)
+
+    @classmethod
+    def from_data(cls, event: str, data: bytes, key: str | None = None) -> EncodedMessage:
+        """Wrap an already encoded JSON payload, giving it the next SSE event ID."""
+        global _next_seq
+        seq = _next_seq
+        _next_seq = seq + 1
+        return cls(event=event, data=data, sse=sse_frame(event, data, seq), key=key, seq=seq)
+
+
+def sse_frame(event: str, data: bytes, seq: int | None = None) -> bytes:
+    """Build a single SSE frame from an event name, a JSON payload and an optional event ID."""
+    frame = b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+    return frame if seq is None else b"id: %d\n%b" % (seq, frame)
+
+
+def encode_game_packet(sender_id: int, packet_b64: bytes, key: str | None = None) -> EncodedMessage:
+    """Wrap an already base64-encoded packet in a game_packet message without a JSON encode."""
+    event = SSEEventType.GAME_PACKET
+    data = b'{"t":"%b","from":%d,"packet":"%b"}' % (event.encode(), sender_id, packet_b64)
+    return EncodedMessage.from_data(event, data, key)
+
+
+def ensure_encoded(message: dict[str, Any] | EncodedMessage) -> EncodedMessage:
+    """Encode a message unless it already is."""
+    if isinstance(message, EncodedMessage):
+        return message
+    return EncodedMessage.encode(message)
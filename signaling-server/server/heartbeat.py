@@ -0,0 +1,112 @@
+# pyright: strict
+
+"""
+Shared SSE Heartbeat Ticker
+
+Idle event streams get a heartbeat every CONFIG.sse_heartbeat_interval
+seconds so proxies and browsers keep them open. Rather than every stream
+waiting on its queue with its own timeout, one ticker serves them all:
+- it wakes SUBTICKS times per interval and counts ticks
+- a stream records the current tick whenever it writes (a dict store, no
+  timer or clock read per message)
+- every stream sits in the wheel slot of the tick it could first be idle
+  for a full interval; each tick only checks the streams in its slot
+- a checked stream that wrote since is moved to a later slot; one that did
+  not is interrupted (PeerQueue.interrupt()) and writes the tick's heartbeat
+  frame, encoded once and shared by all of them
+
+So a tick costs time in the streams due then, not in every open stream, and
+a stream that keeps writing is looked at once per interval. An idle stream
+gets its heartbeat between one interval and one interval plus a tick after
+its last write.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+
+from aiohttp import web
+
+from .codec import dumps
+from .config import CONFIG
+from .enums import SSEEventType
+from .frames import sse_frame
+from .peer_queue import PeerQueue
+
+SUBTICKS = 5  # Ticks per heartbeat interval
+
+
+def _heartbeat_frame() -> bytes:
+    return sse_frame(SSEEventType.HEARTBEAT, dumps({"ts": time.monotonic()}))
+
+
+class HeartbeatTicker:
+    """Wakes event streams that have been idle for a full heartbeat interval."""
+
+    def __init__(self, interval: float = CONFIG.sse_heartbeat_interval) -> None:
+        self.interval = interval
+        self.tick = 0
+        self.frame = _heartbeat_frame()  # The current tick's heartbeat
+        self._active: dict[PeerQueue, int] = {}  # Queue of an open stream -> last active tick
+        self._due: dict[PeerQueue, int] = {}  # Queue -> tick it is next checked at
+        self._wheel: dict[int, list[PeerQueue]] = {}  # Tick -> queues checked at that tick
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    def add(self, queue: PeerQueue) -> None:
+        """Start tracking the stream reading `queue`."""
+        self._active[queue] = self.tick
+        self._schedule(queue, self.tick)
+
+    def touch(self, queue: PeerQueue) -> None:
+        """Record that the stream reading `queue` just wrote."""
+        self._active[queue] = self.tick
+
+    def remove(self, queue: PeerQueue) -> None:
+        self._active.pop(queue, None)
+        self._due.pop(queue, None)  # Its wheel entry is skipped when reached
+
+    def _schedule(self, queue: PeerQueue, active: int) -> None:
+        # Active during tick `active`: idle for at least SUBTICKS whole ticks at `due`
+        due = active + SUBTICKS + 1
+        self._due[queue] = due
+        self._wheel.setdefault(due, []).append(queue)
+
+    def advance(self) -> int:
+        """Count one tick and interrupt the due streams idle for an interval; returns how many."""
+        self.tick += 1
+        self.frame = _heartbeat_frame()
+        tick = self.tick
+        woken = 0
+        for queue in self._wheel.pop(tick, ()):
+            if self._due.get(queue) != tick:
+                continue  # Removed, or re-added with a later slot
+            active = self._active[queue]
+            if active + SUBTICKS + 1 <= tick:
+                # A stream not waiting on its queue is busy writing and touches it anyway
+                if queue.interrupt():
+                    woken += 1
+                active = self._active[queue] = tick
+            self._schedule(queue, active)
+        return woken
+
+    async def run(self) -> None:
+        """Tick SUBTICKS times per interval, forever."""
+        while True:
+            await asyncio.sleep(self.interval / SUBTICKS)
+            self.advance()
+
+
+# Ticker shared by every event stream of this process
+heartbeats = HeartbeatTicker()
+
+
+async def heartbeat_context(_app: web.Application) -> AsyncIterator[None]:
+    """aiohttp cleanup context running the heartbeat ticker for the app's lifetime."""
+    task = asyncio.create_task(heartbeats.run())
+    yield
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
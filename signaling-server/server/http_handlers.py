@@ -8,24 +8,42 @@ REST API endpoints for backward compatibility with existing clients.
 
 from __future__ import annotations
 
+from collections.abc import Iterable
 from typing import Any
 
 from aiohttp import web
 
+from . import bus
+from .codec import dumps, json_response, read_json
+from .conditional import conditional_json
 from .config import LOCAL_IP, PORT
 from .enums import ErrorCode, LobbyCloseReason
 from .lobby_handlers import close_lobby
+from .log import get_logger
+from .membership import MembershipError, catch_up, submit
+from .metrics import metrics
+from .models import Session
 from .state import state
 
+log = get_logger("rooms")
+
 # =============================================================================
 # Session Endpoints (WebRTC signaling)
 # =============================================================================
 
 
+async def find_room(code: str) -> Session | None:
+    """Get a room by code, catching up with the router on a miss (see membership.catch_up)."""
+    room = state.get_room(code)
+    if room is None and await catch_up():
+        room = state.get_room(code)
+    return room
+
+
 async def handle_host(request: web.Request) -> web.Response:
     """POST /session/host - Create a new room (HTTP fallback for WebRTC-only clients)"""
     try:
-        body: dict[str, Any] = await request.json()
+        body: dict[str, Any] = await read_json(request)
     except Exception:
         body = {}
 
@@ -35,7 +53,8 @@ async def handle_host(request: web.Request) -> web.Response:
     lobby_public: bool = body.get("public", True)
     player_limit: int = body.get("player_limit", 0)
 
-    room = state.create_room(
+    code = await submit(
+        "create_room",
         channel=channel,
         lobby_name=lobby_name,
         public=lobby_public,
@@ -43,15 +62,15 @@ async def handle_host(request: web.Request) -> web.Response:
         is_debug=is_debug,
     )
 
-    print(f"[HOST] Room created: {room.code} (channel: {channel}, lobby: {lobby_name})")
+    log.info("Room created: %s (channel: %s, lobby: %s)", code, channel, lobby_name)
 
     host = request.host.split(":")[0]
-    ws_url = f"wss://{host}:{PORT}/ws/{room.code}"
+    ws_url = f"wss://{host}:{PORT}/ws/{code}"
 
-    return web.json_response(
+    return json_response(
         {
             "success": True,
-            "code": room.code,
+            "code": code,
             "ws_url": ws_url,
             "lobby_name": lobby_name,
         }
@@ -62,38 +81,33 @@ async def handle_update(request: web.Request) -> web.Response:
     """POST /session/update/:code - Update room metadata"""
     code = request.match_info["code"].upper()
 
-    room = state.get_room(code)
+    room = await find_room(code)
     if not room:
-        return web.json_response({"success": False, "code": ErrorCode.ROOM_NOT_FOUND}, status=404)
+        return json_response({"success": False, "code": ErrorCode.ROOM_NOT_FOUND}, status=404)
 
     try:
-        body: dict[str, Any] = await request.json()
+        body: dict[str, Any] = await read_json(request)
     except Exception:
         body = {}
 
-    # Update lobby name mapping
-    old_lobby_name = room.lobby_name
-    new_lobby_name: str = body.get("lobby_name", old_lobby_name)
-
-    if old_lobby_name and old_lobby_name.lower() in state.lobby_name_to_code:
-        del state.lobby_name_to_code[old_lobby_name.lower()]
-
-    if new_lobby_name:
-        state.lobby_name_to_code[new_lobby_name.lower()] = code
-        room.lobby_name = new_lobby_name
-
-    if "public" in body:
-        room.public = body["public"]
-    if "player_limit" in body:
-        room.player_limit = body["player_limit"]
-
-    print(f"[UPDATE] Room {code} updated: lobby={room.lobby_name}, public={room.public}")
-
-    return web.json_response(
+    try:
+        await submit(
+            "update_room",
+            code=code,
+            lobby_name=body.get("lobby_name", room.name),
+            public=body.get("public"),
+            player_limit=body.get("player_limit"),
+        )
+    except MembershipError:
+        return json_response({"success": False, "code": ErrorCode.ROOM_NOT_FOUND}, status=404)
+
+    log.info("Room %s updated: lobby=%s, public=%s", code, room.name, room.public)
+
+    return json_response(
         {
             "success": True,
             "code": code,
-            "lobby_name": room.lobby_name,
+            "lobby_name": room.name,
             "public": room.public,
             "player_limit": room.player_limit,
         }
@@ -104,20 +118,25 @@ async def handle_player_count(request: web.Request) -> web.Response:
     """POST /session/players/:code - Update player count"""
     code = request.match_info["code"].upper()
 
-    room = state.get_room(code)
+    room = await find_room(code)
     if not room:
-        return web.json_response({"success": False, "code": ErrorCode.ROOM_NOT_FOUND}, status=404)
+        return json_response({"success": False, "code": ErrorCode.ROOM_NOT_FOUND}, status=404)
 
     try:
-        body: dict[str, Any] = await request.json()
+        body: dict[str, Any] = await read_json(request)
     except Exception:
         body = {}
 
-    if "player_count" in body:
-        room.player_count = int(body["player_count"])
-        print(f"[PLAYERS] Room {code} player count: {room.player_count}")
-
-    return web.json_response(
+    player_count = int(body["player_count"]) if "player_count" in body else None
+    try:
+        await submit("room_players", code=code, player_count=player_count)
+    except MembershipError:
+        return json_response({"success": False, "code": ErrorCode.ROOM_NOT_FOUND}, status=404)
+    # A lobby's player count follows its members
+    if player_count is not None and not room.is_lobby:
+        log.info("Room %s player count: %d", code, room.player_count)
+
+    return json_response(
         {
             "success": True,
             "code": code,
@@ -130,28 +149,26 @@ async def handle_close(request: web.Request) -> web.Response:
     """POST /session/close/:code - Close/delete a room"""
     code = request.match_info["code"].upper()
 
-    room = state.get_room(code)
+    room = await find_room(code)
     if not room:
-        return web.json_response({"success": False, "code": ErrorCode.ROOM_NOT_FOUND}, status=404)
+        return json_response({"success": False, "code": ErrorCode.ROOM_NOT_FOUND}, status=404)
 
-    lobby_name = room.lobby_name
+    lobby_name = room.name
 
     # Close any remaining WebSocket connections
-    connections = state.get_signaling_connections(code)
-    for ws in connections.values():
+    for ws in list(room.connections.values()):
         if not ws.closed:
             await ws.close()
 
-    # Also close the lobby if it exists
-    lobby = state.get_lobby(code)
-    if lobby:
-        await close_lobby(lobby, LobbyCloseReason.HOST_CLOSED)
+    # Close the lobby (notifying its members), or just drop the room
+    if room.is_lobby:
+        await close_lobby(room, LobbyCloseReason.HOST_CLOSED)
     else:
-        state.remove_room(code)
+        await submit("close_session", code=code)
 
-    print(f"[CLOSE] Room {code} closed by host (lobby: {lobby_name})")
+    log.info("Room %s closed by host (lobby: %s)", code, lobby_name)
 
-    return web.json_response(
+    return json_response(
         {
             "success": True,
             "code": code,
@@ -164,20 +181,22 @@ async def handle_join(request: web.Request) -> web.Response:
     code_or_name = request.match_info["code"]
 
     room = state.find_room(code_or_name)
+    if not room and await catch_up():
+        room = state.find_room(code_or_name)
     if not room:
-        return web.json_response({"success": False, "code": ErrorCode.ROOM_NOT_FOUND}, status=404)
+        return json_response({"success": False, "code": ErrorCode.ROOM_NOT_FOUND}, status=404)
 
-    print(f"[JOIN] Joining room: {room.code} (lobby: {room.lobby_name or 'N/A'})")
+    log.info("Joining room: %s (lobby: %s)", room.code, room.name or "N/A")
 
     host = request.host.split(":")[0]
     ws_url = f"wss://{host}:{PORT}/ws/{room.code}"
 
-    return web.json_response(
+    return json_response(
         {
             "success": True,
             "ws_url": ws_url,
             "code": room.code,
-            "lobby_name": room.lobby_name,
+            "lobby_name": room.name,
         }
     )
 
@@ -189,57 +208,71 @@ async def handle_join(request: web.Request) -> web.Response:
 
 async def handle_health(request: web.Request) -> web.Response:
     """GET /health - Health check"""
-    return web.json_response(
+    queues = [peer.sse_queue for peer in state.lobby_peers.values() if peer.sse_queue]
+    return json_response(
         {
             "status": "ok",
-            "rooms": len(state.rooms),
-            "lobbies": len(state.lobbies),
+            "worker": bus.here(),
+            "rooms": len(state.sessions),
+            "lobbies": state.lobby_count,
             "lobby_peers": len(state.lobby_peers),
+            "sse_queued_messages": sum(queue.qsize() for queue in queues),
+            "sse_queued_bytes": sum(queue.nbytes for queue in queues),
+            "metrics": metrics.to_dict(),
         }
     )
 
 
 async def handle_rooms(request: web.Request) -> web.Response:
     """GET /rooms - List all rooms (debug)"""
-    room_list: list[dict[str, Any]] = []
-    for code, room in state.rooms.items():
-        connections = state.get_signaling_connections(code)
-        room_dict = room.to_dict()
-        room_dict["signaling_peers"] = len(connections)
-        room_list.append(room_dict)
+    return conditional_json(request, state.listing_etag(state.room_list_version), _render_rooms)
+
 
-    return web.json_response({"rooms": room_list})
+def _render_rooms() -> bytes:
+    room_list = [room.to_room_dict() for room in state.sessions.values()]
+    return dumps({"rooms": room_list})
 
 
 async def handle_lobbies(request: web.Request) -> web.Response:
     """GET /lobbies - List public lobbies"""
+    # First try the lobby system (served from the cached list while nothing changes)
+    if state.public_lobbies:
+        return conditional_json(
+            request,
+            state.listing_etag(state.lobby_list_version),
+            lambda: state.lobby_list_payload("gdsync", _render_gdsync_list),
+        )
+
+    # Fallback to rooms for HTTP-only clients
+    etag = state.listing_etag(state.lobby_list_version, state.room_list_version)
+    return conditional_json(request, etag, _render_gdsync_rooms)
+
+
+def _render_gdsync_rooms() -> bytes:
     lobby_list: list[dict[str, Any]] = []
+    for room in state.get_public_rooms():
+        lobby_list.append(
+            {
+                "Name": room.name or room.code,
+                "Code": room.code,
+                "PlayerCount": room.player_count,
+                "PlayerLimit": room.player_limit,
+                "Public": True,
+                "Open": True,
+                "HasPassword": False,
+            }
+        )
 
-    # First try the lobby system
-    for lobby in state.get_public_lobbies():
-        lobby_list.append(lobby.to_gdsync_format())
+    return dumps({"lobbies": lobby_list})
 
-    # Fallback to rooms for HTTP-only clients
-    if not lobby_list:
-        for room in state.get_public_rooms():
-            lobby_list.append(
-                {
-                    "Name": room.lobby_name or room.code,
-                    "Code": room.code,
-                    "PlayerCount": room.player_count,
-                    "PlayerLimit": room.player_limit,
-                    "Public": True,
-                    "Open": True,
-                    "HasPassword": False,
-                }
-            )
-
-    return web.json_response({"lobbies": lobby_list})
+
+def _render_gdsync_list(lobbies: Iterable[Session]) -> bytes:
+    return dumps({"lobbies": [lobby.to_gdsync_format() for lobby in lobbies]})
 
 
 async def handle_root(_request: web.Request) -> web.Response:
     """GET / - Friendly root info for browser users."""
-    return web.json_response(
+    return json_response(
         {
             "status": "ok",
             "message": "Signaling server is running. This is not the game page.",
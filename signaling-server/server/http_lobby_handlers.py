@@ -13,33 +13,63 @@ Endpoints:
 - POST /api/lobby/leave         - Leave current lobby
 - GET  /api/lobby/list          - List public lobbies
 - POST /api/lobby/broadcast     - Broadcast game packet to lobby
+- POST /api/lobby/broadcast/raw - Broadcast a raw binary game packet
+- POST /api/lobby/broadcast/batch - Broadcast several game packets at once
 - GET  /api/lobby/events        - SSE stream for receiving events
+- GET  /api/lobby/poll          - Long-poll alternative to the SSE stream
+- POST /api/lobby/ack           - Acknowledge received events (flow control)
 """
 
 from __future__ import annotations
 
 import asyncio
-import json
-from typing import Any
+import base64
+import math
+import time
+from collections import deque
+from collections.abc import Iterable, Mapping
+from itertools import islice
+from typing import Any, cast
 
 from aiohttp import web
 
+from . import bus, cluster
+from .codec import dumps, json_response, read_json
+from .conditional import conditional_json
 from .config import CONFIG, LOCAL_IP, PORT
-from .enums import ErrorCode, LobbyCloseReason, ResponseType, SSEEventType
-from .lobby_handlers import broadcast_to_lobby, close_lobby, send_to_peer
-from .models import Peer
+from .credit import CreditWindow
+from .enums import ErrorCode, LobbyCloseReason, LobbySort, ResponseType, SSEEventType
+from .fanout import FanoutReport, deliver, fan_out, keep_alive
+from .frames import EncodedMessage, encode_game_packet, sse_frame
+from .heartbeat import heartbeats
+from .lobby_handlers import (
+    INVALID_TARGET,
+    PacketTarget,
+    announce_departure,
+    broadcast_packet,
+    broadcast_to_lobby,
+    check_packet_rate,
+    coalesce_key,
+    handle_peer_disconnect,
+    packet_targets,
+    valid_packet_target,
+)
+from .lobby_index import LobbyQuery, parse_cursor
+from .log import get_logger
+from .membership import MembershipError, catch_up, submit
+from .metrics import metrics
+from .models import Peer, Session
+from .peer_queue import PeerQueueClosed, PeerQueueIdle
 from .state import state
 
+log = get_logger("http")
+sse_log = get_logger("sse")
+
 # =============================================================================
 # Helper Functions
 # =============================================================================
 
 
-def json_response(data: dict[str, Any], status: int = 200) -> web.Response:
-    """Create a JSON response with proper content type."""
-    return web.json_response(data, status=status)
-
-
 def error_response(code: str, message: str, status: int = 400) -> web.Response:
     """Create an error JSON response."""
     return json_response(
@@ -52,6 +82,38 @@ def error_response(code: str, message: str, status: int = 400) -> web.Response:
     )
 
 
+def rate_limited_response(retry_after: float) -> web.Response:
+    """429 response for a rejected packet, with the seconds after which to retry."""
+    response = json_response(
+        {
+            "success": False,
+            "error": ErrorCode.RATE_LIMITED,
+            "message": "Sending too fast",
+            "retry_after": round(retry_after, 3),
+        },
+        status=429,
+    )
+    response.headers["Retry-After"] = str(math.ceil(retry_after))
+    return response
+
+
+def op_error_response(e: MembershipError) -> web.Response:
+    """Error response for an op the router rejected."""
+    return error_response(e.code, e.message, e.status)
+
+
+async def find_peer(peer_id: int) -> Peer | None:
+    """Get a peer for a request it made, recording the activity.
+
+    With workers, a miss waits for this worker to catch up first: the peer
+    may have connected through another worker a moment ago.
+    """
+    peer = state.touch_lobby_peer(peer_id)
+    if peer is None and await catch_up():
+        peer = state.touch_lobby_peer(peer_id)
+    return peer
+
+
 # =============================================================================
 # Connection Management
 # =============================================================================
@@ -76,29 +138,25 @@ async def handle_connect(request: web.Request) -> web.Response:
     }
     """
     try:
-        body: dict[str, Any] = await request.json()
+        body: dict[str, Any] = await read_json(request)
     except Exception:
         body = {}
 
-    # Use client-provided ID if given, otherwise generate one
+    # Use client-provided ID if given (rejected if in use), otherwise generate one
     client_id: int | None = body.get("client_id")
-    if client_id is not None and client_id > 0:
-        peer_id = client_id
-        # Check for collision with existing peer
-        if peer_id in state.lobby_peers:
-            return error_response(
-                ErrorCode.PEER_ID_IN_USE, f"Peer ID {peer_id} is already in use", status=409
-            )
-    else:
-        peer_id = state.get_next_peer_id()
+    requested = client_id if client_id is not None and client_id > 0 else 0
 
-    # Create peer with SSE queue (no WebSocket)
-    sse_queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
-    peer = Peer(peer_id=peer_id, sse_queue=sse_queue)
-    state.add_lobby_peer(peer)
-
-    print(
-        f"[HTTP] Peer {peer_id} connected (client_provided={client_id is not None}, total: {len(state.lobby_peers)})"
+    # Create peer with a bounded SSE queue (no WebSocket)
+    try:
+        peer_id = await submit("connect", peer_id=requested, home=bus.here(), sse=True)
+    except MembershipError as e:
+        return op_error_response(e)
+
+    log.info(
+        "Peer %s connected (client_provided=%s, total: %d)",
+        peer_id,
+        client_id is not None,
+        len(state.lobby_peers),
     )
 
     return json_response(
@@ -121,36 +179,20 @@ async def handle_disconnect(request: web.Request) -> web.Response:
     }
     """
     try:
-        body: dict[str, Any] = await request.json()
+        body: dict[str, Any] = await read_json(request)
     except Exception:
         return error_response(ErrorCode.INVALID_JSON, "Invalid JSON body")
 
     peer_id: int = body.get("peer_id", -1)
     peer = state.get_lobby_peer(peer_id)
+    if peer is None and await catch_up():
+        peer = state.get_lobby_peer(peer_id)
 
     if not peer:
         return error_response(ErrorCode.LOBBY_NOT_FOUND, "Peer not found", 404)
 
-    # Handle lobby leave if in one
-    if peer.lobby_code:
-        lobby = state.get_lobby(peer.lobby_code)
-        if lobby:
-            was_host = lobby.is_host(peer_id)
-            lobby.remove_peer(peer_id)
-
-            if was_host:
-                await close_lobby(lobby, LobbyCloseReason.HOST_DISCONNECTED)
-            else:
-                await broadcast_to_lobby(
-                    lobby,
-                    {
-                        "t": ResponseType.PEER_LEFT,
-                        "id": peer_id,
-                    },
-                )
-
-    state.remove_lobby_peer(peer_id)
-    print(f"[HTTP] Peer {peer_id} disconnected (remaining: {len(state.lobby_peers)})")
+    await handle_peer_disconnect(peer)
+    log.info("Peer %s disconnected (remaining: %d)", peer_id, len(state.lobby_peers))
 
     return json_response({"success": True})
 
@@ -185,12 +227,12 @@ async def handle_create_lobby(request: web.Request) -> web.Response:
     }
     """
     try:
-        body: dict[str, Any] = await request.json()
+        body: dict[str, Any] = await read_json(request)
     except Exception:
         return error_response(ErrorCode.INVALID_JSON, "Invalid JSON body")
 
     peer_id: int = body.get("peer_id", -1)
-    peer = state.get_lobby_peer(peer_id)
+    peer = await find_peer(peer_id)
 
     if not peer:
         return error_response(
@@ -205,17 +247,25 @@ async def handle_create_lobby(request: web.Request) -> web.Response:
     player_limit: int = body.get("player_limit", 0)
     player_data: dict[str, Any] = body.get("player", {"name": f"Player {peer_id}"})
 
-    peer.player_data = player_data
-
-    lobby = state.create_lobby(name, peer, public, player_limit)
+    try:
+        code = await submit(
+            "create_lobby",
+            peer_id=peer_id,
+            name=name,
+            public=public,
+            player_limit=player_limit,
+            player=player_data,
+        )
+    except MembershipError as e:
+        return op_error_response(e)
 
-    print(f"[HTTP] Lobby created: {lobby.code} '{name}' by peer {peer_id}")
+    log.info("Lobby created: %s '%s' by peer %s", code, name, peer_id)
 
     return json_response(
         {
             "success": True,
             "t": ResponseType.LOBBY_CREATED,
-            "code": lobby.code,
+            "code": code,
             "name": name,
             "host_id": peer_id,
             "your_id": peer_id,
@@ -247,12 +297,12 @@ async def handle_join_lobby(request: web.Request) -> web.Response:
     }
     """
     try:
-        body: dict[str, Any] = await request.json()
+        body: dict[str, Any] = await read_json(request)
     except Exception:
         return error_response(ErrorCode.INVALID_JSON, "Invalid JSON body")
 
     peer_id: int = body.get("peer_id", -1)
-    peer = state.get_lobby_peer(peer_id)
+    peer = await find_peer(peer_id)
 
     if not peer:
         return error_response(
@@ -263,13 +313,15 @@ async def handle_join_lobby(request: web.Request) -> web.Response:
     player_data: dict[str, Any] = body.get("player", {"name": f"Player {peer_id}"})
 
     lobby = state.find_lobby(code_or_name)
+    if not lobby and await catch_up():
+        lobby = state.find_lobby(code_or_name)
     if not lobby:
         return error_response(ErrorCode.LOBBY_NOT_FOUND, "Lobby not found", 404)
 
     # Check if peer is already in THIS lobby (host joining their own lobby)
     # This is allowed - just return success with current state
     if peer.lobby_code == lobby.code:
-        print(f"[HTTP] Peer {peer_id} re-joining their own lobby {lobby.code} (host join)")
+        log.info("Peer %s re-joining their own lobby %s (host join)", peer_id, lobby.code)
         return json_response(
             {
                 "success": True,
@@ -292,16 +344,17 @@ async def handle_join_lobby(request: web.Request) -> web.Response:
     if lobby.is_full():
         return error_response("LOBBY_FULL", "Lobby is full")
 
-    peer.player_data = player_data
-    lobby.add_peer(peer)
-
-    # Update room player count for backward compatibility
-    room = state.get_room(lobby.code)
-    if room:
-        room.player_count = len(lobby.peers)
-
-    print(
-        f"[HTTP] Peer {peer_id} joined {lobby.code} '{lobby.name}' (now {len(lobby.peers)} players)"
+    try:
+        joined = await submit("join_lobby", peer_id=peer_id, code=lobby.code, player=player_data)
+    except MembershipError as e:
+        return op_error_response(e)
+
+    log.info(
+        "Peer %s joined %s '%s' (now %d players)",
+        peer_id,
+        lobby.code,
+        lobby.name,
+        len(joined["players"]),
     )
 
     # Notify other peers (host and others) about new player
@@ -319,11 +372,11 @@ async def handle_join_lobby(request: web.Request) -> web.Response:
         {
             "success": True,
             "t": ResponseType.LOBBY_JOINED,
-            "code": lobby.code,
-            "name": lobby.name,
-            "host_id": lobby.host_id,
+            "code": joined["code"],
+            "name": joined["name"],
+            "host_id": joined["host_id"],
             "your_id": peer_id,
-            "players": lobby.get_players_list(),
+            "players": joined["players"],
         }
     )
 
@@ -346,12 +399,12 @@ async def handle_leave_lobby(request: web.Request) -> web.Response:
     }
     """
     try:
-        body: dict[str, Any] = await request.json()
+        body: dict[str, Any] = await read_json(request)
     except Exception:
         return error_response(ErrorCode.INVALID_JSON, "Invalid JSON body")
 
     peer_id: int = body.get("peer_id", -1)
-    peer = state.get_lobby_peer(peer_id)
+    peer = await find_peer(peer_id)
 
     if not peer:
         return error_response(ErrorCode.LOBBY_NOT_FOUND, "Peer not found", 404)
@@ -364,32 +417,19 @@ async def handle_leave_lobby(request: web.Request) -> web.Response:
         peer.lobby_code = None
         return error_response(ErrorCode.LOBBY_NOT_FOUND, "Lobby no longer exists")
 
-    was_host = lobby.is_host(peer_id)
-    lobby_code = lobby.code
-    lobby.remove_peer(peer_id)
-
-    print(f"[HTTP] Peer {peer_id} left {lobby_code} (was_host={was_host})")
-
-    if was_host:
-        await close_lobby(lobby, LobbyCloseReason.HOST_LEFT)
-    else:
-        await broadcast_to_lobby(
-            lobby,
-            {
-                "t": ResponseType.PEER_LEFT,
-                "id": peer_id,
-            },
-        )
+    try:
+        left = await submit("leave_lobby", peer_id=peer_id)
+    except MembershipError as e:
+        return op_error_response(e)
 
-        room = state.get_room(lobby_code)
-        if room:
-            room.player_count = len(lobby.peers)
+    log.info("Peer %s left %s (was_host=%s)", peer_id, left["code"], left["was_host"])
 
+    await announce_departure(peer_id, left, LobbyCloseReason.HOST_LEFT)
     return json_response(
         {
             "success": True,
             "t": ResponseType.LOBBY_LEFT,
-            "code": lobby_code,
+            "code": left["code"],
         }
     )
 
@@ -400,30 +440,128 @@ async def handle_list_lobbies(request: web.Request) -> web.Response:
 
     List all public lobbies.
 
+    Without query parameters every public lobby is returned, oldest first.
+    Any of these switches to a paginated search (newest first by default):
+        limit=20              page size (max CONFIG.lobby_page_max)
+        cursor=...            next_cursor from the previous page
+        sort=newest|most_players|fewest_players
+        not_full=1            skip lobbies at their player limit
+        min_free=2            at least this many free slots
+        name=abc              name prefix (case-insensitive)
+        min_limit=4&max_limit=8   player_limit range (0 = unlimited, treated as infinite)
+
     Response:
     {
         "success": true,
         "lobbies": [
             {"code": "ABCD", "name": "My Lobby", "players": 2, "player_limit": 4, "public": true}
-        ]
+        ],
+        "next_cursor": "12.ABCD"    // search only; null on the last page
     }
     """
-    lobbies = state.get_public_lobbies()
-    items = [lobby.to_list_item() for lobby in lobbies]
+    etag = state.listing_etag(state.lobby_list_version)
+    if not LOBBY_SEARCH_PARAMS.intersection(request.query):
+        return conditional_json(
+            request, etag, lambda: state.lobby_list_payload("list", _render_lobby_list)
+        )
 
-    return json_response(
-        {
-            "success": True,
-            "lobbies": items,
-        }
+    try:
+        query = _parse_lobby_query(request.query)
+    except ValueError as e:
+        return error_response(ErrorCode.INVALID_REQUEST, str(e))
+
+    def render() -> bytes:
+        lobbies, next_cursor = state.search_lobbies(query)
+        items = [lobby.to_list_item() for lobby in lobbies]
+        return dumps({"success": True, "lobbies": items, "next_cursor": next_cursor})
+
+    return conditional_json(request, etag, render)
+
+
+LOBBY_SEARCH_PARAMS = frozenset(
+    ("limit", "cursor", "sort", "not_full", "min_free", "name", "min_limit", "max_limit")
+)
+
+
+def _parse_lobby_query(params: Mapping[str, str]) -> LobbyQuery:
+    """Build a LobbyQuery from /api/lobby/list query parameters. Raises ValueError."""
+
+    def int_param(name: str) -> int | None:
+        value = params.get(name)
+        if value is None:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError(f"{name} must be an integer") from None
+
+    try:
+        sort = LobbySort(params.get("sort", LobbySort.NEWEST))
+    except ValueError:
+        raise ValueError(f"sort must be one of: {', '.join(LobbySort)}") from None
+
+    limit = int_param("limit") or CONFIG.lobby_page_size
+    cursor = params.get("cursor")
+    return LobbyQuery(
+        sort=sort,
+        limit=max(1, min(limit, CONFIG.lobby_page_max)),
+        cursor=parse_cursor(sort, cursor) if cursor else None,
+        not_full=params.get("not_full", "").lower() in ("1", "true", "yes"),
+        min_free=int_param("min_free") or 0,
+        name_prefix=params.get("name", ""),
+        min_limit=int_param("min_limit"),
+        max_limit=int_param("max_limit"),
     )
 
 
+def _render_lobby_list(lobbies: Iterable[Session]) -> bytes:
+    items = [lobby.to_list_item() for lobby in lobbies]
+    return dumps({"success": True, "lobbies": items})
+
+
 # =============================================================================
 # Game Packet Broadcasting
 # =============================================================================
 
 
+async def _sender_and_lobby(peer_id: int) -> tuple[Peer, Session] | web.Response:
+    """Resolve a sending peer and its lobby, or the error response to return."""
+    peer = await find_peer(peer_id)
+
+    if not peer:
+        return error_response(ErrorCode.LOBBY_NOT_FOUND, "Peer not found", 404)
+
+    if not peer.lobby_code:
+        await catch_up()  # It may have joined through another worker a moment ago
+    if not peer.lobby_code:
+        return error_response(ErrorCode.NOT_IN_LOBBY, "Not in a lobby")
+
+    lobby = state.get_lobby(peer.lobby_code)
+    if not lobby:
+        return error_response(ErrorCode.LOBBY_NOT_FOUND, "Lobby not found")
+
+    return peer, lobby
+
+
+def _parse_ids(value: str | None) -> list[int]:
+    """Parse a comma-separated list of peer IDs from a query parameter or header."""
+    if not value:
+        return []
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def _broadcast_response(report: FanoutReport) -> web.Response:
+    return json_response(
+        {
+            "success": True,
+            "delivered_to": report.delivered_to,
+            "outcomes": report.to_dict(),
+            "backlog": report.backlog_dict(),
+            "congested": report.congested,
+        }
+    )
+
+
 async def handle_broadcast(request: web.Request) -> web.Response:
     """
     POST /api/lobby/broadcast
@@ -435,63 +573,196 @@ async def handle_broadcast(request: web.Request) -> web.Response:
     {
         "peer_id": 1,
         "packet": "base64_encoded_data",
-        "target": -1  // -1 = all, or specific peer_id
+        "target": -1,     // -1 = all but sender, a peer_id, or a list of peer_ids
+        "exclude": [4],   // Optional: peer_ids to leave out
+        "key": "pos"      // Optional: queued packets from this sender with the same key
+                          // may be coalesced when a recipient's queue overflows
     }
 
     Response:
     {
         "success": true,
-        "delivered_to": [2, 3]
+        "delivered_to": [2, 3],
+        "outcomes": {"2": "delivered", "3": "queued", "4": "timed_out", "5": "dropped"},
+        "backlog": {"3": {"events": 70, "bytes": 9100}},
+        "congested": [3]
     }
+
+    Sends run concurrently; a WebSocket peer that misses CONFIG.send_deadline
+    is reported as "timed_out" instead of delaying this response.
+
+    A packet over the sender's or the lobby's rate limit is not sent: the
+    response is 429 RATE_LIMITED with "retry_after" seconds (and a
+    Retry-After header).
+
+    "backlog" lists the events and bytes not yet acknowledged by each queued
+    recipient that acknowledges what it reads (see /api/lobby/ack), this
+    packet included; "congested" are those past their credit window, to
+    which the sender should send less often. Recipients held by another
+    worker are not listed.
     """
     try:
-        body: dict[str, Any] = await request.json()
+        body: dict[str, Any] = await read_json(request)
     except Exception:
         return error_response(ErrorCode.INVALID_JSON, "Invalid JSON body")
 
     peer_id: int = body.get("peer_id", -1)
-    peer = state.get_lobby_peer(peer_id)
+    target: PacketTarget = body.get("target", -1)  # -1 = broadcast to all
+    exclude: list[int] | None = body.get("exclude")
+    if not valid_packet_target(target, exclude):
+        return error_response(ErrorCode.INVALID_REQUEST, INVALID_TARGET)
 
-    if not peer:
-        return error_response(ErrorCode.LOBBY_NOT_FOUND, "Peer not found", 404)
+    resolved = await _sender_and_lobby(peer_id)
+    if isinstance(resolved, web.Response):
+        return resolved
+    peer, lobby = resolved
 
-    if not peer.lobby_code:
-        return error_response(ErrorCode.NOT_IN_LOBBY, "Not in a lobby")
-
-    lobby = state.get_lobby(peer.lobby_code)
-    if not lobby:
-        return error_response(ErrorCode.LOBBY_NOT_FOUND, "Lobby not found")
+    retry_after = check_packet_rate(peer, lobby, 1, len(await request.read()))
+    if retry_after:
+        return rate_limited_response(retry_after)
 
     packet_data: str = body.get("packet", "")
-    target_peer: int = body.get("target", -1)  # -1 = broadcast to all
 
-    delivered_to: list[int] = []
+    report = await broadcast_packet(lobby, peer_id, packet_data, target, body.get("key"), exclude)
+    return _broadcast_response(report)
+
+
+async def handle_broadcast_raw(request: web.Request) -> web.Response:
+    """
+    POST /api/lobby/broadcast/raw?peer_id=1&target=2,3&exclude=4&key=pos
+
+    Binary variant of /api/lobby/broadcast. The body is the raw packet
+    (Content-Type: application/octet-stream); sender, target, exclude and key
+    come from the query string or the X-Peer-Id / X-Target / X-Exclude /
+    X-Packet-Key headers. target and exclude take comma-separated peer IDs.
+
+    The packet is base64-encoded once and spliced into the shared frame,
+    so the request is never parsed as JSON. Recipients receive the same
+    game_packet event as from the JSON endpoint.
+
+    Response: same as /api/lobby/broadcast, including the rate limit
+    """
+    try:
+        peer_id = int(request.query.get("peer_id") or request.headers.get("X-Peer-Id", ""))
+        target_ids = _parse_ids(request.query.get("target") or request.headers.get("X-Target"))
+        exclude = _parse_ids(request.query.get("exclude") or request.headers.get("X-Exclude"))
+    except ValueError:
+        return error_response(
+            ErrorCode.INVALID_REQUEST, "peer_id, target and exclude must be integers"
+        )
+    target: PacketTarget = target_ids[0] if len(target_ids) == 1 else target_ids or -1
+
+    resolved = await _sender_and_lobby(peer_id)
+    if isinstance(resolved, web.Response):
+        return resolved
+    peer, lobby = resolved
+
+    packet = await request.read()
+    retry_after = check_packet_rate(peer, lobby, 1, len(packet))
+    if retry_after:
+        return rate_limited_response(retry_after)
+    key = request.query.get("key") or request.headers.get("X-Packet-Key")
+    message = encode_game_packet(peer_id, base64.b64encode(packet), key=coalesce_key(peer_id, key))
+
+    report = await fan_out(packet_targets(lobby, peer_id, target, exclude), message)
+    return _broadcast_response(report)
+
+
+async def handle_broadcast_batch(request: web.Request) -> web.Response:
+    """
+    POST /api/lobby/broadcast/batch
+
+    Broadcast several game packets in one request, e.g. every call_func
+    GDSync emitted during one frame. The sender and lobby are resolved once,
+    entries are delivered in order, and each recipient gets all of its
+    packets in one go (a single coalesced SSE write).
 
-    message = {
-        "t": SSEEventType.GAME_PACKET,
-        "from": peer_id,
-        "packet": packet_data,
+    Body:
+    {
+        "peer_id": 1,
+        "packets": [
+            {"packet": "base64_encoded_data", "target": -1},
+            {"packet": "base64_encoded_data", "target": [2, 3], "exclude": [2], "key": "pos"}
+        ]
     }
 
-    if target_peer == -1:
-        # Broadcast to all except sender
-        for target_id, target in lobby.peers.items():
-            if target_id != peer_id:
-                success = await send_to_peer(target, message)
-                if success:
-                    delivered_to.append(target_id)
-    else:
-        # Send to specific peer
-        target = lobby.peers.get(target_peer)
-        if target:
-            success = await send_to_peer(target, message)
-            if success:
-                delivered_to.append(target_peer)
+    Response:
+    {
+        "success": true,
+        "count": 2,
+        "delivered_to": [2, 3],                        // union over all entries
+        "outcomes": {"2": "queued", "3": "delivered"}, // per recipient, whole batch
+        "backlog": {"2": {"events": 2, "bytes": 260}}, // as for /api/lobby/broadcast
+        "congested": [],
+        "entries": [[2, 3], [3]]                       // delivered_to per entry
+    }
+
+    Each entry counts as one packet against the rate limits; a batch over
+    them is rejected as a whole, as for /api/lobby/broadcast.
+    """
+    try:
+        body: dict[str, Any] = await read_json(request)
+    except Exception:
+        return error_response(ErrorCode.INVALID_JSON, "Invalid JSON body")
+
+    peer_id: int = body.get("peer_id", -1)
+    packets: Any = body.get("packets", [])
+    items = cast(list[Any] | None, packets if isinstance(packets, list) else None)
+    if items is None or len(items) > CONFIG.broadcast_batch_max:
+        return error_response(
+            ErrorCode.INVALID_REQUEST,
+            f"packets must be a list of at most {CONFIG.broadcast_batch_max} entries",
+        )
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            return error_response(ErrorCode.INVALID_REQUEST, f"packets[{index}] must be an object")
+        entry = cast(dict[str, Any], item)
+        if not valid_packet_target(entry.get("target", -1), entry.get("exclude")):
+            return error_response(ErrorCode.INVALID_REQUEST, f"packets[{index}]: {INVALID_TARGET}")
+    entries = cast(list[dict[str, Any]], items)
+
+    resolved = await _sender_and_lobby(peer_id)
+    if isinstance(resolved, web.Response):
+        return resolved
+    peer, lobby = resolved
+
+    # Every entry counts as a packet; the whole batch is admitted or rejected
+    retry_after = check_packet_rate(peer, lobby, len(entries), len(await request.read()))
+    if retry_after:
+        return rate_limited_response(retry_after)
+
+    # Group the encoded packets per recipient, preserving batch order
+    per_peer: dict[int, tuple[Peer, list[EncodedMessage]]] = {}
+    entry_targets: list[list[int]] = []
+    for entry in entries:
+        message = EncodedMessage.encode(
+            {
+                "t": SSEEventType.GAME_PACKET,
+                "from": peer_id,
+                "packet": entry.get("packet", ""),
+            },
+            key=coalesce_key(peer_id, entry.get("key")),
+        )
+        targets = packet_targets(lobby, peer_id, entry.get("target", -1), entry.get("exclude"))
+        for target in targets:
+            per_peer.setdefault(target.peer_id, (target, []))[1].append(message)
+        entry_targets.append([target.peer_id for target in targets])
+
+    report = await deliver(per_peer.values())
+    delivered = set(report.delivered_to)
 
     return json_response(
         {
             "success": True,
-            "delivered_to": delivered_to,
+            "count": len(entries),
+            "delivered_to": report.delivered_to,
+            "outcomes": report.to_dict(),
+            "backlog": report.backlog_dict(),
+            "congested": report.congested,
+            "entries": [
+                [target_id for target_id in targets if target_id in delivered]
+                for targets in entry_targets
+            ],
         }
     )
 
@@ -501,19 +772,45 @@ async def handle_broadcast(request: web.Request) -> web.Response:
 # =============================================================================
 
 
-async def handle_events(request: web.Request) -> web.StreamResponse:
+def _replay_after(peer: Peer, cursor: str | None) -> tuple[list[EncodedMessage], bool | None]:
+    """Messages sent to the peer after event ID `cursor`, and whether that is an exact resume.
+
+    The resume is exact when the ID is still in the replay ring, or is 0 (from
+    the start) and the ring has not dropped anything yet; otherwise whatever
+    the ring still holds past the ID is returned. The flag is None when there
+    is nothing to resume from (no valid cursor, or nothing sent).
     """
-    GET /api/lobby/events?peer_id=1
+    ring = peer.sse_replay
+    if not cursor or ring is None:
+        return [], None
+    try:
+        last_seq = int(cursor)
+    except ValueError:
+        return [], None
 
-    Server-Sent Events stream for receiving real-time updates.
+    if last_seq == 0 and len(ring) != ring.maxlen:
+        return list(ring), True
+    for index, sent in enumerate(ring):
+        if sent.seq == last_seq:
+            return list(islice(ring, index + 1, None)), True
+    return [m for m in ring if m.seq > last_seq], False
 
-    Events sent:
-    - welcome: Connection confirmed
-    - peer_joined: A peer joined the lobby
-    - peer_left: A peer left the lobby
-    - lobby_closed: The lobby was closed
-    - game_packet: Game data from another peer
-    - heartbeat: Keep-alive (every 15s)
+
+def _expire_sse(peer: Peer) -> None:
+    """Disconnect an SSE peer whose stream dropped and did not come back in time."""
+    peer.sse_expiry = None
+    if state.get_lobby_peer(peer.peer_id) is not peer:
+        return
+    metrics.sse_resume_expired += 1
+    sse_log.info("Peer %s did not resume its event stream, disconnecting", peer.peer_id)
+    keep_alive(asyncio.ensure_future(handle_peer_disconnect(peer)))
+
+
+async def _event_peer(request: web.Request) -> Peer | web.StreamResponse:
+    """The peer whose events `request` reads, or the response to send instead.
+
+    With workers, a request for a peer held by another worker is passed
+    through to it.
     """
     peer_id_str = request.query.get("peer_id", "")
 
@@ -525,12 +822,102 @@ async def handle_events(request: web.Request) -> web.StreamResponse:
     except ValueError:
         return web.Response(status=400, text="Invalid peer_id")
 
-    peer = state.get_lobby_peer(peer_id)
+    peer = await find_peer(peer_id)
     if not peer:
         return web.Response(status=404, text="Peer not found")
 
+    # Events are served by the worker holding the peer's queue
+    if peer.home != bus.here():
+        return await cluster.proxy(request, peer.home)
+
     if not peer.sse_queue:
         return web.Response(status=400, text="Peer not configured for SSE")
+    return peer
+
+
+async def _attach(peer: Peer) -> asyncio.Task[Any]:
+    """Make the current task the peer's event reader, taking over from any previous one.
+
+    The previous reader may be a dropped (or still half-open) SSE stream or a
+    pending long poll; either way it is cancelled.
+    """
+    if peer.sse_expiry:
+        peer.sse_expiry.cancel()
+        peer.sse_expiry = None
+    previous = peer.sse_stream
+    stream = peer.sse_stream = asyncio.current_task()
+    assert stream is not None
+    if previous and not previous.done():
+        previous.cancel()
+        await asyncio.wait([previous])
+
+    if peer.sse_replay is None:
+        peer.sse_replay = deque(maxlen=CONFIG.sse_replay_size)
+    return stream
+
+
+async def _detach(peer: Peer, stream: asyncio.Task[Any], closed_queue: bool) -> None:
+    """The reader `stream` is done: give the peer CONFIG.sse_resume_grace seconds to come back.
+
+    Only the newest reader of a peer that is still connected decides; a
+    closed (overflowed) queue disconnects the peer right away.
+    """
+    if peer.sse_stream is not stream or state.get_lobby_peer(peer.peer_id) is not peer:
+        return
+    peer.sse_stream = None
+    peer.last_activity = time.monotonic()  # Idle time counts from the reader's end
+    if closed_queue or CONFIG.sse_resume_grace <= 0:
+        await handle_peer_disconnect(peer)
+    else:
+        peer.sse_expiry = asyncio.get_running_loop().call_later(
+            CONFIG.sse_resume_grace, _expire_sse, peer
+        )
+
+
+async def handle_events(request: web.Request) -> web.StreamResponse:
+    """
+    GET /api/lobby/events?peer_id=1
+
+    Server-Sent Events stream for receiving real-time updates.
+
+    Events sent:
+    - welcome: Connection confirmed ({"peer_id", "resumed"})
+    - peer_joined: A peer joined the lobby
+    - peer_left: A peer left the lobby
+    - lobby_closed: The lobby was closed
+    - game_packet: Game data from another peer
+    - heartbeat: Keep-alive, after CONFIG.sse_heartbeat_interval seconds without events
+
+    Every event except welcome and heartbeat carries an `id:`. When the stream
+    drops, the peer keeps its lobby seat for CONFIG.sse_resume_grace seconds;
+    reconnecting with a Last-Event-ID header (or last_event_id query parameter)
+    replays what was written after that event, then continues with anything
+    queued meanwhile. "resumed" is true when nothing was lost.
+
+    The stream shares the peer's queue and event IDs with /api/lobby/poll,
+    so a client can switch between the two, passing its last event ID.
+
+    With workers, a stream opened through another worker than the one the
+    peer connected through is passed through to that worker.
+    """
+    peer = await _event_peer(request)
+    if not isinstance(peer, Peer):
+        return peer
+    peer_id = peer.peer_id
+
+    stream = await _attach(peer)
+    ring = peer.sse_replay
+    assert ring is not None
+    last_event_id = request.headers.get("Last-Event-ID") or request.query.get("last_event_id")
+    replay, exact = _replay_after(peer, last_event_id)
+    if exact is not None:
+        if peer.credit is not None:
+            peer.credit.ack(int(last_event_id or 0))
+        if exact:
+            metrics.sse_resumes += 1
+        else:
+            metrics.sse_resume_gaps += 1
+    resumed = bool(exact)
 
     # Create SSE response with CORS headers
     # Note: Must include CORS headers here since middleware can't modify StreamResponse after prepare()
@@ -544,68 +931,236 @@ async def handle_events(request: web.Request) -> web.StreamResponse:
             "X-Accel-Buffering": "no",  # Disable nginx buffering
             "Access-Control-Allow-Origin": CONFIG.cors_origins,
             "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type, Accept, Cache-Control",
+            "Access-Control-Allow-Headers": "Content-Type, Accept, Cache-Control, Last-Event-ID",
         },
     )
-    await response.prepare(request)
+    queue = peer.sse_queue
+    assert queue is not None
+    closed_queue = False
 
-    print(f"[SSE] Peer {peer_id} connected to event stream")
-
-    # Send welcome event
-    welcome_data = json.dumps({"peer_id": peer_id})
-    await response.write(f"event: {SSEEventType.WELCOME}\ndata: {welcome_data}\n\n".encode())
+    try:
+        await response.prepare(request)
+        sse_log.info(
+            "Peer %s connected to event stream (last_event_id=%s, replay=%d, resumed=%s)",
+            peer_id,
+            last_event_id,
+            len(replay),
+            resumed,
+        )
 
-    # Heartbeat interval (seconds)
-    heartbeat_interval = 15.0
+        # Send welcome event, then anything the previous stream wrote that the client missed
+        welcome_data = dumps({"peer_id": peer_id, "resumed": resumed})
+        await response.write(
+            b"".join([sse_frame(SSEEventType.WELCOME, welcome_data), *(m.sse for m in replay)])
+        )
 
-    try:
+        heartbeats.add(queue)
         while True:
             try:
-                # Wait for message with timeout for heartbeat
-                message = await asyncio.wait_for(peer.sse_queue.get(), timeout=heartbeat_interval)
+                message = await queue.get()
+            except PeerQueueIdle:
+                # Nothing written for a heartbeat interval; the ticker woke us
+                await response.write(heartbeats.frame)
+                metrics.sse_heartbeats += 1
+                continue
+
+            # Optionally let a burst build up, then flush everything queued in one write.
+            # Frames were encoded once at broadcast time and are shared by all recipients.
+            if CONFIG.sse_write_linger > 0 and queue.qsize() < CONFIG.sse_write_max_messages:
+                await asyncio.sleep(CONFIG.sse_write_linger)
+            batch = queue.drain(
+                CONFIG.sse_write_max_messages - 1,
+                CONFIG.sse_write_max_bytes - len(message.sse),
+            )
+            # Remember frames before writing: if the write fails the client resumes past them
+            ring.append(message)
+            if batch:
+                ring.extend(batch)
+                await response.write(b"".join([message.sse, *(m.sse for m in batch)]))
+            else:
+                await response.write(message.sse)
+            heartbeats.touch(queue)
 
-                # Determine event type from message
-                event_type = message.get("t", "message")
-                data = json.dumps(message)
+    except PeerQueueClosed:
+        closed_queue = True
+        sse_log.warning("Peer %s queue overflowed, disconnecting", peer_id)
+    except (ConnectionResetError, ConnectionAbortedError):
+        sse_log.info("Peer %s connection lost", peer_id)
+    except asyncio.CancelledError:
+        sse_log.info("Peer %s stream cancelled", peer_id)
+    finally:
+        heartbeats.remove(queue)
+        sse_log.info("Peer %s event stream closed", peer_id)
+        await _detach(peer, stream, closed_queue)
 
-                await response.write(f"event: {event_type}\ndata: {data}\n\n".encode())
+    return response
 
-            except TimeoutError:
-                # Send heartbeat
-                heartbeat_data = json.dumps({"ts": asyncio.get_event_loop().time()})
-                await response.write(
-                    f"event: {SSEEventType.HEARTBEAT}\ndata: {heartbeat_data}\n\n".encode()
-                )
 
-    except (ConnectionResetError, ConnectionAbortedError):
-        print(f"[SSE] Peer {peer_id} connection lost")
+# =============================================================================
+# Long Poll
+# =============================================================================
+
+
+def _poll_body(peer_id: int, resumed: bool, cursor: int, events: list[EncodedMessage]) -> bytes:
+    """The poll response, embedding each event's already encoded JSON payload."""
+    items = b",".join(
+        b'{"id":%d,"event":%b,"data":%b}' % (m.seq, dumps(m.event), m.data) for m in events
+    )
+    head = dumps({"success": True, "peer_id": peer_id, "resumed": resumed, "cursor": cursor})
+    return head[:-1] + b',"events":[' + items + b"]}"
+
+
+async def handle_poll(request: web.Request) -> web.StreamResponse:
+    """
+    GET /api/lobby/poll?peer_id=1&cursor=42&timeout=25
+
+    Long-poll alternative to /api/lobby/events, for networks whose proxies
+    buffer event streams. Returns every event queued for the peer in one
+    JSON array; when none is queued, holds the request until one arrives or
+    `timeout` seconds pass (default CONFIG.long_poll_timeout, at most
+    CONFIG.long_poll_max_timeout; 0 returns at once).
+
+    Response: {"success", "peer_id", "resumed", "cursor",
+               "events": [{"id", "event", "data"}, ...]}
+
+    Pass the returned cursor (the last event ID seen, or 0 before the first
+    event) to the next poll, or as Last-Event-ID when switching to the SSE
+    stream. Events after the cursor that an earlier response carried are returned
+    again, so a lost response loses nothing; "resumed" is false when events
+    past the cursor are gone. The first poll omits the cursor.
+
+    The cursor also acknowledges the events up to it, so senders see how far
+    behind a polling peer is (see /api/lobby/ack).
+
+    Polls share the peer's queue, event IDs and replay ring with the SSE
+    stream, and the same cleanup: between polls the peer keeps its seat for
+    CONFIG.sse_resume_grace seconds. A new poll or stream for the same peer
+    ends a pending poll with an empty response.
+    """
+    peer = await _event_peer(request)
+    if not isinstance(peer, Peer):
+        return peer
+
+    try:
+        timeout = float(request.query.get("timeout", CONFIG.long_poll_timeout))
+    except ValueError:
+        return web.Response(status=400, text="Invalid timeout")
+    timeout = min(max(timeout, 0.0), CONFIG.long_poll_max_timeout)
+    cursor = request.query.get("cursor")
+
+    stream = await _attach(peer)
+    ring = peer.sse_replay
+    queue = peer.sse_queue
+    assert ring is not None and queue is not None
+    events, exact = _replay_after(peer, cursor)
+    if exact is False:
+        metrics.sse_resume_gaps += 1
+    if exact is not None:
+        # The cursor acknowledges everything up to it; polling clients always track credit
+        if peer.credit is None:
+            peer.credit = CreditWindow()
+        peer.credit.ack(int(cursor or 0))
+    closed_queue = False
+
+    try:
+        if not events and queue.empty() and timeout > 0:
+            try:
+                async with asyncio.timeout(timeout):
+                    first = await queue.get()
+            except TimeoutError:
+                pass
+            else:
+                if CONFIG.sse_write_linger > 0:
+                    await asyncio.sleep(CONFIG.sse_write_linger)
+                ring.append(first)
+                events.append(first)
+
+        # Remember events before responding: if the response is lost the next poll repeats them
+        fresh = queue.drain(queue.qsize(), queue.nbytes)
+        ring.extend(fresh)
+        events.extend(fresh)
+    except PeerQueueClosed:
+        closed_queue = True
+        sse_log.warning("Peer %s queue overflowed, disconnecting", peer.peer_id)
+        return error_response(ErrorCode.PEER_NOT_FOUND, "Event queue overflowed", 410)
     except asyncio.CancelledError:
-        print(f"[SSE] Peer {peer_id} stream cancelled")
+        sse_log.debug("Peer %s poll replaced", peer.peer_id)
     finally:
-        # Handle disconnect when SSE stream closes
-        print(f"[SSE] Peer {peer_id} event stream closed")
-
-        # Trigger disconnect handling
-        if peer.lobby_code:
-            lobby = state.get_lobby(peer.lobby_code)
-            if lobby:
-                was_host = lobby.is_host(peer_id)
-                lobby.remove_peer(peer_id)
-
-                if was_host:
-                    await close_lobby(lobby, LobbyCloseReason.HOST_DISCONNECTED)
-                else:
-                    await broadcast_to_lobby(
-                        lobby,
-                        {
-                            "t": ResponseType.PEER_LEFT,
-                            "id": peer_id,
-                        },
-                    )
-
-        state.remove_lobby_peer(peer_id)
+        await _detach(peer, stream, closed_queue)
 
-    return response
+    if events:
+        last = events[-1].seq
+    elif exact:
+        last = int(cursor or 0)
+    else:
+        last = ring[-1].seq if ring else 0
+    return web.Response(
+        body=_poll_body(peer.peer_id, exact is not False, last, events),
+        content_type="application/json",
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+# =============================================================================
+# Acknowledgements
+# =============================================================================
+
+
+async def handle_ack(request: web.Request) -> web.Response | web.StreamResponse:
+    """
+    POST /api/lobby/ack
+
+    Acknowledge the events read so far, for flow control. The first
+    acknowledgement opens the peer's credit window: from then on senders see
+    its unacknowledged backlog in broadcast responses, and it is reported as
+    congested once the backlog reaches CONFIG.credit_window_events events or
+    CONFIG.credit_window_bytes bytes. Acknowledgements are cumulative, so an
+    SSE client can send one every few events or every frame of its game loop.
+
+    Long-poll cursors acknowledge automatically.
+
+    Body:
+    {
+        "peer_id": 1,
+        "cursor": 42      // Last event ID processed
+    }
+
+    Response:
+    {
+        "success": true,
+        "acked": 5,
+        "backlog": {"events": 3, "bytes": 390},
+        "congested": false
+    }
+    """
+    try:
+        body: dict[str, Any] = await read_json(request)
+    except Exception:
+        return error_response(ErrorCode.INVALID_JSON, "Invalid JSON body")
+
+    cursor: Any = body.get("cursor")
+    if not isinstance(cursor, int) or isinstance(cursor, bool) or cursor < 0:
+        return error_response(ErrorCode.INVALID_REQUEST, "cursor must be an event ID")
+
+    peer = await find_peer(body.get("peer_id", -1))
+    if not peer:
+        return error_response(ErrorCode.PEER_NOT_FOUND, "Peer not found", 404)
+
+    # Backlogs are tracked by the worker holding the peer's queue
+    if peer.home != bus.here():
+        return await cluster.proxy(request, peer.home)
+
+    if peer.credit is None:
+        peer.credit = CreditWindow()
+    acked = peer.credit.ack(cursor)
+    return json_response(
+        {
+            "success": True,
+            "acked": acked,
+            "backlog": peer.credit.to_dict(),
+            "congested": peer.credit.congested,
+        }
+    )
 
 
 # In your app.py routes
@@ -641,9 +1196,13 @@ def register_http_lobby_routes(app: web.Application) -> None:
 
     # Game packet broadcasting
     app.router.add_post("/api/lobby/broadcast", handle_broadcast)
+    app.router.add_post("/api/lobby/broadcast/raw", handle_broadcast_raw)
+    app.router.add_post("/api/lobby/broadcast/batch", handle_broadcast_batch)
 
-    # SSE event stream
+    # Event delivery: SSE stream, or long polling where proxies buffer streams
     app.router.add_get("/api/lobby/events", handle_events)
+    app.router.add_get("/api/lobby/poll", handle_poll)
+    app.router.add_post("/api/lobby/ack", handle_ack)
 
     # TODO move this to a separate route group if we add more server info endpoints in the future
     # Client verification
@@ -661,7 +1220,11 @@ def register_http_lobby_routes(app: web.Application) -> None:
         "/api/lobby/leave",
         "/api/lobby/list",
         "/api/lobby/broadcast",
+        "/api/lobby/broadcast/raw",
+        "/api/lobby/broadcast/batch",
         "/api/lobby/events",
+        "/api/lobby/poll",
+        "/api/lobby/ack",
         "/api/server/info",
     ]:
         app.router.add_route("OPTIONS", path, options_handler)
@@ -14,13 +14,23 @@ Handles messages for the lobby system (WebSocket or HTTP+SSE):
 
 from __future__ import annotations
 
-from collections.abc import Awaitable, Callable
-from typing import Any
-
-from .enums import ErrorCode, LobbyCloseReason, MessageType, ResponseType, SSEEventType
-from .models import Lobby, Peer
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any, cast
+
+from aiohttp import WSMsgType
+
+from .enums import ErrorCode, LobbyCloseReason, MessageType, ResponseType
+from .fanout import FanoutReport, fan_out
+from .frames import EncodedMessage, ensure_encoded
+from .log import get_logger
+from .membership import MembershipError, catch_up, submit
+from .models import Peer, Session
+from .ratelimit import TokenBucket, admit
 from .state import state
 
+log = get_logger("lobby")
+
 # Type alias for handler functions
 HandlerFunc = Callable[[Peer, dict[str, Any]], Awaitable[dict[str, Any]]]
 
@@ -30,72 +40,196 @@ HandlerFunc = Callable[[Peer, dict[str, Any]], Awaitable[dict[str, Any]]]
 # =============================================================================
 
 
-async def send_to_peer(peer: Peer, message: dict[str, Any]) -> bool:
-    """Send a JSON message to a peer via WebSocket or SSE queue."""
-    msg_type = message.get("t", "unknown")
+async def send_to_peer(peer: Peer, message: dict[str, Any] | EncodedMessage) -> bool:
+    """Send a message to a peer via WebSocket or SSE queue."""
+    encoded = ensure_encoded(message)
+    msg_type = encoded.event
 
     # Try WebSocket first
     if peer.ws and not peer.ws.closed:
         try:
-            await peer.ws.send_json(message)
-            print(f"[LOBBY] Sent {msg_type} to peer {peer.peer_id} via WS")
+            await peer.ws.send_frame(encoded.data, WSMsgType.TEXT)
+            log.debug("Sent %s to peer %s via WS", msg_type, peer.peer_id)
             return True
         except Exception as e:
-            print(f"[LOBBY] Error sending WS to peer {peer.peer_id}: {e}")
+            log.warning("Error sending WS to peer %s: %s", peer.peer_id, e)
             return False
 
     # Try SSE queue
     if peer.sse_queue:
-        try:
-            await peer.sse_queue.put(message)
-            print(
-                f"[LOBBY] Queued {msg_type} for peer {peer.peer_id} via SSE (queue_size={peer.sse_queue.qsize()})"
+        if peer.sse_queue.put_nowait(encoded):
+            log.debug(
+                "Queued %s for peer %s via SSE (queue_size=%d)",
+                msg_type,
+                peer.peer_id,
+                peer.sse_queue.qsize(),
             )
             return True
-        except Exception as e:
-            print(f"[LOBBY] Error queueing SSE for peer {peer.peer_id}: {e}")
-            return False
-
-    print(
-        f"[LOBBY] No transport for peer {peer.peer_id} (ws={peer.ws is not None}, sse={peer.sse_queue is not None})"
+        log.debug("SSE queue full for peer %s, %s not queued", peer.peer_id, msg_type)
+        return False
+
+    log.warning(
+        "No transport for peer %s (ws=%s, sse=%s)",
+        peer.peer_id,
+        peer.ws is not None,
+        peer.sse_queue is not None,
     )
     return False
 
 
 async def broadcast_to_lobby(
-    lobby: Lobby, message: dict[str, Any], exclude_peer_id: int | None = None
-) -> None:
-    """Broadcast a message to all peers in a lobby, optionally excluding one."""
-    msg_type = message.get("t", "unknown")
-    peer_ids = list(lobby.peers.keys())
-    print(
-        f"[LOBBY] Broadcasting {msg_type} to lobby {lobby.code} (peers={peer_ids}, exclude={exclude_peer_id})"
+    lobby: Session, message: dict[str, Any] | EncodedMessage, exclude_peer_id: int | None = None
+) -> FanoutReport:
+    """Broadcast a message to all peers in a lobby concurrently, optionally excluding one."""
+    encoded = ensure_encoded(message)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(
+            "Broadcasting %s to lobby %s (peers=%s, exclude=%s)",
+            encoded.event,
+            lobby.code,
+            list(lobby.peers),
+            exclude_peer_id,
+        )
+
+    targets = [peer for peer_id, peer in lobby.peers.items() if peer_id != exclude_peer_id]
+    return await fan_out(targets, encoded)
+
+
+# Packet target: -1 (everyone but the sender), a single peer ID, or a list of peer IDs
+PacketTarget = int | list[int]
+
+
+def packet_targets(
+    lobby: Session, sender_id: int, target: PacketTarget = -1, exclude: list[int] | None = None
+) -> list[Peer]:
+    """Resolve the recipients of a game packet in a single pass over the lobby."""
+    skip = set(exclude) if exclude else set[int]()
+
+    if isinstance(target, int):
+        if target != -1:
+            peer = lobby.peers.get(target)
+            return [peer] if peer and target not in skip else []
+        skip.add(sender_id)
+        return [peer for peer_id, peer in lobby.peers.items() if peer_id not in skip]
+
+    wanted = set(target) - skip
+    return [peer for peer_id, peer in lobby.peers.items() if peer_id in wanted]
+
+
+def _is_peer_id(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def valid_packet_target(target: Any, exclude: Any) -> bool:
+    """Whether a client sent a usable target (a peer ID or a list of them) and exclude list.
+
+    Check before packet_targets(), which assumes both are well-formed.
+    """
+    if isinstance(target, list):
+        if not all(_is_peer_id(peer_id) for peer_id in cast(list[Any], target)):
+            return False
+    elif not _is_peer_id(target):
+        return False
+    if exclude is None:
+        return True
+    return isinstance(exclude, list) and all(
+        _is_peer_id(peer_id) for peer_id in cast(list[Any], exclude)
     )
 
-    for peer_id, peer in lobby.peers.items():
-        if peer_id != exclude_peer_id:
-            await send_to_peer(peer, message)
 
+INVALID_TARGET = "target must be a peer ID or a list of peer IDs, exclude a list of peer IDs"
+
+
+def coalesce_key(sender_id: int, key: str | None) -> str | None:
+    """Scope a client-supplied coalescing key to its sender."""
+    return f"{sender_id}:{key}" if key else None
+
+
+def check_packet_rate(sender: Peer, lobby: Session, packets: int, nbytes: int) -> float:
+    """Charge packets against the sender's and the lobby's rate limits (see ratelimit.py).
+
+    Returns 0.0 if they are admitted, else the seconds after which to retry.
+    """
+    if sender.bucket is None:
+        sender.bucket = TokenBucket.for_peer()
+    if lobby.bucket is None:
+        lobby.bucket = TokenBucket.for_lobby()
+    return admit(sender.bucket, lobby.bucket, packets, nbytes)
 
-async def close_lobby(lobby: Lobby, reason: LobbyCloseReason = LobbyCloseReason.CLOSED) -> None:
+
+def rate_limited_error(retry_after: float) -> dict[str, Any]:
+    """Error message for a rejected packet, with the seconds after which to retry."""
+    return {
+        "t": ResponseType.ERROR,
+        "code": ErrorCode.RATE_LIMITED,
+        "message": "Sending too fast",
+        "retry_after": round(retry_after, 3),
+    }
+
+
+async def broadcast_packet(
+    lobby: Session,
+    sender_id: int,
+    packet: str,
+    target: PacketTarget = -1,
+    key: str | None = None,
+    exclude: list[int] | None = None,
+) -> FanoutReport:
+    """Send a game packet from one lobby member to its targets (HTTP and WebSocket paths)."""
+    message = EncodedMessage.encode(
+        {
+            "t": ResponseType.GAME_PACKET,
+            "from": sender_id,
+            "packet": packet,
+        },
+        key=coalesce_key(sender_id, key),
+    )
+    return await fan_out(packet_targets(lobby, sender_id, target, exclude), message)
+
+
+def lobby_members(peer_ids: Iterable[int]) -> list[Peer]:
+    """The peers among `peer_ids` that are still connected."""
+    peers = state.lobby_peers
+    return [peers[peer_id] for peer_id in peer_ids if peer_id in peers]
+
+
+async def close_lobby(lobby: Session, reason: LobbyCloseReason = LobbyCloseReason.CLOSED) -> None:
     """Close a lobby and notify all peers."""
-    code = lobby.code
-    print(f"[LOBBY] Closing {code} '{lobby.name}' (reason: {reason})")
-
-    # Notify all remaining peers
-    for peer in list(lobby.peers.values()):
-        await send_to_peer(
-            peer,
-            {
-                "t": ResponseType.LOBBY_CLOSED,
-                "code": code,
-                "reason": str(reason),
-            },
-        )
-        peer.lobby_code = None
+    closed = await submit("close_session", code=lobby.code)
+    if closed:
+        await announce_close(closed, reason)
+
+
+async def announce_close(closed: dict[str, Any], reason: LobbyCloseReason) -> None:
+    """Notify the members of a lobby that was closed (a close_session or leave op result)."""
+    log.info("Closing %s '%s' (reason: %s)", closed["code"], closed["name"], reason)
+    await fan_out(
+        lobby_members(closed["peers"]),
+        {
+            "t": ResponseType.LOBBY_CLOSED,
+            "code": closed["code"],
+            "reason": str(reason),
+        },
+    )
+
 
-    # Remove from state
-    state.remove_lobby(code)
+async def announce_departure(
+    peer_id: int, left: dict[str, Any], host_reason: LobbyCloseReason
+) -> None:
+    """Tell a lobby that a peer left it, or that it closed because the peer hosted it.
+
+    `left` is the result of a leave_lobby or disconnect op.
+    """
+    if left["was_host"]:
+        await announce_close(left, host_reason)
+        return
+    await fan_out(
+        lobby_members(left["peers"]),
+        {
+            "t": ResponseType.PEER_LEFT,
+            "id": peer_id,
+        },
+    )
 
 
 # =============================================================================
@@ -103,6 +237,11 @@ async def close_lobby(lobby: Lobby, reason: LobbyCloseReason = LobbyCloseReason.
 # =============================================================================
 
 
+def _error(e: MembershipError) -> dict[str, Any]:
+    """Error response for an op the router rejected."""
+    return {"t": ResponseType.ERROR, "code": e.code, "message": e.message}
+
+
 async def handle_create_lobby(peer: Peer, data: dict[str, Any]) -> dict[str, Any]:
     """Handle create_lobby command."""
     name: str = data.get("name", f"Lobby-{state.generate_code()}")
@@ -110,17 +249,23 @@ async def handle_create_lobby(peer: Peer, data: dict[str, Any]) -> dict[str, Any
     player_limit: int = data.get("player_limit", 0)
     player_data: dict[str, Any] = data.get("player", {"name": f"Player {peer.peer_id}"})
 
-    # Update peer's player data
-    peer.player_data = player_data
-
-    # Create lobby
-    lobby = state.create_lobby(name, peer, public, player_limit)
+    try:
+        code = await submit(
+            "create_lobby",
+            peer_id=peer.peer_id,
+            name=name,
+            public=public,
+            player_limit=player_limit,
+            player=player_data,
+        )
+    except MembershipError as e:
+        return _error(e)
 
-    print(f"[LOBBY] Created: {lobby.code} '{name}' by peer {peer.peer_id}")
+    log.info("Created: %s '%s' by peer %s", code, name, peer.peer_id)
 
     return {
         "t": ResponseType.LOBBY_CREATED,
-        "code": lobby.code,
+        "code": code,
         "name": name,
         "host_id": peer.peer_id,
         "your_id": peer.peer_id,
@@ -143,8 +288,10 @@ async def handle_join_lobby(peer: Peer, data: dict[str, Any]) -> dict[str, Any]:
     code_or_name: str = data.get("code", "")
     player_data: dict[str, Any] = data.get("player", {"name": f"Player {peer.peer_id}"})
 
-    # Find lobby
+    # Find lobby (it may have just been created through another worker)
     lobby = state.find_lobby(code_or_name)
+    if not lobby and await catch_up():
+        lobby = state.find_lobby(code_or_name)
     if not lobby:
         return {
             "t": ResponseType.ERROR,
@@ -174,19 +321,20 @@ async def handle_join_lobby(peer: Peer, data: dict[str, Any]) -> dict[str, Any]:
             "message": "You are already in a lobby",
         }
 
-    # Update peer's player data
-    peer.player_data = player_data
-
     # Add peer to lobby
-    lobby.add_peer(peer)
-
-    # Update room player count for backward compatibility
-    room = state.get_room(lobby.code)
-    if room:
-        room.player_count = len(lobby.peers)
-
-    print(
-        f"[LOBBY] Peer {peer.peer_id} joined {lobby.code} '{lobby.name}' (now {len(lobby.peers)} players)"
+    try:
+        joined = await submit(
+            "join_lobby", peer_id=peer.peer_id, code=lobby.code, player=player_data
+        )
+    except MembershipError as e:
+        return _error(e)
+
+    log.info(
+        "Peer %s joined %s '%s' (now %d players)",
+        peer.peer_id,
+        lobby.code,
+        lobby.name,
+        len(joined["players"]),
     )
 
     # Notify other peers in lobby (especially host)
@@ -203,11 +351,11 @@ async def handle_join_lobby(peer: Peer, data: dict[str, Any]) -> dict[str, Any]:
     # Send lobby_joined to the joining peer
     return {
         "t": ResponseType.LOBBY_JOINED,
-        "code": lobby.code,
-        "name": lobby.name,
-        "host_id": lobby.host_id,
+        "code": joined["code"],
+        "name": joined["name"],
+        "host_id": joined["host_id"],
         "your_id": peer.peer_id,
-        "players": lobby.get_players_list(),
+        "players": joined["players"],
     }
 
 
@@ -229,31 +377,16 @@ async def handle_leave_lobby(peer: Peer, data: dict[str, Any]) -> dict[str, Any]
             "message": "Lobby no longer exists",
         }
 
-    was_host = lobby.is_host(peer.peer_id)
-    lobby_code = lobby.code
-    lobby.remove_peer(peer.peer_id)
-
-    print(f"[LOBBY] Peer {peer.peer_id} left {lobby_code} (was_host={was_host})")
-
-    if was_host:
-        # Host left - close the lobby
-        await close_lobby(lobby, LobbyCloseReason.HOST_LEFT)
-    else:
-        # Regular peer left - notify others
-        await broadcast_to_lobby(
-            lobby,
-            {
-                "t": ResponseType.PEER_LEFT,
-                "id": peer.peer_id,
-            },
-        )
+    try:
+        left = await submit("leave_lobby", peer_id=peer.peer_id)
+    except MembershipError as e:
+        return _error(e)
 
-        # Update room player count
-        room = state.get_room(lobby_code)
-        if room:
-            room.player_count = len(lobby.peers)
+    log.info("Peer %s left %s (was_host=%s)", peer.peer_id, left["code"], left["was_host"])
 
-    return {"t": ResponseType.LOBBY_LEFT, "code": lobby_code}
+    # Host left: the lobby is closed. Otherwise notify the others
+    await announce_departure(peer.peer_id, left, LobbyCloseReason.HOST_LEFT)
+    return {"t": ResponseType.LOBBY_LEFT, "code": left["code"]}
 
 
 async def handle_ping(peer: Peer, data: dict[str, Any]) -> dict[str, Any]:
@@ -261,43 +394,92 @@ async def handle_ping(peer: Peer, data: dict[str, Any]) -> dict[str, Any]:
     return {"t": ResponseType.PONG}
 
 
-# =============================================================================
-# Disconnect Handler
-# =============================================================================
+async def handle_broadcast(peer: Peer, data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Handle broadcast command (same semantics as POST /api/lobby/broadcast).
 
+    {"t": "broadcast", "packet": "base64", "target": -1, "exclude": [4], "key": "pos", "ack": true}
 
-async def handle_peer_disconnect(peer: Peer) -> None:
-    """Handle when a peer's WebSocket disconnects."""
-    if peer.lobby_code:
-        lobby = state.get_lobby(peer.lobby_code)
-        if lobby:
-            was_host = lobby.is_host(peer.peer_id)
-            lobby.remove_peer(peer.peer_id)
+    Replies with broadcast_sent unless "ack" is false; an empty dict sends nothing.
+    A packet over the sender's or the lobby's rate limit is not sent; the reply
+    is a RATE_LIMITED error with "retry_after" seconds (even with "ack" false).
+    """
+    if not peer.lobby_code:
+        return {
+            "t": ResponseType.ERROR,
+            "code": ErrorCode.NOT_IN_LOBBY,
+            "message": "You are not in a lobby",
+        }
 
-            print(
-                f"[LOBBY] Peer {peer.peer_id} disconnected from {lobby.code} (was_host={was_host})"
-            )
+    lobby = state.get_lobby(peer.lobby_code)
+    if not lobby:
+        return {
+            "t": ResponseType.ERROR,
+            "code": ErrorCode.LOBBY_NOT_FOUND,
+            "message": "Lobby not found",
+        }
 
-            if was_host:
-                # Host disconnected - close lobby
-                await close_lobby(lobby, LobbyCloseReason.HOST_DISCONNECTED)
-            else:
-                # Regular peer disconnected - notify others
-                await broadcast_to_lobby(
-                    lobby,
-                    {
-                        "t": ResponseType.PEER_LEFT,
-                        "id": peer.peer_id,
-                    },
-                )
+    target: Any = data.get("target", -1)
+    exclude: Any = data.get("exclude")
+    if not valid_packet_target(target, exclude):
+        return {
+            "t": ResponseType.ERROR,
+            "code": ErrorCode.INVALID_REQUEST,
+            "message": INVALID_TARGET,
+        }
 
-                # Update room player count
-                room = state.get_room(lobby.code)
-                if room:
-                    room.player_count = len(lobby.peers)
+    packet: Any = data.get("packet", "")
+    if not isinstance(packet, str):
+        return {
+            "t": ResponseType.ERROR,
+            "code": ErrorCode.INVALID_REQUEST,
+            "message": "packet must be a string",
+        }
+
+    retry_after = check_packet_rate(peer, lobby, 1, len(packet))
+    if retry_after:
+        return rate_limited_error(retry_after)
+
+    report = await broadcast_packet(
+        lobby,
+        peer.peer_id,
+        packet,
+        target,
+        data.get("key"),
+        exclude,
+    )
 
-    # Remove from global peers
-    state.remove_lobby_peer(peer.peer_id)
+    if not data.get("ack", True):
+        return {}
+
+    return {
+        "t": ResponseType.BROADCAST_SENT,
+        "delivered_to": report.delivered_to,
+        "outcomes": report.to_dict(),
+    }
+
+
+# =============================================================================
+# Disconnect Handler
+# =============================================================================
+
+
+async def handle_peer_disconnect(peer: Peer) -> None:
+    """Remove a peer from the server, leaving its lobby (or closing it if hosting).
+
+    Shared by WebSocket disconnects, POST /api/lobby/disconnect and SSE peers
+    whose resume window ran out.
+    """
+    left = await submit("disconnect", peer_id=peer.peer_id)
+    if left:
+        log.info(
+            "Peer %s disconnected from %s (was_host=%s)",
+            peer.peer_id,
+            left["code"],
+            left["was_host"],
+        )
+        # Host disconnected: the lobby is closed. Otherwise notify the others
+        await announce_departure(peer.peer_id, left, LobbyCloseReason.HOST_DISCONNECTED)
 
 
 # =============================================================================
@@ -311,6 +493,7 @@ MESSAGE_HANDLERS: dict[str, HandlerFunc] = {
     MessageType.JOIN_LOBBY: handle_join_lobby,
     MessageType.LEAVE_LOBBY: handle_leave_lobby,
     MessageType.PING: handle_ping,
+    MessageType.BROADCAST: handle_broadcast,
 }
 
 
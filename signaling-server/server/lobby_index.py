@@ -0,0 +1,182 @@
+# pyright: strict
+
+"""
+Lobby Search Index
+
+Sorted secondary indexes over the public, open lobbies, kept up to date by
+State as lobbies are created, joined, left and closed:
+- by creation: (seq, code)           -> newest
+- by players:  (players, seq, code)  -> most / fewest players
+- by name:     (lowercase name, code) -> name prefix
+
+Each index is a sorted list maintained with bisect. A search walks the index
+for its sort order from the cursor, filters as it goes and stops after one
+page, so its cost depends on the page rather than the number of lobbies.
+A cursor is the sort key of the last lobby on the previous page; it stays
+valid when that lobby goes away.
+"""
+
+from __future__ import annotations
+
+import itertools
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+
+from .enums import LobbySort
+from .models import Session
+
+# Sort keys always end with the lobby code, so they are unique
+SortKey = tuple[int | str, ...]
+
+
+@dataclass(frozen=True)
+class LobbyQuery:
+    """Filters, sort order and page of a lobby search."""
+
+    sort: LobbySort = LobbySort.NEWEST
+    limit: int = 20
+    cursor: SortKey | None = None
+    not_full: bool = False
+    min_free: int = 0  # Free slots required; unlimited lobbies always qualify
+    name_prefix: str = ""
+    min_limit: int | None = None  # player_limit range; 0 (unlimited) counts as infinite
+    max_limit: int | None = None
+
+    def matches(self, lobby: Session) -> bool:
+        """Apply the filters that are not served by an index."""
+        limit = lobby.player_limit
+        needed = max(self.min_free, 1 if self.not_full else 0)
+        if needed and limit > 0 and limit - len(lobby.peers) < needed:
+            return False
+        if self.min_limit is not None and 0 < limit < self.min_limit:
+            return False
+        return self.max_limit is None or 0 < limit <= self.max_limit
+
+
+def parse_cursor(sort: LobbySort, cursor: str) -> SortKey:
+    """Parse a cursor string for `sort`. Raises ValueError if malformed."""
+    *numbers, code = cursor.split(".")
+    if len(numbers) != (1 if sort == LobbySort.NEWEST else 2) or not code:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return (*(int(n) for n in numbers), code)
+
+
+def format_cursor(key: SortKey) -> str:
+    return ".".join(map(str, key))
+
+
+@dataclass
+class _Entry:
+    seq: int
+    players: int
+    name: str
+
+
+class LobbySearchIndex:
+    """Sorted indexes of listed lobbies by creation, player count and name."""
+
+    def __init__(self) -> None:
+        self._entries: dict[str, _Entry] = {}
+        self._by_created: list[SortKey] = []  # (seq, code)
+        self._by_players: list[SortKey] = []  # (players, seq, code)
+        self._by_name: list[SortKey] = []  # (lowercase name, code)
+        self._seq = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, lobby: Session) -> None:
+        """Add a lobby, or move it to reflect its current player count and name."""
+        code = lobby.code
+        players = len(lobby.peers)
+        name = lobby.name.lower()
+        entry = self._entries.get(code)
+
+        if entry is None:
+            entry = self._entries[code] = _Entry(next(self._seq), players, name)
+            insort(self._by_created, (entry.seq, code))
+            insort(self._by_players, (players, entry.seq, code))
+            insort(self._by_name, (name, code))
+            return
+
+        if entry.players != players:
+            _remove(self._by_players, (entry.players, entry.seq, code))
+            entry.players = players
+            insort(self._by_players, (players, entry.seq, code))
+        if entry.name != name:
+            _remove(self._by_name, (entry.name, code))
+            entry.name = name
+            insort(self._by_name, (name, code))
+
+    def discard(self, code: str) -> None:
+        """Remove a lobby if indexed."""
+        entry = self._entries.pop(code, None)
+        if entry is None:
+            return
+        _remove(self._by_created, (entry.seq, code))
+        _remove(self._by_players, (entry.players, entry.seq, code))
+        _remove(self._by_name, (entry.name, code))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_created.clear()
+        self._by_players.clear()
+        self._by_name.clear()
+
+    def search(
+        self, query: LobbyQuery, lobbies: Mapping[str, Session]
+    ) -> tuple[list[Session], str | None]:
+        """Return one page of matching lobbies and the cursor for the next page (None at the end)."""
+        page: list[Session] = []
+        for key in self._keys_after(query):
+            lobby = lobbies[str(key[-1])]
+            if not query.matches(lobby):
+                continue
+            if len(page) == query.limit:
+                return page, format_cursor(self._sort_key(query.sort, page[-1].code))
+            page.append(lobby)
+        return page, None
+
+    def _sort_key(self, sort: LobbySort, code: str) -> SortKey:
+        entry = self._entries[code]
+        if sort == LobbySort.NEWEST:
+            return (entry.seq, code)
+        return (entry.players, entry.seq, code)
+
+    def _keys_after(self, query: LobbyQuery) -> Iterator[SortKey]:
+        """Sort keys in query order, starting after the cursor."""
+        descending = query.sort != LobbySort.FEWEST_PLAYERS
+        cursor = query.cursor
+
+        if query.name_prefix:
+            # The name range is usually small: collect it and sort by the requested order
+            prefix = query.name_prefix.lower()
+            keys: list[SortKey] = []
+            for i in range(bisect_left(self._by_name, (prefix, "")), len(self._by_name)):
+                name, code = self._by_name[i]
+                if not str(name).startswith(prefix):
+                    break
+                keys.append(self._sort_key(query.sort, str(code)))
+            keys.sort(reverse=descending)
+            if cursor is not None:
+                keys = [k for k in keys if (k < cursor if descending else k > cursor)]
+            yield from keys
+            return
+
+        index = self._by_created if query.sort == LobbySort.NEWEST else self._by_players
+        if descending:
+            start = len(index) if cursor is None else bisect_left(index, cursor)
+            for i in range(start - 1, -1, -1):
+                yield index[i]
+        else:
+            start = 0 if cursor is None else bisect_right(index, cursor)
+            for i in range(start, len(index)):
+                yield index[i]
+
+
+def _remove(index: list[SortKey], key: SortKey) -> None:
+    """Remove an exact key from a sorted list."""
+    i = bisect_left(index, key)
+    if i < len(index) and index[i] == key:
+        del index[i]
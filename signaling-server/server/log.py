@@ -0,0 +1,111 @@
+# pyright: strict
+
+"""
+Logging
+
+Per-subsystem loggers that keep the "[LOBBY] message" console style. Records
+are put on a queue by the event loop and formatted and written to stdout by a
+background thread, so a slow terminal or pipe never blocks the loop.
+
+Levels come from the environment (or `python server.py --log-level`):
+    LOG_LEVEL=INFO                        default for every subsystem
+    LOG_LEVELS=lobby=DEBUG,signal=DEBUG   per-subsystem overrides
+
+Per-packet logs are DEBUG, so by default they are skipped before any
+formatting happens. Pass values as `%s` arguments, not f-strings, so that
+stays true.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+ROOT = "signaling"
+SUBSYSTEMS = ("server", "config", "lobby", "http", "sse", "ws", "signal", "rooms", "fanout", "bus")
+
+_listener: QueueListener | None = None
+_handler: QueueHandler | None = None
+
+
+def get_logger(subsystem: str) -> logging.Logger:
+    """Get the logger for a subsystem; its name becomes the "[SUBSYSTEM]" prefix."""
+    return logging.getLogger(f"{ROOT}.{subsystem}")
+
+
+class PrefixFormatter(logging.Formatter):
+    """Format records as "[SUBSYSTEM] message", like the original print output."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        tag = record.name.rpartition(".")[2].upper()
+        message = f"[{tag}] {record.getMessage()}"
+        if record.exc_info:
+            message = f"{message}\n{self.formatException(record.exc_info)}"
+        return message
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue records unformatted; the listener thread does the formatting."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def parse_level(name: str) -> int:
+    """Parse a level name such as "debug" or "WARNING"."""
+    level = logging.getLevelNamesMapping().get(name.strip().upper())
+    if level is None:
+        raise ValueError(f"Unknown log level: {name!r}")
+    return level
+
+
+def parse_levels(spec: str) -> dict[str, int]:
+    """Parse "lobby=DEBUG,sse=WARNING" into {subsystem: level}."""
+    levels: dict[str, int] = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        subsystem, _, name = item.partition("=")
+        subsystem = subsystem.strip().lower()
+        if subsystem not in SUBSYSTEMS:
+            raise ValueError(f"Unknown log subsystem: {subsystem!r}")
+        levels[subsystem] = parse_level(name)
+    return levels
+
+
+def setup_logging(level: str | None = None, levels: str | None = None) -> None:
+    """Install the queue-backed stdout handler and apply levels."""
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    root = logging.getLogger(ROOT)
+    root.setLevel(parse_level(level or os.environ.get("LOG_LEVEL", "INFO")))
+    overrides = parse_levels(levels or os.environ.get("LOG_LEVELS", ""))
+    for subsystem, subsystem_level in overrides.items():
+        get_logger(subsystem).setLevel(subsystem_level)
+
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(PrefixFormatter())
+    _handler = _DeferredQueueHandler(records)
+    _listener = QueueListener(records, stream)
+
+    root.addHandler(_handler)
+    root.propagate = False
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background writer."""
+    global _listener, _handler
+    if _listener is None or _handler is None:
+        return
+    _listener.stop()
+    root = logging.getLogger(ROOT)
+    root.removeHandler(_handler)
+    root.propagate = True
+    _listener = _handler = None
@@ -0,0 +1,329 @@
+# pyright: strict
+
+"""
+Membership Operations
+
+Every change to who is connected, which lobbies and rooms exist and who is
+in them is an op: a named function applied to a State with a dict of
+plain arguments. Handlers check a request against their own state first,
+then submit() the op.
+
+Single process, submit() applies the op to `state` right away.
+
+With --workers N, each worker holds a replica of the state and submit()
+sends the op to the router instead. The router applies it to the
+authoritative copy and either rejects it (the lobby filled up through
+another worker, the peer ID was taken, ...) or sends it to every worker,
+all in one order, so every replica goes through the same changes. The
+submitting worker gets its result from applying the op to its own replica.
+
+Ops must be deterministic: anything they choose (peer IDs, codes) is
+written back into the arguments, so replicas replay the same choice.
+Arguments and results are limited to what marshal can encode.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from typing import Any
+
+from . import bus
+from .enums import ErrorCode
+from .log import get_logger
+from .models import Peer, Session
+from .peer_queue import PeerQueue
+from .state import State, state
+
+log = get_logger("bus")
+
+
+class MembershipError(Exception):
+    """An op that does not hold against the current state."""
+
+    def __init__(self, code: str, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+
+
+Op = Callable[[State, dict[str, Any], int], Any]
+
+
+# =============================================================================
+# Peers and Lobbies
+# =============================================================================
+
+
+def _peer(state: State, args: dict[str, Any]) -> Peer:
+    peer = state.get_lobby_peer(args["peer_id"])
+    if peer is None:
+        raise MembershipError(ErrorCode.PEER_NOT_FOUND, "Peer not found", 404)
+    return peer
+
+
+def _connect(state: State, args: dict[str, Any], here: int) -> int:
+    """Register a peer; peer_id 0 allocates one. Returns the peer ID."""
+    peer_id: int = args["peer_id"]
+    if peer_id > 0:
+        if peer_id in state.lobby_peers:
+            raise MembershipError(
+                ErrorCode.PEER_ID_IN_USE, f"Peer ID {peer_id} is already in use", 409
+            )
+    else:
+        peer_id = args["peer_id"] = state.get_next_peer_id()
+
+    home: int = args["home"]
+    peer = Peer(peer_id=peer_id, home=home)
+    if home == here and args["sse"]:
+        peer.sse_queue = PeerQueue()
+    state.add_lobby_peer(peer, reap=home == here)
+    return peer_id
+
+
+def _leave(state: State, peer: Peer) -> dict[str, Any] | None:
+    """Take a peer out of its lobby, closing the lobby if it was the host.
+
+    Returns the lobby's code and name, whether the peer was its host and
+    the peers still in it (to notify), or None if the lobby is gone.
+    """
+    assert peer.lobby_code is not None
+    lobby = state.get_lobby(peer.lobby_code)
+    if not lobby:
+        peer.lobby_code = None
+        return None
+
+    was_host = lobby.is_host(peer.peer_id)
+    state.leave_lobby(lobby, peer.peer_id)
+    left = {
+        "code": lobby.code,
+        "name": lobby.name,
+        "was_host": was_host,
+        "peers": list(lobby.peers),
+    }
+    if was_host:
+        state.remove_session(lobby.code)
+    return left
+
+
+def _disconnect(state: State, args: dict[str, Any], here: int) -> dict[str, Any] | None:
+    """Remove a peer, leaving its lobby first. Returns what _leave() returns."""
+    peer = state.get_lobby_peer(args["peer_id"])
+    if peer is None:
+        return None
+    if peer.sse_expiry:
+        peer.sse_expiry.cancel()
+        peer.sse_expiry = None
+
+    left = _leave(state, peer) if peer.lobby_code else None
+    state.remove_lobby_peer(peer.peer_id)
+    return left
+
+
+def _create_lobby(state: State, args: dict[str, Any], here: int) -> str:
+    """Create a lobby hosted by peer_id. Returns its code."""
+    peer = _peer(state, args)
+    if peer.lobby_code:
+        raise MembershipError(ErrorCode.ALREADY_IN_LOBBY, "Already in a lobby")
+
+    peer.player_data = args["player"]
+    lobby = state.create_lobby(
+        args["name"], peer, args["public"], args["player_limit"], code=args.get("code")
+    )
+    args["code"] = lobby.code
+    return lobby.code
+
+
+def _join_lobby(state: State, args: dict[str, Any], here: int) -> dict[str, Any]:
+    """Add peer_id to the lobby `code`. Returns the lobby as the joining peer sees it."""
+    peer = _peer(state, args)
+    lobby = state.get_lobby(args["code"])
+    if not lobby:
+        raise MembershipError(ErrorCode.LOBBY_NOT_FOUND, "Lobby not found", 404)
+    if peer.lobby_code:
+        raise MembershipError(ErrorCode.ALREADY_IN_LOBBY, "Already in a lobby")
+    if not lobby.open:
+        raise MembershipError(ErrorCode.LOBBY_CLOSED, "Lobby is closed")
+    if lobby.is_full():
+        raise MembershipError(ErrorCode.LOBBY_FULL, "Lobby is full")
+
+    peer.player_data = args["player"]
+    state.join_lobby(lobby, peer)
+    return {
+        "code": lobby.code,
+        "name": lobby.name,
+        "host_id": lobby.host_id,
+        "players": lobby.get_players_list(),
+    }
+
+
+def _leave_lobby(state: State, args: dict[str, Any], here: int) -> dict[str, Any]:
+    """Take peer_id out of its lobby. Returns what _leave() returns."""
+    peer = _peer(state, args)
+    if not peer.lobby_code:
+        raise MembershipError(ErrorCode.NOT_IN_LOBBY, "Not in a lobby")
+    left = _leave(state, peer)
+    if left is None:
+        raise MembershipError(ErrorCode.LOBBY_NOT_FOUND, "Lobby no longer exists")
+    return left
+
+
+# =============================================================================
+# Sessions (lobbies and signaling rooms)
+# =============================================================================
+
+
+def _session(state: State, args: dict[str, Any]) -> Session:
+    session = state.get_session(args["code"])
+    if session is None:
+        raise MembershipError(ErrorCode.ROOM_NOT_FOUND, "Room not found", 404)
+    return session
+
+
+def _close_session(state: State, args: dict[str, Any], here: int) -> dict[str, Any] | None:
+    """Remove a lobby or room. Returns its code, name and lobby members, or None if gone."""
+    session = state.get_session(args["code"])
+    if session is None:
+        return None
+    closed = {"code": session.code, "name": session.name, "peers": list(session.peers)}
+    state.remove_session(session.code)
+    return closed
+
+
+def _create_room(state: State, args: dict[str, Any], here: int) -> str:
+    """Create a signaling room. Returns its code."""
+    room = state.create_room(
+        channel=args["channel"],
+        lobby_name=args["lobby_name"],
+        public=args["public"],
+        player_limit=args["player_limit"],
+        is_debug=args["is_debug"],
+        code=args.get("code"),
+    )
+    args["code"] = room.code
+    return room.code
+
+
+def _update_room(state: State, args: dict[str, Any], here: int) -> None:
+    """Change a room's lobby name, public flag or player limit (None leaves it)."""
+    room = _session(state, args)
+    if args["lobby_name"]:
+        state.rename_room(room, args["lobby_name"])
+    if args["public"] is not None:
+        room.public = args["public"]
+    if args["player_limit"] is not None:
+        room.player_limit = args["player_limit"]
+    room.last_activity = time.monotonic()
+    state.rooms_changed()
+    if room.is_lobby:
+        state.update_lobby_index(room)
+
+
+def _room_players(state: State, args: dict[str, Any], here: int) -> None:
+    """Record a host update, with the player count it reports (None: none reported)."""
+    room = _session(state, args)
+    room.last_activity = time.monotonic()
+    # A lobby's player count follows its members
+    if args["player_count"] is not None and not room.is_lobby:
+        room.reported_players = args["player_count"]
+        state.rooms_changed()
+
+
+def _signal_join(state: State, args: dict[str, Any], here: int) -> int:
+    """Add a signaling peer to room `code`; peer_id 0 takes the room's next ID."""
+    room = _session(state, args)
+    peer_id: int = args["peer_id"] or room.next_peer_id
+    args["peer_id"] = peer_id
+    room.next_peer_id = max(room.next_peer_id, peer_id + 1)
+    state.add_signaling_peer(room, peer_id, args["home"])
+    return peer_id
+
+
+def _signal_leave(state: State, args: dict[str, Any], here: int) -> None:
+    room = state.get_session(args["code"])
+    if room:
+        state.remove_signaling_peer(room, args["peer_id"])
+
+
+OPS: dict[str, Op] = {
+    "connect": _connect,
+    "disconnect": _disconnect,
+    "create_lobby": _create_lobby,
+    "join_lobby": _join_lobby,
+    "leave_lobby": _leave_lobby,
+    "close_session": _close_session,
+    "create_room": _create_room,
+    "update_room": _update_room,
+    "room_players": _room_players,
+    "signal_join": _signal_join,
+    "signal_leave": _signal_leave,
+}
+
+
+def apply(state: State, name: str, args: dict[str, Any], here: int) -> Any:
+    """Apply op `name` to `state` as seen by worker `here`. Raises MembershipError."""
+    return OPS[name](state, args, here)
+
+
+# =============================================================================
+# Submitting Ops
+# =============================================================================
+
+
+async def submit(op: str, /, **args: Any) -> Any:
+    """Apply `op`, through the router when running with workers. Raises MembershipError."""
+    if bus.link is None:
+        return apply(state, op, args, 0)
+    return await bus.link.call("op", op, args)
+
+
+async def catch_up() -> bool:
+    """Wait until this worker has applied every op the router has accepted so far.
+
+    Call on a lookup miss: a client may use a peer or lobby through this
+    worker right after another worker created it. Returns False (without
+    waiting) when running as a single process.
+    """
+    if bus.link is None:
+        return False
+    await bus.link.call("sync")
+    return True
+
+
+def on_applied(origin: int, request_id: int, name: str, args: dict[str, Any]) -> None:
+    """Bus handler: apply an op the router accepted; settle it if this worker submitted it.
+
+    An op the router accepted but this replica cannot apply means the replica
+    has diverged, so the worker leaves the bus and shuts down.
+    """
+    assert bus.link is not None
+    here = bus.link.index
+    try:
+        result = apply(state, name, args, here)
+    except Exception as e:
+        if origin == here:
+            bus.link.settle(request_id, error=e)
+        bus.link.fail(f"op {name} failed after the router accepted it: {e!r}")
+        return
+    if origin == here:
+        bus.link.settle(request_id, result)
+
+
+def on_rejected(request_id: int, code: str, message: str, status: int) -> None:
+    """Bus handler: the router rejected an op this worker submitted."""
+    assert bus.link is not None
+    bus.link.settle(request_id, error=MembershipError(code, message, status))
+
+
+def on_synced(request_id: int) -> None:
+    """Bus handler: answer to catch_up()."""
+    assert bus.link is not None
+    bus.link.settle(request_id)
+
+
+BUS_HANDLERS: dict[str, bus.BusHandler] = {
+    "applied": on_applied,
+    "rejected": on_rejected,
+    "synced": on_synced,
+}
@@ -0,0 +1,44 @@
+# pyright: strict
+
+"""
+Server-wide Counters
+
+Plain integer counters bumped on the hot path and reported on /health.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+
+
+@dataclass
+class Metrics:
+    """Monotonic counters since server start."""
+
+    # SSE queue overflow
+    sse_dropped_oldest: int = 0
+    sse_dropped_newest: int = 0
+    sse_coalesced: int = 0
+    sse_overflow_disconnects: int = 0
+    # SSE resume
+    sse_resumes: int = 0
+    sse_resume_gaps: int = 0
+    sse_resume_expired: int = 0
+    # Heartbeats written to idle SSE streams
+    sse_heartbeats: int = 0
+    # Packets and signaling messages rejected by the sender's or the lobby's rate limit
+    rate_limited_peer: int = 0
+    rate_limited_lobby: int = 0
+    # Idle peer reaper
+    peers_reaped_unattached: int = 0
+    peers_reaped_idle: int = 0
+    lobbies_reaped: int = 0
+    rooms_reaped: int = 0
+
+    def to_dict(self) -> dict[str, int]:
+        """Convert to dictionary for JSON serialization."""
+        return asdict(self)
+
+
+# Global metrics instance
+metrics = Metrics()
@@ -2,65 +2,137 @@
 
 """
 Data Models for Signaling Server
+
+The models use __slots__ because an idle server can hold tens of thousands
+of peers. Timestamps are time.monotonic() floats, formatted as ISO dates
+only when serialized.
 """
 
 from __future__ import annotations
 
 import asyncio
+import time
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any
 
 from aiohttp import web
 
+from .credit import CreditWindow
+from .frames import EncodedMessage
+from .peer_queue import PeerQueue
+from .ratelimit import TokenBucket
+
+# Wall-clock time at monotonic zero, for formatting monotonic timestamps
+_WALL_CLOCK_OFFSET = time.time() - time.monotonic()
+
+
+def format_timestamp(monotonic: float) -> str:
+    """ISO 8601 local time of a time.monotonic() timestamp."""
+    return datetime.fromtimestamp(monotonic + _WALL_CLOCK_OFFSET).isoformat()
+
 
-@dataclass
+@dataclass(slots=True)
 class Peer:
     """Represents a connected peer/player in the lobby system."""
 
     peer_id: int
+    home: int = 0  # Worker holding the peer's transport (always 0 without --workers)
     ws: web.WebSocketResponse | None = None  # WebSocket (if using WS)
-    sse_queue: asyncio.Queue[dict[str, Any]] | None = None  # SSE queue (if using HTTP)
-    player_data: dict[str, Any] = field(default_factory=lambda: {})
+    sse_queue: PeerQueue | None = None  # SSE queue (if using HTTP)
+    _player_data: dict[str, Any] | None = field(default=None, init=False)  # None until set
     lobby_code: str | None = None
-
-    def __post_init__(self) -> None:
-        if not self.player_data:
-            self.player_data = {"name": f"Player {self.peer_id}"}
+    last_activity: float = field(default_factory=time.monotonic)  # Last request, monotonic
+    slow_strikes: int = 0  # Consecutive fan-out sends that missed the deadline
+    sse_replay: deque[EncodedMessage] | None = None  # Recently written SSE frames
+    sse_stream: asyncio.Task[Any] | None = None  # Task writing the current SSE stream
+    sse_expiry: asyncio.TimerHandle | None = None  # Pending disconnect after a dropped stream
+    credit: CreditWindow | None = None  # Unacknowledged events, once the peer acknowledges
+    bucket: TokenBucket | None = None  # Packet rate limit, from the first packet sent
+
+    @property
+    def player_data(self) -> dict[str, Any]:
+        """Player data sent by the client, or a default name built on demand."""
+        if self._player_data is None:
+            return {"name": f"Player {self.peer_id}"}
+        return self._player_data
+
+    @player_data.setter
+    def player_data(self, value: dict[str, Any]) -> None:
+        self._player_data = value or None
+
+    @property
+    def sent_player_data(self) -> dict[str, Any] | None:
+        """Player data sent by the client, or None if it sent none."""
+        return self._player_data
 
     def to_dict(self) -> dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
         return {"id": self.peer_id, "player": self.player_data}
 
 
-@dataclass
-class Lobby:
-    """Represents a game lobby."""
+@dataclass(slots=True)
+class Session:
+    """Everything registered under one code.
+
+    Every session is a WebRTC signaling room, with its signaling WebSocket
+    connections. A session created through the lobby API is also a lobby:
+    it has a host and member peers, and its player count is derived from
+    them. Rooms created by /session/host have no host and report their
+    player count themselves.
+    """
 
     code: str
-    name: str
-    host_id: int
+    name: str = ""
+    channel: str = "default"
+    host_id: int | None = None  # Set for lobbies
     public: bool = True
     player_limit: int = 0
     open: bool = True
-    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
-    peers: dict[int, Peer] = field(default_factory=lambda: {})
+    next_peer_id: int = 1  # Next signaling peer ID
+    reported_players: int = 1  # Player count posted by the host of a plain room
+    created_at: float = field(default_factory=time.monotonic)
+    # Last host update or signaling connect/disconnect, monotonic
+    last_activity: float = field(default_factory=time.monotonic)
+    peers: dict[int, Peer] = field(default_factory=lambda: {})  # Lobby members
+    # Signaling peer ID -> worker holding its WebSocket, and the sockets held by this worker
+    signaling_peers: dict[int, int] = field(default_factory=lambda: {})
+    connections: dict[int, web.WebSocketResponse] = field(default_factory=lambda: {})
+    bucket: TokenBucket | None = None  # Packet rate limit, from the first packet sent
 
     @classmethod
-    def create(
-        cls, code: str, name: str, host_peer: Peer, public: bool = True, player_limit: int = 0
-    ) -> Lobby:
+    def create_lobby(
+        cls,
+        code: str,
+        name: str,
+        host_peer: Peer,
+        public: bool = True,
+        player_limit: int = 0,
+        channel: str = "default",
+    ) -> Session:
         """Factory method to create a lobby with a host peer."""
         lobby = cls(
             code=code,
             name=name,
+            channel=channel,
             host_id=host_peer.peer_id,
             public=public,
             player_limit=player_limit,
+            next_peer_id=2,  # Host is 1, next client is 2
         )
         lobby.add_peer(host_peer)
         return lobby
 
+    @property
+    def is_lobby(self) -> bool:
+        """Whether the session was created through the lobby API."""
+        return self.host_id is not None
+
+    @property
+    def player_count(self) -> int:
+        return len(self.peers) if self.is_lobby else self.reported_players
+
     def add_peer(self, peer: Peer) -> None:
         """Add a peer to the lobby."""
         self.peers[peer.peer_id] = peer
@@ -86,7 +158,7 @@ class Lobby:
         return self.player_limit > 0 and len(self.peers) >= self.player_limit
 
     def to_dict(self) -> dict[str, Any]:
-        """Convert to dictionary for JSON serialization."""
+        """Convert to dictionary for JSON serialization (lobby API)."""
         return {
             "code": self.code,
             "name": self.name,
@@ -119,29 +191,16 @@ class Lobby:
             "HasPassword": False,
         }
 
-
-@dataclass
-class Room:
-    """Represents a WebRTC signaling room (for backward compatibility)."""
-
-    code: str
-    channel: str
-    next_peer_id: int = 1
-    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
-    lobby_name: str = ""
-    public: bool = True
-    player_limit: int = 0
-    player_count: int = 1
-
-    def to_dict(self) -> dict[str, Any]:
-        """Convert to dictionary for JSON serialization."""
+    def to_room_dict(self) -> dict[str, Any]:
+        """Convert to dictionary for the signaling room listing."""
         return {
             "code": self.code,
             "channel": self.channel,
             "next_peer_id": self.next_peer_id,
-            "created_at": self.created_at,
-            "lobby_name": self.lobby_name,
+            "created_at": format_timestamp(self.created_at),
+            "lobby_name": self.name,
             "public": self.public,
             "player_limit": self.player_limit,
             "player_count": self.player_count,
+            "signaling_peers": len(self.signaling_peers),
         }
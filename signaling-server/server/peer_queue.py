@@ -0,0 +1,191 @@
+# pyright: strict
+
+"""
+Bounded Per-Peer SSE Queue
+
+Holds pre-encoded messages waiting to be written to a peer's SSE stream.
+Capacity is limited by message count and by bytes; when a put would exceed
+either limit the configured OverflowPolicy decides what happens:
+- drop_oldest: evict queued messages from the front until the new one fits
+- drop_newest: reject the new message
+- disconnect:  close the queue; the SSE stream ends and the peer is cleaned up
+- coalesce:    replace a queued message with the same key (e.g. a state-sync
+               packet where only the latest matters), else drop oldest
+
+The backing deque exists only while messages are queued, so the many idle
+peers of a busy server do not each hold an empty one.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+
+from .config import CONFIG
+from .enums import OverflowPolicy
+from .frames import EncodedMessage
+from .metrics import metrics
+
+
+class PeerQueueClosed(Exception):
+    """Raised by PeerQueue.get() once the queue has been closed."""
+
+
+class PeerQueueIdle(Exception):
+    """Raised by a waiting PeerQueue.get() that interrupt() woke without a message."""
+
+
+class PeerQueue:
+    """Bounded FIFO of encoded messages for a single SSE peer."""
+
+    __slots__ = (
+        "max_messages",
+        "max_bytes",
+        "policy",
+        "closed",
+        "dropped",
+        "_items",
+        "_bytes",
+        "_waiter",
+    )
+
+    def __init__(
+        self,
+        max_messages: int = CONFIG.sse_queue_max_messages,
+        max_bytes: int = CONFIG.sse_queue_max_bytes,
+        policy: OverflowPolicy = CONFIG.sse_overflow_policy,
+    ) -> None:
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.closed = False
+        self.dropped = 0  # Messages lost to overflow (either end)
+        self._items: deque[EncodedMessage] | None = None  # None while empty
+        self._bytes = 0
+        self._waiter: asyncio.Future[None] | None = None
+
+    def qsize(self) -> int:
+        """Number of queued messages."""
+        return len(self._items) if self._items else 0
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of queued SSE frames."""
+        return self._bytes
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def _fits(self, size: int) -> bool:
+        return self.qsize() < self.max_messages and self._bytes + size <= self.max_bytes
+
+    def _drop_oldest(self) -> None:
+        self.get_nowait()
+        self.dropped += 1
+        metrics.sse_dropped_oldest += 1
+
+    def _coalesce(self, key: str) -> bool:
+        """Remove the queued message with the same key, if any."""
+        items = self._items
+        if not items:
+            return False
+        for queued in items:
+            if queued.key == key:
+                items.remove(queued)
+                self._bytes -= len(queued.sse)
+                metrics.sse_coalesced += 1
+                return True
+        return False
+
+    def _wake(self) -> None:
+        if self._waiter and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def put_nowait(self, message: EncodedMessage) -> bool:
+        """Queue a message, applying the overflow policy. Returns False if it was not queued."""
+        if self.closed:
+            return False
+
+        size = len(message.sse)
+        if not self._fits(size):
+            if size > self.max_bytes or self.policy == OverflowPolicy.DROP_NEWEST:
+                self.dropped += 1
+                metrics.sse_dropped_newest += 1
+                return False
+
+            if self.policy == OverflowPolicy.DISCONNECT:
+                metrics.sse_overflow_disconnects += 1
+                self.close()
+                return False
+
+            if self.policy == OverflowPolicy.COALESCE and message.key:
+                self._coalesce(message.key)
+
+            while self._items and not self._fits(size):
+                self._drop_oldest()
+
+        if self._items is None:
+            self._items = deque()
+        self._items.append(message)
+        self._bytes += size
+        self._wake()
+        return True
+
+    def get_nowait(self) -> EncodedMessage:
+        """Pop the oldest message. Raises IndexError if empty."""
+        if not self._items:
+            raise IndexError("get from an empty PeerQueue")
+        message = self._items.popleft()
+        if not self._items:
+            self._items = None
+        self._bytes -= len(message.sse)
+        return message
+
+    def drain(self, max_messages: int, max_bytes: int) -> list[EncodedMessage]:
+        """Pop queued messages in order while they fit within the given budget."""
+        batch: list[EncodedMessage] = []
+        size = 0
+        while self._items and len(batch) < max_messages:
+            next_size = len(self._items[0].sse)
+            if size + next_size > max_bytes:
+                break
+            batch.append(self.get_nowait())
+            size += next_size
+        return batch
+
+    async def get(self) -> EncodedMessage:
+        """Wait for and pop the oldest message.
+
+        Raises PeerQueueClosed once closed, and PeerQueueIdle if interrupt()
+        is called while waiting.
+        """
+        while not self._items:
+            if self.closed:
+                raise PeerQueueClosed
+            waiter = self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await waiter
+            finally:
+                if self._waiter is waiter:
+                    self._waiter = None
+
+        if self.closed:
+            raise PeerQueueClosed
+        return self.get_nowait()
+
+    def interrupt(self) -> bool:
+        """Wake a waiting get() with PeerQueueIdle (e.g. to write a heartbeat).
+
+        Returns False if no get() was waiting.
+        """
+        if self._waiter and not self._waiter.done():
+            self._waiter.set_exception(PeerQueueIdle())
+            return True
+        return False
+
+    def close(self) -> None:
+        """Close the queue, discarding anything still queued and waking the reader."""
+        self.closed = True
+        self._items = None
+        self._bytes = 0
+        self._wake()
@@ -0,0 +1,114 @@
+# pyright: strict
+
+"""
+Packet Rate Limiting
+
+Every game packet (HTTP broadcast, lobby WebSocket broadcast) and every
+signaling message is checked against two token buckets before any fan-out:
+one for the sending peer or signaling connection, one for its lobby or
+room. Each bucket limits packets per second and bytes per second and holds
+up to CONFIG.rate_limit_burst seconds' worth of tokens.
+
+A packet is admitted only if both buckets have tokens for it; otherwise it
+is rejected with the seconds until they will, and nothing is taken from
+either bucket. The check is a few float operations on the buckets' slots:
+constant time, no allocation. A request larger than a full bucket (e.g. a
+big batch) is admitted when the bucket is full and leaves it in debt.
+
+With --workers each worker keeps its own buckets, so the limits apply per
+worker.
+"""
+
+from __future__ import annotations
+
+import time
+
+from .config import CONFIG
+from .metrics import metrics
+
+
+class TokenBucket:
+    """Packets/sec and bytes/sec allowance of one sender or lobby (a rate of 0 is no limit)."""
+
+    __slots__ = (
+        "packet_rate",
+        "byte_rate",
+        "packet_burst",
+        "byte_burst",
+        "packets",
+        "bytes",
+        "stamp",
+    )
+
+    def __init__(self, packet_rate: float, byte_rate: float) -> None:
+        self.packet_rate = packet_rate
+        self.byte_rate = byte_rate
+        self.packet_burst = packet_rate * CONFIG.rate_limit_burst
+        self.byte_burst = byte_rate * CONFIG.rate_limit_burst
+        self.packets = self.packet_burst
+        self.bytes = self.byte_burst
+        self.stamp = time.monotonic()
+
+    @classmethod
+    def for_peer(cls) -> TokenBucket:
+        return cls(CONFIG.peer_packet_rate, CONFIG.peer_byte_rate)
+
+    @classmethod
+    def for_lobby(cls) -> TokenBucket:
+        return cls(CONFIG.lobby_packet_rate, CONFIG.lobby_byte_rate)
+
+    def wait(self, packets: int, nbytes: int, now: float) -> float:
+        """Refill up to `now`; returns the seconds until the bucket has tokens for the request.
+
+        0.0 means it has them now. Written without min()/max() calls: this runs
+        for every packet.
+        """
+        elapsed = now - self.stamp
+        self.stamp = now
+        wait = 0.0
+        rate = self.packet_rate
+        if rate:
+            burst = self.packet_burst
+            tokens = self.packets + elapsed * rate
+            if tokens > burst:
+                tokens = burst
+            self.packets = tokens
+            need = packets if packets < burst else burst
+            if need > tokens:
+                wait = (need - tokens) / rate
+        rate = self.byte_rate
+        if rate:
+            burst = self.byte_burst
+            tokens = self.bytes + elapsed * rate
+            if tokens > burst:
+                tokens = burst
+            self.bytes = tokens
+            need = nbytes if nbytes < burst else burst
+            if need > tokens and (need - tokens) / rate > wait:
+                wait = (need - tokens) / rate
+        return wait
+
+    def take(self, packets: int, nbytes: int) -> None:
+        if self.packet_rate:
+            self.packets -= packets
+        if self.byte_rate:
+            self.bytes -= nbytes
+
+
+def admit(sender: TokenBucket, lobby: TokenBucket, packets: int, nbytes: int) -> float:
+    """Take tokens for a request from both buckets; returns 0.0, or the seconds to retry after.
+
+    Rejections are counted in metrics.rate_limited_peer / rate_limited_lobby.
+    """
+    now = time.monotonic()
+    wait = sender.wait(packets, nbytes, now)
+    if wait:
+        metrics.rate_limited_peer += 1
+        return wait
+    wait = lobby.wait(packets, nbytes, now)
+    if wait:
+        metrics.rate_limited_lobby += 1
+        return wait
+    sender.take(packets, nbytes)
+    lobby.take(packets, nbytes)
+    return 0.0
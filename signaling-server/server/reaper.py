@@ -0,0 +1,129 @@
+# pyright: strict
+
+"""
+Idle Peer and Session Reaper
+
+Disconnects HTTP peers whose client went away without saying so (a crashed
+tab never calls /api/lobby/disconnect):
+- unattached: connected but never opened /api/lobby/events within
+              CONFIG.peer_attach_ttl seconds
+- idle:       no request and no open event stream or WebSocket for
+              CONFIG.peer_idle_ttl seconds
+
+Every peer sits in state.peer_timers, a timer wheel, until its deadline. The
+reaper wakes every CONFIG.reaper_tick seconds, checks only the peers that
+came due and either disconnects them (the same path as
+/api/lobby/disconnect) or schedules them again. Peers with an open stream or
+socket are left to the stream's own close handling.
+
+Every CONFIG.session_sweep_interval seconds it also collects lobbies and
+rooms nobody will close:
+- lobbies with no peers left, or whose host is no longer connected
+- rooms not backed by a lobby, with no signaling connections and no host
+  update for CONFIG.room_idle_ttl seconds
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+
+from aiohttp import web
+
+from . import bus
+from .config import CONFIG
+from .enums import LobbyCloseReason
+from .lobby_handlers import close_lobby, handle_peer_disconnect
+from .log import get_logger
+from .membership import submit
+from .metrics import metrics
+from .models import Peer
+from .state import state
+
+log = get_logger("lobby")
+rooms_log = get_logger("rooms")
+
+
+def _deadline(peer: Peer) -> float:
+    ttl = CONFIG.peer_attach_ttl if peer.sse_replay is None else CONFIG.peer_idle_ttl
+    return peer.last_activity + ttl
+
+
+def _connected(peer: Peer) -> bool:
+    """Whether the peer has an open event stream or WebSocket."""
+    return peer.sse_stream is not None or (peer.ws is not None and not peer.ws.closed)
+
+
+async def reap_peers(now: float) -> int:
+    """Check the peers due by `now`; disconnect the expired ones and return how many."""
+    reaped = 0
+    for peer in state.peer_timers.advance(now):
+        if state.get_lobby_peer(peer.peer_id) is not peer:
+            continue  # Already gone
+        if _connected(peer):
+            state.peer_timers.add(peer, now + CONFIG.peer_idle_ttl)
+            continue
+        deadline = _deadline(peer)
+        if deadline > now:
+            state.peer_timers.add(peer, deadline)
+            continue
+
+        if peer.sse_replay is None:
+            metrics.peers_reaped_unattached += 1
+            log.info("Peer %s never opened its event stream, disconnecting", peer.peer_id)
+        else:
+            metrics.peers_reaped_idle += 1
+            log.info(
+                "Peer %s idle for %.0fs, disconnecting", peer.peer_id, now - peer.last_activity
+            )
+        await handle_peer_disconnect(peer)
+        reaped += 1
+    return reaped
+
+
+async def reap_sessions(now: float) -> int:
+    """Close abandoned lobbies and remove idle rooms; return how many were reclaimed."""
+    reaped = 0
+    for session in list(state.sessions.values()):
+        if session.host_id is not None:
+            if session.peers and state.get_lobby_peer(session.host_id) is not None:
+                continue
+            metrics.lobbies_reaped += 1
+            log.info("Lobby %s abandoned (%d peers), closing", session.code, len(session.peers))
+            await close_lobby(session, LobbyCloseReason.EXPIRED)
+        else:
+            idle = now - session.last_activity
+            if session.signaling_peers or idle < CONFIG.room_idle_ttl:
+                continue
+            metrics.rooms_reaped += 1
+            rooms_log.info("Room %s idle for %.0fs, removing", session.code, idle)
+            await submit("close_session", code=session.code)
+        reaped += 1
+    return reaped
+
+
+async def run_reaper() -> None:
+    """Reap idle peers every CONFIG.reaper_tick seconds and sweep sessions, forever.
+
+    With workers, each worker reaps the peers it holds and worker 0 sweeps.
+    """
+    next_sweep = time.monotonic() + CONFIG.session_sweep_interval
+    while True:
+        await asyncio.sleep(CONFIG.reaper_tick)
+        now = time.monotonic()
+        try:
+            await reap_peers(now)
+            if now >= next_sweep and bus.here() == 0:
+                next_sweep = now + CONFIG.session_sweep_interval
+                await reap_sessions(now)
+        except Exception:
+            log.exception("Reaper failed")
+
+
+async def reaper_context(_app: web.Application) -> AsyncIterator[None]:
+    """aiohttp cleanup context running the reaper for the app's lifetime."""
+    task = asyncio.create_task(run_reaper())
+    yield
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
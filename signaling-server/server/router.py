@@ -0,0 +1,111 @@
+# pyright: strict
+
+"""
+Membership Router
+
+Runs in the parent process with --workers N. Workers connect to it over a
+Unix socket (see bus.py) and it:
+- applies every membership op to its own State, the authoritative copy;
+  rejected ops go back to the submitting worker only, accepted ones to
+  every worker, in the order the router applied them
+- answers sync requests after everything it sent the worker before, so a
+  worker can catch up on ops it has not applied yet
+- relays frames addressed to another worker without decoding them
+
+The router never waits for a worker to read: one stuck worker must not hold
+up the others. A worker with more than CONFIG.bus_buffer_max_bytes unsent is
+disconnected instead; it has missed ops, so it shuts down (see bus.py) and
+the cluster stops with it.
+
+The router serves no HTTP and holds no peer transports.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import marshal
+from typing import Any
+
+from . import bus
+from .config import CONFIG
+from .log import get_logger
+from .membership import MembershipError, apply
+from .state import State
+
+log = get_logger("bus")
+
+
+class Router:
+    """Sequences membership ops and relays frames between workers."""
+
+    def __init__(self) -> None:
+        self.state = State()
+        self.workers: dict[int, asyncio.StreamWriter] = {}
+
+    async def start(self, path: str) -> asyncio.Server:
+        return await asyncio.start_unix_server(self._serve, path)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        index: int | None = None
+        try:
+            _dest, payload = await bus.read_frame(reader)
+            _hello, index = marshal.loads(payload)
+            assert index is not None
+            self.workers[index] = writer
+            log.info("Worker %d connected to the router", index)
+
+            while True:
+                dest, payload = await bus.read_frame(reader)
+                if dest == bus.ROUTER:
+                    self._handle(index, marshal.loads(payload))
+                    continue
+                if dest not in self.workers:
+                    log.warning("Dropping frame from worker %d to unknown worker %d", index, dest)
+                    continue
+                self._write(dest, bus.HEADER.pack(len(payload), dest) + payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if index is not None and self.workers.get(index) is writer:
+                del self.workers[index]
+                log.warning("Worker %d disconnected from the router", index)
+            writer.close()
+
+    def _handle(self, origin: int, message: tuple[Any, ...]) -> None:
+        kind, request_id, *fields = message
+        if kind == "sync":
+            self._send(origin, ("synced", request_id))
+            return
+
+        name, args = fields
+        try:
+            apply(self.state, name, args, bus.ROUTER)
+        except MembershipError as e:
+            # str(): marshal does not encode ErrorCode, a str subclass
+            self._send(origin, ("rejected", request_id, str(e.code), e.message, e.status))
+            return
+        except Exception as e:
+            log.exception("Op %s from worker %d failed", name, origin)
+            self._send(origin, ("rejected", request_id, "INTERNAL_ERROR", str(e), 500))
+            return
+
+        frame = bus.pack(bus.ROUTER, ("applied", origin, request_id, name, args))
+        for index in list(self.workers):
+            self._write(index, frame)
+
+    def _send(self, index: int, message: tuple[Any, ...]) -> None:
+        if index in self.workers:
+            self._write(index, bus.pack(index, message))
+
+    def _write(self, index: int, frame: bytes) -> None:
+        """Queue a frame for a worker; disconnect it if it is too far behind to catch up."""
+        writer = self.workers[index]
+        writer.write(frame)
+        if writer.transport.get_write_buffer_size() > CONFIG.bus_buffer_max_bytes:
+            log.error(
+                "Worker %d has over %d bytes unread, disconnecting it",
+                index,
+                CONFIG.bus_buffer_max_bytes,
+            )
+            del self.workers[index]
+            writer.transport.abort()
@@ -0,0 +1,196 @@
+# pyright: strict
+
+"""
+State Snapshots (warm restart)
+
+A snapshot holds what clients need to find after a restart: lobby peers
+and their player data, every lobby and signaling room, the peer ID counter
+and the SSE event ID sequence. It is marshal-encoded:
+
+    (SNAPSHOT_FORMAT, written_at, next_peer_id, peers, sessions, next_event_id)
+
+    peer     (peer_id, player data or None)
+    session  (code, name, channel, host_id, public, player_limit, open,
+              next_peer_id, reported_players, created_at, member peer IDs)
+
+Event IDs carry on from the saved sequence, so a client resuming with a
+Last-Event-ID from before the restart is never matched against a newer
+event that reused its ID. Format 1 snapshots, which predate the sequence,
+are still read.
+
+Timestamps are wall-clock times. Transports (event streams, WebSockets)
+and signaling connections do not survive a restart and are not saved.
+
+Restored peers come back as HTTP peers that have connected but not yet
+opened their event stream: a client that reopens /api/lobby/events with its
+peer ID within CONFIG.peer_attach_ttl finds its lobby as it left it. The
+reaper disconnects the others, closing the lobbies whose host does not come
+back, and restored rooms get CONFIG.room_idle_ttl for their signaling peers
+to reconnect.
+"""
+
+from __future__ import annotations
+
+import gc
+import marshal
+import os
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Any
+
+from .frames import next_event_id, resume_event_ids
+from .log import get_logger
+from .models import Peer, Session
+from .peer_queue import PeerQueue
+from .state import State
+
+log = get_logger("server")
+
+SNAPSHOT_FORMAT = 2
+
+
+@contextmanager
+def _gc_paused() -> Generator[None]:
+    """Hold off cyclic GC while building many long-lived objects; it would only rescan them."""
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def dump(state: State) -> bytes:
+    """Encode the lobbies, rooms and peers of `state`."""
+    with _gc_paused():
+        return marshal.dumps(_snapshot(state))
+
+
+def _snapshot(state: State) -> tuple[Any, ...]:
+    to_wall = time.time() - time.monotonic()
+    peers = [(peer.peer_id, peer.sent_player_data) for peer in state.lobby_peers.values()]
+    sessions = [
+        (
+            s.code,
+            s.name,
+            s.channel,
+            s.host_id,
+            s.public,
+            s.player_limit,
+            s.open,
+            s.next_peer_id,
+            s.reported_players,
+            s.created_at + to_wall,
+            list(s.peers),
+        )
+        for s in state.sessions.values()
+    ]
+    return (SNAPSHOT_FORMAT, time.time(), state.next_peer_id, peers, sessions, next_event_id())
+
+
+def load(state: State, data: bytes) -> tuple[int, int]:
+    """Restore a dump() into `state`, which should be empty.
+
+    Returns how many sessions and peers were restored. Raises ValueError if
+    `data` is not a snapshot this version can read.
+    """
+    try:
+        snapshot: tuple[Any, ...] = marshal.loads(data)
+        version, _written_at, next_peer_id, peers, sessions, *rest = snapshot
+    except (EOFError, TypeError, ValueError) as e:
+        raise ValueError(f"Not a state snapshot: {e}") from None
+    if version not in (1, SNAPSHOT_FORMAT) or len(rest) != version - 1:
+        raise ValueError(f"Unsupported snapshot format {version!r}")
+
+    with _gc_paused():
+        now = time.monotonic()
+        to_monotonic = now - time.time()
+        restored: dict[int, Peer] = {}
+        for peer_id, player_data in peers:
+            peer = restored[peer_id] = Peer(
+                peer_id=peer_id, sse_queue=PeerQueue(), last_activity=now
+            )
+            if player_data is not None:
+                peer.player_data = player_data
+
+        for (
+            code,
+            name,
+            channel,
+            host_id,
+            public,
+            player_limit,
+            is_open,
+            next_signaling_id,
+            reported_players,
+            created_at,
+            members,
+        ) in sessions:
+            session = Session(
+                code=code,
+                name=name,
+                channel=channel,
+                host_id=host_id,
+                public=public,
+                player_limit=player_limit,
+                open=is_open,
+                next_peer_id=next_signaling_id,
+                reported_players=reported_players,
+                created_at=created_at + to_monotonic,
+                last_activity=now,
+            )
+            for peer_id in members:
+                session.add_peer(restored[peer_id])
+            state.add_restored_session(session)
+
+        for peer in restored.values():
+            state.add_lobby_peer(peer)
+        state.next_peer_id = max(state.next_peer_id, next_peer_id)
+        if rest:
+            resume_event_ids(rest[0])
+    return len(sessions), len(restored)
+
+
+def save(state: State, path: str) -> None:
+    """Write a snapshot of `state` to `path`, replacing any previous one atomically."""
+    start = time.perf_counter()
+    data = dump(state)
+    temp = f"{path}.tmp"
+    with open(temp, "wb") as f:
+        f.write(data)
+    os.replace(temp, path)
+    log.info(
+        "Saved %d sessions and %d peers to %s (%d bytes, %.1f ms)",
+        len(state.sessions),
+        len(state.lobby_peers),
+        path,
+        len(data),
+        (time.perf_counter() - start) * 1000,
+    )
+
+
+def restore(state: State, path: str) -> bool:
+    """Restore `state` from the snapshot at `path`. False if there is none or it is unreadable."""
+    start = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return False
+
+    try:
+        sessions, peers = load(state, data)
+    except (ValueError, KeyError) as e:
+        log.error("Ignoring snapshot %s: %s", path, e)
+        state.clear_all()
+        return False
+    log.info(
+        "Restored %d sessions and %d peers from %s (%.1f ms)",
+        sessions,
+        peers,
+        path,
+        (time.perf_counter() - start) * 1000,
+    )
+    return True
@@ -7,11 +7,17 @@ Global State Management for Signaling Server
 from __future__ import annotations
 
 import random
+import time
+from collections.abc import Callable, Iterable
 
-from aiohttp import web
-
+from .codes import CodeAllocator
 from .config import CONFIG
-from .models import Lobby, Peer, Room
+from .lobby_index import LobbyQuery, LobbySearchIndex
+from .models import Peer, Session
+from .timer_wheel import TimerWheel
+
+# Code of the debug room; reserved, so it is never allocated to another session
+DEBUG_ROOM_CODE = "TEST"
 
 
 class State:
@@ -19,21 +25,39 @@ class State:
     Centralized state manager for the signaling server.
 
     Manages:
-    - Lobbies (new WebSocket-based lobby system)
-    - Rooms (WebRTC signaling rooms for backward compatibility)
+    - Sessions, one record per code: every WebRTC signaling room, and the
+      lobbies among them, indexed by code and by lowercase name; plus a live
+      index of the public, open lobbies and cached serialized list responses
     - Peer connections
+
+    lobby_list_version and room_list_version change whenever the lobby or
+    room listings would; together with a per-process epoch they make the
+    listing ETags.
     """
 
     def __init__(self):
-        # Lobby system state
-        self.lobbies: dict[str, Lobby] = {}
-        self.lobby_name_to_code: dict[str, str] = {}
+        # Sessions (lobbies and signaling rooms) by code and by lowercase name
+        self.sessions: dict[str, Session] = {}
+        self.session_names: dict[str, str] = {}
+        self.room_list_version: int = 0
+
+        # Lobby system peers
         self.lobby_peers: dict[int, Peer] = {}
         self._next_peer_id: int = 1
+        self.peer_timers = self._new_peer_timers()
+
+        # Public, open lobbies in creation order, and a version bumped whenever
+        # anything shown in a lobby list changes
+        self.public_lobbies: dict[str, Session] = {}
+        self.lobby_search = LobbySearchIndex()  # Sorted indexes over public_lobbies
+        self.lobby_list_version: int = 0
+        self._lobby_list_cache: dict[str, tuple[int, bytes]] = {}
 
-        # WebRTC signaling state (existing/backward compatible)
-        self.rooms: dict[str, Room] = {}
-        self.ws_connections: dict[str, dict[int, web.WebSocketResponse]] = {}
+        # Codes of live sessions
+        self.codes = self._new_code_allocator()
+
+        # Distinguishes ETags across server restarts
+        self._epoch = f"{random.getrandbits(32):08x}"
 
     # =========================================================================
     # Peer ID Management
@@ -45,100 +69,201 @@ class State:
         self._next_peer_id += 1
         return peer_id
 
+    @property
+    def next_peer_id(self) -> int:
+        """The ID get_next_peer_id() hands out next."""
+        return self._next_peer_id
+
+    @next_peer_id.setter
+    def next_peer_id(self, value: int) -> None:
+        self._next_peer_id = value
+
     # =========================================================================
     # Code Generation
     # =========================================================================
 
     def generate_code(self) -> str:
-        """Generate a random room/lobby code."""
+        """Generate a random code-like string (not reserved; used for default names)."""
         chars = CONFIG.room_code_chars
         length = CONFIG.room_code_length
-        return "".join(random.choice(chars) for _ in range(length))
+        return "".join(random.choices(chars, k=length))
 
     def generate_unique_code(self) -> str:
-        """Generate a unique code not already in use."""
-        code = self.generate_code()
-        while code in self.lobbies or code in self.rooms:
-            code = self.generate_code()
+        """Allocate a code not used by any session; remove_session() releases it."""
+        return self.codes.allocate()
+
+    def _claim_code(self, code: str | None) -> str:
+        """Reserve `code`, or allocate one if None. Raises ValueError if `code` is taken."""
+        if code is None:
+            return self.generate_unique_code()
+        if not self.codes.claim(code):
+            raise ValueError(f"Code {code} is already in use")
         return code
 
+    @staticmethod
+    def _new_code_allocator() -> CodeAllocator:
+        return CodeAllocator(
+            CONFIG.room_code_chars,
+            CONFIG.room_code_length,
+            CONFIG.room_code_max_occupancy,
+            reserved=(DEBUG_ROOM_CODE,),
+        )
+
     # =========================================================================
-    # Lobby Management
+    # Session Lookup
     # =========================================================================
 
-    def create_lobby(
-        self, name: str, host_peer: Peer, public: bool = True, player_limit: int = 0
-    ) -> Lobby:
-        """Create a new lobby."""
-        code = self.generate_unique_code()
-        lobby = Lobby.create(code, name, host_peer, public, player_limit)
+    def get_session(self, code: str) -> Session | None:
+        """Get a session (lobby or signaling room) by code."""
+        return self.sessions.get(code.upper())
+
+    def find_session(self, code_or_name: str) -> Session | None:
+        """Find a session by code, then by name."""
+        session = self.get_session(code_or_name)
+        if session:
+            return session
+        code = self.session_names.get(code_or_name.lower())
+        return self.sessions.get(code) if code else None
+
+    def remove_session(self, code: str) -> Session | None:
+        """Remove a session and everything registered under its code."""
+        session = self.sessions.pop(code, None)
+        if not session:
+            return None
+
+        if self.public_lobbies.pop(code, None):
+            self.lobby_search.discard(code)
+            self.lobby_list_version += 1
+        if session.name:
+            self._release_name(session.name, code)
+
+        # Clear peer lobby references
+        for peer in session.peers.values():
+            peer.lobby_code = None
+
+        self.rooms_changed()
+        self.codes.release(code)
+        return session
+
+    def add_restored_session(self, session: Session) -> None:
+        """Register a session read back from a snapshot, under its own code.
+
+        Its member peers are registered separately, with add_lobby_peer().
+        """
+        self._claim_code(session.code)
+        self._add_session(session)
+        if session.is_lobby:
+            self.update_lobby_index(session)
+
+    def _add_session(self, session: Session) -> None:
+        self.sessions[session.code] = session
+        if session.name:
+            self.session_names[session.name.lower()] = session.code
+        self.rooms_changed()
+
+    def _release_name(self, name: str, code: str) -> None:
+        """Drop a name mapping, unless the name has since been taken by another code."""
+        if self.session_names.get(name.lower()) == code:
+            del self.session_names[name.lower()]
 
-        self.lobbies[code] = lobby
-        self.lobby_name_to_code[name.lower()] = code
+    # =========================================================================
+    # Lobby Management
+    # =========================================================================
 
-        # Also create a corresponding room for WebRTC signaling
-        room = Room(
-            code=code,
+    def create_lobby(
+        self,
+        name: str,
+        host_peer: Peer,
+        public: bool = True,
+        player_limit: int = 0,
+        code: str | None = None,
+    ) -> Session:
+        """Create a new lobby (and signaling room) hosted by `host_peer`.
+
+        A new code is allocated unless `code` (one allocated elsewhere) is given.
+        """
+        lobby = Session.create_lobby(
+            self._claim_code(code),
+            name,
+            host_peer,
+            public,
+            player_limit,
             channel=CONFIG.default_channel,
-            next_peer_id=2,  # Host is 1, next client is 2
-            created_at=lobby.created_at,
-            lobby_name=name,
-            public=public,
-            player_limit=player_limit,
-            player_count=1,
         )
-        self.rooms[code] = room
-        self.ws_connections[code] = {}
-
+        self._add_session(lobby)
+        self.update_lobby_index(lobby)
         return lobby
 
-    def get_lobby(self, code: str) -> Lobby | None:
+    def get_lobby(self, code: str) -> Session | None:
         """Get a lobby by code."""
-        return self.lobbies.get(code.upper())
-
-    def get_lobby_by_name(self, name: str) -> Lobby | None:
-        """Get a lobby by name."""
-        code = self.lobby_name_to_code.get(name.lower())
-        return self.lobbies.get(code) if code else None
+        session = self.get_session(code)
+        return session if session and session.is_lobby else None
 
-    def find_lobby(self, code_or_name: str) -> Lobby | None:
+    def find_lobby(self, code_or_name: str) -> Session | None:
         """Find a lobby by code or name."""
-        # Try as code first
-        lobby = self.get_lobby(code_or_name)
-        if lobby:
-            return lobby
-        # Try as name
-        return self.get_lobby_by_name(code_or_name)
-
-    def remove_lobby(self, code: str) -> Lobby | None:
-        """Remove a lobby and clean up associated resources."""
-        lobby = self.lobbies.pop(code, None)
-        if lobby:
-            # Clean up name mapping
-            if lobby.name.lower() in self.lobby_name_to_code:
-                del self.lobby_name_to_code[lobby.name.lower()]
-
-            # Clear peer lobby references
-            for peer in lobby.peers.values():
-                peer.lobby_code = None
-
-            # Clean up corresponding room
-            self.rooms.pop(code, None)
-            self.ws_connections.pop(code, None)
-
-        return lobby
-
-    def get_public_lobbies(self) -> list[Lobby]:
+        session = self.find_session(code_or_name)
+        return session if session and session.is_lobby else None
+
+    @property
+    def lobby_count(self) -> int:
+        return sum(1 for session in self.sessions.values() if session.is_lobby)
+
+    def join_lobby(self, lobby: Session, peer: Peer) -> None:
+        """Add a peer to a lobby."""
+        lobby.add_peer(peer)
+        self._players_changed(lobby)
+
+    def leave_lobby(self, lobby: Session, peer_id: int) -> Peer | None:
+        """Remove a peer from a lobby."""
+        peer = lobby.remove_peer(peer_id)
+        self._players_changed(lobby)
+        return peer
+
+    def _players_changed(self, lobby: Session) -> None:
+        """Refresh the listings that show the lobby's player count."""
+        self.update_lobby_index(lobby)
+        self.rooms_changed()
+
+    def get_public_lobbies(self) -> list[Session]:
         """Get all public, open lobbies."""
-        return [lobby for lobby in self.lobbies.values() if lobby.public and lobby.open]
+        return list(self.public_lobbies.values())
+
+    def update_lobby_index(self, lobby: Session) -> None:
+        """Re-index a lobby after anything shown in the lobby list changed.
+
+        Call after changing a lobby's players, name, player limit, public or open flag.
+        """
+        listed = lobby.public and lobby.open and self.get_lobby(lobby.code) is lobby
+        if listed:
+            self.public_lobbies[lobby.code] = lobby
+            self.lobby_search.put(lobby)
+            self.lobby_list_version += 1
+        elif self.public_lobbies.pop(lobby.code, None):
+            self.lobby_search.discard(lobby.code)
+            self.lobby_list_version += 1
+
+    def search_lobbies(self, query: LobbyQuery) -> tuple[list[Session], str | None]:
+        """One page of public, open lobbies matching `query`, plus the next-page cursor."""
+        return self.lobby_search.search(query, self.public_lobbies)
+
+    def lobby_list_payload(self, fmt: str, render: Callable[[Iterable[Session]], bytes]) -> bytes:
+        """Serialized lobby list in format `fmt`, re-rendered only after the index changed."""
+        cached = self._lobby_list_cache.get(fmt)
+        if cached and cached[0] == self.lobby_list_version:
+            return cached[1]
+        payload = render(self.public_lobbies.values())
+        self._lobby_list_cache[fmt] = (self.lobby_list_version, payload)
+        return payload
 
     # =========================================================================
     # Peer Management
     # =========================================================================
 
-    def add_lobby_peer(self, peer: Peer) -> None:
-        """Register a peer in the lobby system."""
+    def add_lobby_peer(self, peer: Peer, reap: bool = True) -> None:
+        """Register a peer in the lobby system and, if `reap`, schedule its idle check."""
         self.lobby_peers[peer.peer_id] = peer
+        if reap:
+            self.peer_timers.add(peer, peer.last_activity + CONFIG.peer_attach_ttl)
 
     def remove_lobby_peer(self, peer_id: int) -> Peer | None:
         """Remove a peer from the lobby system."""
@@ -148,6 +273,18 @@ class State:
         """Get a peer by ID."""
         return self.lobby_peers.get(peer_id)
 
+    def touch_lobby_peer(self, peer_id: int) -> Peer | None:
+        """Get a peer by ID for a request it made, recording the activity."""
+        peer = self.lobby_peers.get(peer_id)
+        if peer:
+            peer.last_activity = time.monotonic()
+        return peer
+
+    @staticmethod
+    def _new_peer_timers() -> TimerWheel:
+        span = max(CONFIG.peer_attach_ttl, CONFIG.peer_idle_ttl)
+        return TimerWheel(CONFIG.reaper_tick, span, time.monotonic())
+
     # =========================================================================
     # Room Management (WebRTC Signaling)
     # =========================================================================
@@ -159,76 +296,79 @@ class State:
         public: bool = True,
         player_limit: int = 0,
         is_debug: bool = False,
-    ) -> Room:
-        """Create a new WebRTC signaling room."""
-        code = "TEST" if is_debug else self.generate_unique_code()
-
-        room = Room(
+        code: str | None = None,
+    ) -> Session:
+        """Create a new WebRTC signaling room (the debug room is reused while it exists).
+
+        A new code is allocated unless `code` (one allocated elsewhere) is given.
+        """
+        if is_debug:
+            code = DEBUG_ROOM_CODE
+            existing = self.sessions.get(code)
+            if existing:
+                existing.last_activity = time.monotonic()
+                return existing
+        code = self._claim_code(code)
+
+        room = Session(
             code=code,
+            name=lobby_name,
             channel=channel,
-            lobby_name=lobby_name,
             public=public,
             player_limit=player_limit,
         )
-        self.rooms[code] = room
-        self.ws_connections[code] = {}
-
-        if lobby_name:
-            self.lobby_name_to_code[lobby_name.lower()] = code
-
+        self._add_session(room)
         return room
 
-    def get_room(self, code: str) -> Room | None:
-        """Get a room by code."""
-        return self.rooms.get(code.upper())
-
-    def find_room(self, code_or_name: str) -> Room | None:
-        """Find a room by code or name."""
-        # Try as code first
-        room = self.get_room(code_or_name)
-        if room:
-            return room
-        # Try as name
-        code = self.lobby_name_to_code.get(code_or_name.lower())
-        return self.rooms.get(code) if code else None
-
-    def remove_room(self, code: str) -> Room | None:
-        """Remove a room."""
-        room = self.rooms.pop(code, None)
-        if room and room.lobby_name:
-            self.lobby_name_to_code.pop(room.lobby_name.lower(), None)
-        self.ws_connections.pop(code, None)
-        return room
-
-    def get_public_rooms(self) -> list[Room]:
+    def get_room(self, code: str) -> Session | None:
+        """Get a signaling room (any session) by code."""
+        return self.get_session(code)
+
+    def find_room(self, code_or_name: str) -> Session | None:
+        """Find a signaling room by code or name."""
+        return self.find_session(code_or_name)
+
+    def rename_room(self, room: Session, lobby_name: str) -> None:
+        """Give a room a new lobby name, moving its name mapping."""
+        if room.name:
+            self._release_name(room.name, room.code)
+        room.name = lobby_name
+        self.session_names[lobby_name.lower()] = room.code
+        self.rooms_changed()
+        if room.is_lobby:
+            self.update_lobby_index(room)
+
+    def get_public_rooms(self) -> list[Session]:
         """Get all public rooms."""
-        return [room for room in self.rooms.values() if room.public]
+        return [room for room in self.sessions.values() if room.public]
+
+    def rooms_changed(self) -> None:
+        """Invalidate room listings; call after changing any room field."""
+        self.room_list_version += 1
+
+    def listing_etag(self, *versions: int) -> str:
+        """Strong ETag for a listing built from the given version counters."""
+        tag = "-".join(map(str, [self._epoch, *versions]))
+        return f'"{tag}"'
 
     # =========================================================================
-    # WebSocket Connection Management
+    # Signaling Peers
     # =========================================================================
 
-    def add_signaling_connection(self, code: str, peer_id: int, ws: web.WebSocketResponse) -> None:
-        """Add a WebSocket connection for signaling."""
-        if code not in self.ws_connections:
-            self.ws_connections[code] = {}
-        self.ws_connections[code][peer_id] = ws
-
-    def remove_signaling_connection(self, code: str, peer_id: int) -> None:
-        """Remove a WebSocket connection for signaling."""
-        if code in self.ws_connections:
-            self.ws_connections[code].pop(peer_id, None)
+    def add_signaling_peer(self, room: Session, peer_id: int, home: int = 0) -> None:
+        """Register a signaling peer whose WebSocket is held by worker `home`.
 
-    def get_signaling_connections(self, code: str) -> dict[int, web.WebSocketResponse]:
-        """Get all signaling connections for a room."""
-        return self.ws_connections.get(code, {})
+        The worker holding the socket also puts it in room.connections.
+        """
+        room.signaling_peers[peer_id] = home
+        room.last_activity = time.monotonic()
+        self.rooms_changed()
 
-    def get_signaling_peer_ids(self, code: str, exclude: int | None = None) -> list[int]:
-        """Get all peer IDs in a signaling room."""
-        connections = self.ws_connections.get(code, {})
-        if exclude is not None:
-            return [pid for pid in connections if pid != exclude]
-        return list(connections.keys())
+    def remove_signaling_peer(self, room: Session, peer_id: int) -> None:
+        """Unregister a signaling peer."""
+        if room.signaling_peers.pop(peer_id, None) is not None:
+            room.last_activity = time.monotonic()
+            self.rooms_changed()
 
     # =========================================================================
     # Cleanup
@@ -236,11 +376,16 @@ class State:
 
     def clear_all(self) -> None:
         """Clear all state."""
-        self.lobbies.clear()
-        self.lobby_name_to_code.clear()
+        self.sessions.clear()
+        self.session_names.clear()
+        self.rooms_changed()
+        self.public_lobbies.clear()
+        self.lobby_search.clear()
+        self._lobby_list_cache.clear()
+        self.lobby_list_version += 1
         self.lobby_peers.clear()
-        self.rooms.clear()
-        self.ws_connections.clear()
+        self.peer_timers = self._new_peer_timers()
+        self.codes = self._new_code_allocator()
         self._next_peer_id = 1
 
 
@@ -0,0 +1,56 @@
+# pyright: strict
+
+"""
+Hashed Timer Wheel
+
+Schedules peers for a check at a deadline. Time is cut into ticks and the
+wheel is a ring of slots, one per tick; a peer goes into the slot of the tick
+its deadline falls in. add() is O(1), and advance() only empties the slots
+whose tick has passed, so a tick costs the peers due in it rather than the
+number of peers scheduled.
+
+Deadlines beyond the wheel's span are put in its last slot and come out
+early; the caller checks every peer it gets back and schedules it again if
+it is not actually due. Peers are not removed when they go away either:
+callers skip peers that are no longer registered.
+"""
+
+from __future__ import annotations
+
+import math
+
+from .models import Peer
+
+
+class TimerWheel:
+    """Ring of per-tick slots of peers, advanced with the monotonic clock."""
+
+    def __init__(self, tick: float, span: float, now: float) -> None:
+        self.tick = tick
+        self._slots: list[list[Peer]] = [[] for _ in range(math.ceil(span / tick) + 1)]
+        self._next = int(now // tick)  # Next tick to expire
+
+    def __len__(self) -> int:
+        return sum(len(slot) for slot in self._slots)
+
+    def add(self, peer: Peer, deadline: float) -> None:
+        """Schedule `peer` to come out of advance() once `deadline` has passed."""
+        due = max(math.ceil(deadline / self.tick), self._next)
+        due = min(due, self._next + len(self._slots) - 1)
+        self._slots[due % len(self._slots)].append(peer)
+
+    def advance(self, now: float) -> list[Peer]:
+        """Remove and return the peers of every tick up to `now`."""
+        target = int(now // self.tick)
+        if target < self._next:
+            return []
+        # After a long stall every slot is due; visit each once
+        ticks = min(target - self._next + 1, len(self._slots))
+        due: list[Peer] = []
+        for tick in range(self._next, self._next + ticks):
+            slot = self._slots[tick % len(self._slots)]
+            if slot:
+                due += slot
+                slot.clear()
+        self._next = target + 1
+        return due
@@ -8,16 +8,28 @@ Two WebSocket endpoints:
 2. /ws/{code} - WebRTC signaling (ICE/SDP exchange)
 """
 
-import json
+import asyncio
+import logging
+from collections.abc import Iterable
 from typing import Any
 
 from aiohttp import WSMsgType, web
 
+from . import bus
+from .codec import JSONDecodeError, dumps, loads, send_json
 from .enums import ErrorCode, ResponseType, SignalingDataType
+from .fanout import keep_alive
 from .lobby_handlers import handle_peer_disconnect, route_message
-from .models import Peer
+from .log import get_logger
+from .membership import MembershipError, catch_up, submit
+from .models import Session
+from .ratelimit import TokenBucket, admit
 from .state import state
 
+lobby_log = get_logger("lobby")
+ws_log = get_logger("ws")
+signal_log = get_logger("signal")
+
 # =============================================================================
 # Lobby WebSocket Handler
 # =============================================================================
@@ -28,44 +40,47 @@ async def handle_lobby_websocket(request: web.Request) -> web.WebSocketResponse:
     ws = web.WebSocketResponse()
     await ws.prepare(request)
 
-    peer_id = state.get_next_peer_id()
-    peer = Peer(peer_id=peer_id, ws=ws)
-    state.add_lobby_peer(peer)
+    peer_id = await submit("connect", peer_id=0, home=bus.here(), sse=False)
+    peer = state.get_lobby_peer(peer_id)
+    assert peer is not None
+    peer.ws = ws
 
-    print(f"[LOBBY] Peer {peer_id} connected (total lobby peers: {len(state.lobby_peers)})")
+    lobby_log.info("Peer %s connected (total lobby peers: %d)", peer_id, len(state.lobby_peers))
 
     # Send welcome message with assigned ID
-    await ws.send_json(
+    await send_json(
+        ws,
         {
             "t": ResponseType.WELCOME,
             "your_id": peer_id,
-        }
+        },
     )
 
     try:
         async for msg in ws:
             if msg.type == WSMsgType.TEXT:
                 try:
-                    data: dict[str, Any] = json.loads(msg.data)
+                    data: dict[str, Any] = loads(msg.data)
                     response = await route_message(peer, data)
                     if response:
-                        await ws.send_json(response)
+                        await send_json(ws, response)
 
-                except json.JSONDecodeError:
-                    await ws.send_json(
+                except JSONDecodeError:
+                    await send_json(
+                        ws,
                         {
                             "t": ResponseType.ERROR,
                             "code": ErrorCode.INVALID_JSON,
                             "message": "Invalid JSON",
-                        }
+                        },
                     )
             elif msg.type == WSMsgType.ERROR:
-                print(f"[LOBBY] WebSocket error for peer {peer_id}: {ws.exception()}")
+                lobby_log.warning("WebSocket error for peer %s: %s", peer_id, ws.exception())
 
     finally:
         # Handle disconnect
         await handle_peer_disconnect(peer)
-        print(f"[LOBBY] Peer {peer_id} disconnected (remaining: {len(state.lobby_peers)})")
+        lobby_log.info("Peer %s disconnected (remaining: %d)", peer_id, len(state.lobby_peers))
 
     return ws
 
@@ -75,52 +90,107 @@ async def handle_lobby_websocket(request: web.Request) -> web.WebSocketResponse:
 # =============================================================================
 
 
+async def send_signal(room: Session, peer_ids: Iterable[int], message: dict[str, Any]) -> None:
+    """Send a signaling message to some of a room's peers, wherever their sockets are."""
+    data = dumps(message)
+    link = bus.link
+    remote: dict[int, list[int]] = {}
+    for peer_id in peer_ids:
+        ws = room.connections.get(peer_id)
+        if ws is not None:
+            if not ws.closed:
+                try:
+                    await ws.send_frame(data, WSMsgType.TEXT)
+                except Exception:
+                    pass
+            continue
+        home = room.signaling_peers.get(peer_id)
+        if home is not None and link is not None:
+            remote.setdefault(home, []).append(peer_id)
+
+    for home, ids in remote.items():
+        assert link is not None
+        link.send(home, ("signal", room.code, ids, data))
+
+
+def receive_signal(code: str, peer_ids: list[int], data: bytes) -> None:
+    """Bus handler: send a signaling message from another worker to sockets held here."""
+    room = state.get_session(code)
+    if room is None:
+        return
+    for peer_id in peer_ids:
+        ws = room.connections.get(peer_id)
+        if ws is not None and not ws.closed:
+            keep_alive(asyncio.ensure_future(ws.send_frame(data, WSMsgType.TEXT)))
+
+
 async def handle_signaling_websocket(request: web.Request) -> web.WebSocketResponse | web.Response:
     """WebSocket handler for WebRTC signaling (ICE/SDP exchange)."""
     code = request.match_info["code"].upper()
 
     room = state.get_room(code)
+    if not room and await catch_up():
+        room = state.get_room(code)
     if not room:
         return web.Response(status=404, text="Room not found")
 
-    ws = web.WebSocketResponse()
-    await ws.prepare(request)
-
     # Assign peer ID from room's sequence
-    peer_id = room.next_peer_id
-    room.next_peer_id += 1
+    try:
+        peer_id = await submit("signal_join", code=code, peer_id=0, home=bus.here())
+    except MembershipError:
+        return web.Response(status=404, text="Room not found")
 
-    state.add_signaling_connection(code, peer_id, ws)
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+    room.connections[peer_id] = ws
+    bucket = TokenBucket.for_peer()
+    if room.bucket is None:
+        room.bucket = TokenBucket.for_lobby()
 
-    connections = state.get_signaling_connections(code)
-    print(f"[WS] Peer {peer_id} connected to room {code} (total: {len(connections)})")
+    ws_log.info(
+        "Peer %s connected to room %s (total: %d)", peer_id, code, len(room.signaling_peers)
+    )
 
     try:
         # Send initialization with existing peers
-        existing_peers = state.get_signaling_peer_ids(code, exclude=peer_id)
-        await ws.send_json(
+        existing_peers = [pid for pid in room.signaling_peers if pid != peer_id]
+        await send_json(
+            ws,
             {
                 "data_type": SignalingDataType.INITIALIZE,
                 "id": peer_id,
                 "peers": existing_peers,
-            }
+            },
         )
 
         # Notify others about new peer
-        for pid, other_ws in connections.items():
-            if pid != peer_id and not other_ws.closed:
-                await other_ws.send_json(
-                    {
-                        "data_type": SignalingDataType.NEW_CONNECTION,
-                        "peer_id": peer_id,
-                    }
-                )
+        await send_signal(
+            room,
+            existing_peers,
+            {
+                "data_type": SignalingDataType.NEW_CONNECTION,
+                "peer_id": peer_id,
+            },
+        )
 
         # Message loop
         async for msg in ws:
             if msg.type == WSMsgType.TEXT:
+                # Rate limit before decoding: a flooding connection costs as little as possible
+                retry_after = admit(bucket, room.bucket, 1, len(msg.data))
+                if retry_after:
+                    await send_json(
+                        ws,
+                        {
+                            "data_type": SignalingDataType.ERROR,
+                            "code": ErrorCode.RATE_LIMITED,
+                            "message": "Sending too fast",
+                            "retry_after": round(retry_after, 3),
+                        },
+                    )
+                    continue
                 try:
-                    data: dict[str, Any] = json.loads(msg.data)
+                    data: dict[str, Any] = loads(msg.data)
                     data_type = data.get("data_type", "unknown")
 
                     # Skip ready messages
@@ -128,49 +198,44 @@ async def handle_signaling_websocket(request: web.Request) -> web.WebSocketRespo
                         continue
 
                     # Log signaling messages
-                    if data_type in (
+                    if signal_log.isEnabledFor(logging.DEBUG) and data_type in (
                         SignalingDataType.OFFER,
                         SignalingDataType.ANSWER,
                         SignalingDataType.ICE,
                     ):
-                        target_id = data.get("to", "?")
-                        print(
-                            f"[SIGNAL] {data_type.upper()} from peer {peer_id} to peer {target_id}"
+                        signal_log.debug(
+                            "%s from peer %s to peer %s",
+                            data_type.upper(),
+                            peer_id,
+                            data.get("to", "?"),
                         )
 
                     # Forward to target peer
                     if "to" in data:
-                        target_id = data["to"]
-                        target_connections = state.get_signaling_connections(code)
-                        if target_id in target_connections:
-                            target_ws = target_connections[target_id]
-                            if not target_ws.closed:
-                                data["from"] = peer_id
-                                await target_ws.send_json(data)
+                        data["from"] = peer_id
+                        await send_signal(room, [data["to"]], data)
 
-                except json.JSONDecodeError:
-                    print(f"[WS] Invalid JSON from peer {peer_id}")
+                except JSONDecodeError:
+                    ws_log.warning("Invalid JSON from peer %s", peer_id)
 
             elif msg.type == WSMsgType.ERROR:
-                print(f"[WS] Error: {ws.exception()}")
+                ws_log.warning("Error: %s", ws.exception())
 
     finally:
-        print(f"[WS] Peer {peer_id} disconnected from room {code}")
+        ws_log.info("Peer %s disconnected from room %s", peer_id, code)
 
-        state.remove_signaling_connection(code, peer_id)
+        room.connections.pop(peer_id, None)
+        await submit("signal_leave", code=code, peer_id=peer_id)
 
         # Notify others about disconnect
-        for other_ws in state.get_signaling_connections(code).values():
-            if not other_ws.closed:
-                try:
-                    await other_ws.send_json(
-                        {
-                            "data_type": SignalingDataType.PEER_DISCONNECTED,
-                            "peer_id": peer_id,
-                        }
-                    )
-                except Exception:
-                    pass
+        await send_signal(
+            room,
+            list(room.signaling_peers),
+            {
+                "data_type": SignalingDataType.PEER_DISCONNECTED,
+                "peer_id": peer_id,
+            },
+        )
 
     return ws
 
@@ -0,0 +1,263 @@
+# pyright: strict
+
+"""
+Tests for multi-worker mode: membership ops, and a real router with two
+worker processes reached through their internal sockets.
+
+Run with: uv run pytest tests/ -v
+"""
+
+import asyncio
+import marshal
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, cast
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+
+from server import bus
+from server import router as router_module
+from server.config import CONFIG
+from server.membership import apply, on_applied
+from server.router import Router
+from server.state import State
+from server.state import state as worker_state
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+
+class Writer:
+    """Stands in for a worker's StreamWriter; nothing written is ever read."""
+
+    def __init__(self) -> None:
+        self.sent: list[bytes] = []
+        self.aborted = False
+        self.transport = self
+
+    def write(self, data: bytes) -> None:
+        self.sent.append(data)
+
+    def get_write_buffer_size(self) -> int:
+        return sum(len(data) for data in self.sent)
+
+    def abort(self) -> None:
+        self.aborted = True
+
+
+class TestMembershipOps(TestCase):
+    """Ops replayed with the router's choices leave replicas identical."""
+
+    def test_replicas_follow_router_choices(self) -> None:
+        router, replica = State(), State()
+        ops: list[tuple[str, dict[str, Any]]] = [
+            ("connect", {"peer_id": 0, "home": 0, "sse": True}),
+            ("connect", {"peer_id": 0, "home": 1, "sse": True}),
+            (
+                "create_lobby",
+                {"peer_id": 1, "name": "L", "public": True, "player_limit": 2, "player": {}},
+            ),
+        ]
+        for name, args in ops:
+            apply(router, name, args, bus.ROUTER)
+            apply(replica, name, args, 1)
+
+        code = ops[2][1]["code"]
+        for state in (router, replica):
+            apply(state, "join_lobby", {"peer_id": 2, "code": code, "player": {}}, 1)
+        assert list(replica.sessions) == list(router.sessions) == [code]
+        assert replica.sessions[code].player_count == 2
+
+        # Only the home worker holds the peer's queue
+        assert replica.lobby_peers[2].sse_queue is not None
+        assert replica.lobby_peers[1].sse_queue is None
+        assert router.lobby_peers[2].sse_queue is None
+
+    def test_router_rejects_stale_ops(self) -> None:
+        router = Router()
+        writer = Writer()
+        sent = writer.sent
+        router.workers[0] = cast(asyncio.StreamWriter, writer)
+
+        def handle(request_id: int, name: str, args: dict[str, Any]) -> tuple[Any, ...]:
+            router._handle(0, ("op", request_id, name, args))  # pyright: ignore[reportPrivateUsage]
+            return marshal.loads(sent.pop()[bus.HEADER.size :])
+
+        for request_id in (1, 2, 3):
+            handle(request_id, "connect", {"peer_id": 0, "home": 0, "sse": True})
+        create = handle(
+            4,
+            "create_lobby",
+            {"peer_id": 1, "name": "L", "public": True, "player_limit": 2, "player": {}},
+        )
+        code = create[4]["code"]
+        assert handle(5, "join_lobby", {"peer_id": 2, "code": code, "player": {}})[0] == "applied"
+
+        # A join the submitting worker could not see was too late
+        full = handle(6, "join_lobby", {"peer_id": 3, "code": code, "player": {}})
+        assert full == ("rejected", 6, "LOBBY_FULL", "Lobby is full", 400)
+        taken = handle(7, "connect", {"peer_id": 2, "home": 0, "sse": True})
+        assert taken[:3] == ("rejected", 7, "PEER_ID_IN_USE")
+        assert router.state.sessions[code].player_count == 2
+
+    def test_router_drops_stuck_worker(self) -> None:
+        router = Router()
+        stuck, reading = Writer(), Writer()
+        router.workers = {
+            0: cast(asyncio.StreamWriter, stuck),
+            1: cast(asyncio.StreamWriter, reading),
+        }
+        with patch.object(router_module, "CONFIG", replace(CONFIG, bus_buffer_max_bytes=200)):
+            for request_id in range(1, 6):
+                router._handle(  # pyright: ignore[reportPrivateUsage]
+                    1, ("op", request_id, "connect", {"peer_id": 0, "home": 1, "sse": True})
+                )
+                reading.sent.clear()  # Worker 1 keeps up
+
+        assert stuck.aborted and not reading.aborted
+        assert list(router.workers) == [1]
+        assert len(router.state.lobby_peers) == 5
+
+    def test_failed_apply_stops_replica(self) -> None:
+        link = bus.BusLink(1, {})
+        bus.link = link
+        self.addCleanup(setattr, bus, "link", None)
+        worker_state.clear_all()
+
+        # An op the router accepted but this replica cannot apply
+        on_applied(0, 1, "join_lobby", {"peer_id": 7, "code": "GONE", "player": {}})
+        assert link.lost.is_set()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="needs SO_REUSEPORT")
+class TestTwoWorkers(IsolatedAsyncioTestCase):
+    """python server.py --workers 2, driven through each worker's internal socket."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.socket_dir = tempfile.mkdtemp(prefix="signaling-test-")
+        env = {**os.environ, "SERVER_SOCKET_DIR": cls.socket_dir, "LOG_LEVEL": "WARNING"}
+        cls.server = subprocess.Popen(
+            [sys.executable, "server.py", "--workers", "2", "--port", str(_free_port())],
+            cwd=SERVER_DIR,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 20
+        while not all(os.path.exists(bus.worker_socket(cls.socket_dir, i)) for i in range(2)):
+            if time.monotonic() > deadline or cls.server.poll() is not None:
+                cls.server.kill()
+                raise RuntimeError("Workers did not start")
+            time.sleep(0.05)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.terminate()
+        cls.server.wait(timeout=30)
+
+    async def asyncSetUp(self) -> None:
+        self.workers = [
+            aiohttp.ClientSession(
+                base_url="http://worker",
+                connector=aiohttp.UnixConnector(path=bus.worker_socket(self.socket_dir, i)),
+            )
+            for i in range(2)
+        ]
+
+    async def asyncTearDown(self) -> None:
+        for worker in self.workers:
+            await worker.close()
+
+    async def post(self, worker: int, path: str, body: dict[str, Any]) -> dict[str, Any]:
+        async with self.workers[worker].post(path, json=body) as resp:
+            return await resp.json()
+
+    async def connect(self, worker: int) -> int:
+        return (await self.post(worker, "/api/lobby/connect", {}))["peer_id"]
+
+    async def next_event(self, stream: aiohttp.ClientResponse) -> tuple[str, str]:
+        """Read SSE lines up to the next event; returns (event, data)."""
+        event = data = ""
+        while True:
+            line = (await asyncio.wait_for(stream.content.readline(), 5)).decode().strip()
+            if line.startswith("event: "):
+                event = line.removeprefix("event: ")
+            elif line.startswith("data: "):
+                data = line.removeprefix("data: ")
+            elif not line and event:
+                return event, data
+
+    async def test_broadcast_across_workers(self) -> None:
+        host, guest = await self.connect(0), await self.connect(1)
+        created = await self.post(0, "/api/lobby/create", {"peer_id": host, "name": "Cross"})
+        joined = await self.post(1, "/api/lobby/join", {"peer_id": guest, "code": created["code"]})
+        assert [p["id"] for p in joined["players"]] == [host, guest]
+
+        # Each stream is opened through the other worker and passed through to the peer's home
+        async with (
+            self.workers[1].get(f"/api/lobby/events?peer_id={host}") as host_events,
+            self.workers[0].get(f"/api/lobby/events?peer_id={guest}") as guest_events,
+        ):
+            assert (await self.next_event(host_events))[0] == "welcome"
+            assert (await self.next_event(guest_events))[0] == "welcome"
+            assert (await self.next_event(host_events))[0] == "peer_joined"
+
+            sent = await self.post(0, "/api/lobby/broadcast", {"peer_id": host, "packet": "aGk="})
+            assert sent["outcomes"] == {str(guest): "forwarded"}
+            assert await self.next_event(guest_events) == (
+                "game_packet",
+                f'{{"t":"game_packet","from":{host},"packet":"aGk="}}',
+            )
+
+            await self.post(1, "/api/lobby/broadcast", {"peer_id": guest, "packet": "eW8="})
+            event, data = await self.next_event(host_events)
+            assert event == "game_packet" and '"packet":"eW8="' in data
+
+    async def test_router_keeps_player_limit(self) -> None:
+        host = await self.connect(0)
+        created = await self.post(
+            0, "/api/lobby/create", {"peer_id": host, "name": "Pair", "player_limit": 2}
+        )
+        guests = [await self.connect(0), await self.connect(1)]
+        results = await asyncio.gather(
+            *(
+                self.post(worker, "/api/lobby/join", {"peer_id": guest, "code": created["code"]})
+                for worker, guest in enumerate(guests)
+            )
+        )
+        assert sorted(result["success"] for result in results) == [False, True]
+        assert [r["error"] for r in results if not r["success"]] == ["LOBBY_FULL"]
+
+    async def test_signaling_across_workers(self) -> None:
+        room = await self.post(0, "/session/host", {})
+        async with (
+            self.workers[0].ws_connect(f"/ws/{room['code']}") as first,
+            self.workers[1].ws_connect(f"/ws/{room['code']}") as second,
+        ):
+            first_id = (await first.receive_json(timeout=5))["id"]
+            init = await second.receive_json(timeout=5)
+            assert init["peers"] == [first_id]
+            assert (await first.receive_json(timeout=5))["peer_id"] == init["id"]
+
+            await second.send_json({"data_type": "offer", "to": first_id, "sdp": "x"})
+            offer = await first.receive_json(timeout=5)
+            assert offer["from"] == init["id"] and offer["sdp"] == "x"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
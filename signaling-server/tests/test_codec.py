@@ -0,0 +1,78 @@
+# pyright: strict
+
+"""
+Tests for the JSON codec and its backends.
+
+Run with: uv run pytest tests/ -v
+"""
+
+import importlib.util
+from typing import Any
+from unittest import TestCase
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import AioHTTPTestCase
+
+from server import codec
+from server.app import create_app
+from server.enums import ErrorCode, ResponseType
+from server.state import state
+
+BACKENDS = ["json"] + (["orjson"] if importlib.util.find_spec("orjson") else [])
+
+MESSAGES: list[Any] = [
+    {"t": ResponseType.PEER_JOINED, "peer_id": 7, "player": {"name": "Zoë", "color": [1, 0.5]}},
+    {"data_type": "candidate", "to": 2, "candidate": "candidate:1 1 UDP 2122252543 ...", "id": 0},
+    {"success": False, "error": ErrorCode.LOBBY_FULL, "nested": [None, True, -3, 1e-7]},
+]
+
+
+class TestBackends(TestCase):
+    """Every backend round-trips the same messages and behaves like stdlib json."""
+
+    def test_round_trip(self) -> None:
+        for name in BACKENDS:
+            selected, dumps, loads = codec._select(name)  # pyright: ignore[reportPrivateUsage]
+            assert selected == name
+            for message in MESSAGES:
+                encoded = dumps(message)
+                assert isinstance(encoded, bytes)
+                assert b", " not in encoded and b'": ' not in encoded  # Compact
+                assert loads(encoded) == message
+                assert loads(encoded.decode()) == message
+
+    def test_integer_keys_become_strings(self) -> None:
+        for name in BACKENDS:
+            _, dumps, loads = codec._select(name)  # pyright: ignore[reportPrivateUsage]
+            assert loads(dumps({3: "queued"})) == {"3": "queued"}
+
+    def test_decode_errors(self) -> None:
+        for name in BACKENDS:
+            _, _, loads = codec._select(name)  # pyright: ignore[reportPrivateUsage]
+            for bad in (b"", b"{", "not json"):
+                with pytest.raises(codec.JSONDecodeError):
+                    loads(bad)
+
+    def test_unknown_backend_falls_back(self) -> None:
+        assert codec._select("simdjson")[0] == "json"  # pyright: ignore[reportPrivateUsage]
+
+
+class TestHttpUsesCodec(AioHTTPTestCase):
+    """Requests are decoded and responses encoded by the selected backend."""
+
+    async def get_application(self) -> web.Application:
+        state.clear_all()
+        return create_app()
+
+    async def test_connect_and_bad_body(self) -> None:
+        resp = await self.client.post("/api/lobby/connect", data=b"{}")
+        assert resp.content_type == "application/json"
+        assert codec.loads(await resp.read())["success"] is True
+
+        resp = await self.client.post("/api/lobby/create", data=b"{not json")
+        assert resp.status == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
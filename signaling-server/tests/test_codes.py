@@ -0,0 +1,127 @@
+# pyright: strict
+
+"""
+Tests for the lobby/room code allocator.
+
+Run with: uv run pytest tests/ -v
+"""
+
+from dataclasses import replace
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+
+from server import state as state_module
+from server.codes import CodeAllocator
+from server.config import CONFIG
+from server.models import Peer
+from server.state import State
+
+ALPHABET = "ABCD"
+
+
+class TestCodeAllocator(TestCase):
+    """Allocation, release and expansion over a 4-letter alphabet."""
+
+    def test_fills_space_without_repeats(self) -> None:
+        codes = CodeAllocator(ALPHABET, 2, max_occupancy=1.0)
+        allocated = {codes.allocate() for _ in range(16)}
+        assert len(allocated) == 16
+        assert all(len(code) == 2 for code in allocated)
+        assert codes.occupancy == 1.0
+
+    def test_released_codes_are_reused_oldest_first(self) -> None:
+        codes = CodeAllocator(ALPHABET, 2, max_occupancy=1.0)
+        allocated = [codes.allocate() for _ in range(16)]
+        codes.release(allocated[5])
+        codes.release(allocated[2])
+        assert allocated[5] not in codes
+        assert codes.allocate() == allocated[5]
+        assert codes.allocate() == allocated[2]
+        assert len(codes) == 16
+
+    def test_release_of_unused_code_is_ignored(self) -> None:
+        codes = CodeAllocator(ALPHABET, 2, max_occupancy=1.0)
+        code = codes.allocate()
+        codes.release(code)
+        codes.release(code)
+        codes.release("ZZ")
+        assert len(codes) == 0
+        assert codes.allocate() != code  # the counter still has fresh codes
+
+    def test_claimed_code_is_skipped(self) -> None:
+        codes = CodeAllocator(ALPHABET, 2, max_occupancy=1.0)
+        assert codes.claim("AB")
+        assert not codes.claim("AB")
+        allocated = [codes.allocate() for _ in range(15)]
+        assert "AB" not in allocated
+        assert codes.length == 2
+
+    def test_reserved_code_is_never_allocated(self) -> None:
+        codes = CodeAllocator(ALPHABET, 2, max_occupancy=1.0, reserved=["AB"])
+        allocated = [codes.allocate() for _ in range(15)]
+        assert "AB" not in allocated and codes.length == 2
+        assert len(codes.allocate()) == 3  # The reserved code counts as used
+
+        assert codes.claim("AB")
+        codes.release("AB")
+        codes.release(allocated[0])
+        assert codes.claim("AB")  # Released reserved codes stay out of the free list
+        assert codes.allocate() != "AB"
+
+    def test_expands_at_occupancy_threshold(self) -> None:
+        codes = CodeAllocator(ALPHABET, 2, max_occupancy=0.75)
+        short = [codes.allocate() for _ in range(12)]
+        assert codes.length == 2
+        assert len(codes.allocate()) == 3
+        assert codes.length == 3
+
+        # Short codes stay valid and can be released after the switch
+        codes.release(short[0])
+        assert short[0] not in codes
+        assert len(codes) == 12
+
+
+class TestStateCodes(TestCase):
+    """Codes are returned to the allocator when lobbies and rooms go away."""
+
+    def test_lobby_and_room_release(self) -> None:
+        state = State()
+        lobby = state.create_lobby("Lobby", Peer(peer_id=1))
+        room = state.create_room()
+        assert lobby.code in state.codes and room.code in state.codes
+
+        state.remove_session(lobby.code)
+        state.remove_session(room.code)
+        assert len(state.codes) == 0
+
+    def test_debug_room_claims_test_code(self) -> None:
+        state = State()
+        state.create_room(is_debug=True)
+        assert "TEST" in state.codes
+        state.remove_session("TEST")
+        assert "TEST" not in state.codes
+
+    def test_test_code_is_reserved(self) -> None:
+        """Lobbies never get the debug room's code, so is_debug cannot join a stranger's."""
+        small = replace(
+            CONFIG, room_code_chars="TES", room_code_length=4, room_code_max_occupancy=1.0
+        )
+        with patch.object(state_module, "CONFIG", small):
+            state = State()
+        codes = [state.create_lobby("Lobby", Peer(peer_id=i)).code for i in range(1, 81)]
+        assert "TEST" not in codes and all(len(code) == 4 for code in codes)
+
+        debug = state.create_room(is_debug=True)
+        assert debug.code == "TEST" and not debug.is_lobby
+
+    def test_claiming_a_taken_code_raises(self) -> None:
+        state = State()
+        room = state.create_room()
+        with pytest.raises(ValueError):
+            state.create_room(code=room.code)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
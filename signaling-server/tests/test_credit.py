@@ -0,0 +1,154 @@
+# pyright: strict
+
+"""
+Tests for credit windows, acknowledgements and backlog reporting.
+
+Run with: uv run pytest tests/ -v
+"""
+
+from dataclasses import replace
+from typing import Any
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import AioHTTPTestCase
+
+from server import credit
+from server.app import create_app
+from server.config import CONFIG
+from server.credit import CreditWindow
+from server.frames import EncodedMessage
+from server.state import state
+
+
+class TestCreditWindow(TestCase):
+    """Acknowledgements are cumulative and release the acknowledged bytes."""
+
+    def test_sent_and_ack(self) -> None:
+        window = CreditWindow()
+        messages = [EncodedMessage.encode({"t": "game_packet", "n": n}) for n in range(3)]
+        for message in messages:
+            window.sent(message)
+        assert window.events == 3
+        assert window.bytes == sum(len(m.sse) for m in messages)
+
+        assert window.ack(messages[1].seq) == 2
+        assert window.to_dict() == {"events": 1, "bytes": len(messages[2].sse)}
+        assert window.ack(messages[1].seq) == 0  # Already acknowledged
+        assert window.ack(messages[2].seq + 100) == 1
+        assert window.to_dict() == {"events": 0, "bytes": 0}
+
+    def test_congested(self) -> None:
+        window = CreditWindow()
+        message = EncodedMessage.encode({"t": "game_packet"})
+        with patch.object(credit, "CONFIG", replace(CONFIG, credit_window_events=2)):
+            window.sent(message)
+            assert not window.congested
+            window.sent(message)
+            assert window.congested
+        with patch.object(
+            credit, "CONFIG", replace(CONFIG, credit_window_events=0, credit_window_bytes=0)
+        ):
+            assert not window.congested
+
+
+class TestBacklogReporting(AioHTTPTestCase):
+    """Senders see the backlog of recipients that acknowledge what they read."""
+
+    async def get_application(self) -> web.Application:
+        state.clear_all()
+        return create_app()
+
+    async def connect(self) -> int:
+        resp = await self.client.request("POST", "/api/lobby/connect", json={})
+        return (await resp.json())["peer_id"]
+
+    async def lobby_pair(self) -> tuple[int, int]:
+        """Create a lobby with a host and one joined client."""
+        host_id = await self.connect()
+        client_id = await self.connect()
+        resp = await self.client.request(
+            "POST", "/api/lobby/create", json={"peer_id": host_id, "name": "Credit"}
+        )
+        code = (await resp.json())["code"]
+        await self.client.request(
+            "POST", "/api/lobby/join", json={"peer_id": client_id, "code": code}
+        )
+        return host_id, client_id
+
+    async def send(self, sender_id: int, packet: str) -> dict[str, Any]:
+        resp = await self.client.request(
+            "POST", "/api/lobby/broadcast", json={"peer_id": sender_id, "packet": packet}
+        )
+        return await resp.json()
+
+    async def ack(self, peer_id: int, cursor: Any) -> Any:
+        resp = await self.client.request(
+            "POST", "/api/lobby/ack", json={"peer_id": peer_id, "cursor": cursor}
+        )
+        return resp.status, await resp.json()
+
+    async def test_untracked_until_first_ack(self) -> None:
+        host_id, client_id = await self.lobby_pair()
+        body = await self.send(host_id, "AA")
+        assert body["backlog"] == {} and body["congested"] == []
+
+        status, body = await self.ack(client_id, 0)
+        assert status == 200
+        assert body == {
+            "success": True,
+            "acked": 0,
+            "backlog": {"events": 0, "bytes": 0},
+            "congested": False,
+        }
+        body = await self.send(host_id, "BB")
+        assert body["backlog"][str(client_id)]["events"] == 1
+
+    async def test_ack_releases_backlog(self) -> None:
+        host_id, client_id = await self.lobby_pair()
+        await self.ack(client_id, 0)
+        for packet in ("AA", "BB"):
+            body = await self.send(host_id, packet)
+        assert body["backlog"][str(client_id)]["events"] == 2
+
+        resp = await self.client.request("GET", f"/api/lobby/poll?peer_id={client_id}&timeout=0")
+        events = (await resp.json())["events"]
+        status, body = await self.ack(client_id, events[0]["id"])
+        assert status == 200 and body["acked"] == 1 and body["backlog"]["events"] == 1
+
+    async def test_poll_cursor_acknowledges(self) -> None:
+        host_id, client_id = await self.lobby_pair()
+        resp = await self.client.request("GET", f"/api/lobby/poll?peer_id={client_id}&timeout=0")
+        cursor = (await resp.json())["cursor"]
+        await self.client.request(
+            "GET", f"/api/lobby/poll?peer_id={client_id}&cursor={cursor}&timeout=0"
+        )
+
+        with patch.object(credit, "CONFIG", replace(CONFIG, credit_window_events=2)):
+            assert (await self.send(host_id, "AA"))["congested"] == []
+            body = await self.send(host_id, "BB")
+        assert body["congested"] == [client_id]
+
+        resp = await self.client.request(
+            "GET", f"/api/lobby/poll?peer_id={client_id}&cursor={cursor}&timeout=0"
+        )
+        cursor = (await resp.json())["cursor"]
+        await self.client.request(
+            "GET", f"/api/lobby/poll?peer_id={client_id}&cursor={cursor}&timeout=0"
+        )
+        body = await self.send(host_id, "CC")
+        assert body["backlog"][str(client_id)]["events"] == 1
+
+    async def test_bad_acks(self) -> None:
+        _, client_id = await self.lobby_pair()
+        for cursor in (None, "7", -1, True):
+            status, _ = await self.ack(client_id, cursor)
+            assert status == 400
+        status, _ = await self.ack(999, 0)
+        assert status == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
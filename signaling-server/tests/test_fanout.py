@@ -0,0 +1,281 @@
+# pyright: strict
+
+"""
+Tests for the concurrent fan-out engine.
+
+Run with: uv run pytest tests/ -v
+"""
+
+import asyncio
+import json
+from typing import Any, cast
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+import pytest
+from aiohttp import WSMsgType, web
+from aiohttp.test_utils import AioHTTPTestCase
+
+from server.app import create_app
+from server.config import CONFIG
+from server.enums import DeliveryStatus, SSEEventType
+from server.fanout import fan_out
+from server.lobby_handlers import packet_targets, valid_packet_target
+from server.models import Peer, Session
+from server.peer_queue import PeerQueue
+from server.state import state
+
+
+class FakeWebSocket:
+    """Minimal stand-in for web.WebSocketResponse with a configurable send delay."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.closed = False
+        self.sent: list[bytes] = []
+
+    async def send_frame(self, message: bytes, opcode: WSMsgType) -> None:
+        await asyncio.sleep(self.delay)
+        assert opcode == WSMsgType.TEXT
+        self.sent.append(message)
+
+    async def close(self, **_kwargs: Any) -> None:
+        self.closed = True
+
+
+def ws_peer(peer_id: int, delay: float = 0.0) -> Peer:
+    return Peer(peer_id=peer_id, ws=cast(web.WebSocketResponse, FakeWebSocket(delay)))
+
+
+class TestFanOut(IsolatedAsyncioTestCase):
+    """Tests for fan_out()."""
+
+    async def test_reports_per_target_outcomes(self) -> None:
+        """WS peers are delivered, SSE peers queued, transport-less peers failed."""
+        sse_peer = Peer(peer_id=2, sse_queue=PeerQueue())
+        report = await fan_out([ws_peer(1), sse_peer, Peer(peer_id=3)], {"t": "x"})
+
+        assert report.outcomes == {
+            1: DeliveryStatus.DELIVERED,
+            2: DeliveryStatus.QUEUED,
+            3: DeliveryStatus.FAILED,
+        }
+        assert sorted(report.delivered_to) == [1, 2]
+
+    async def test_message_encoded_once_for_all_targets(self) -> None:
+        """Every recipient gets the very same pre-encoded bytes."""
+        sse_peers = [Peer(peer_id=i, sse_queue=PeerQueue()) for i in range(1, 4)]
+        ws_peers = [ws_peer(i) for i in range(4, 6)]
+        await fan_out([*sse_peers, *ws_peers], {"t": "game_packet", "packet": "AA"})
+
+        frames = [p.sse_queue.get_nowait() for p in sse_peers if p.sse_queue]
+        assert all(frame is frames[0] for frame in frames)
+        assert frames[0].sse.startswith(b"id: %d\nevent: game_packet\ndata: " % frames[0].seq)
+
+        sent = [cast(FakeWebSocket, p.ws).sent[0] for p in ws_peers]
+        assert all(data is frames[0].data for data in sent)
+        assert json.loads(sent[0]) == {"t": "game_packet", "packet": "AA"}
+
+    async def test_stalled_peer_does_not_block_others(self) -> None:
+        """A stalled WS peer times out while the rest are delivered within the deadline."""
+        stalled = ws_peer(1, delay=5.0)
+        fast = [ws_peer(i) for i in range(2, 17)]
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        report = await fan_out([stalled, *fast], {"t": "x"}, deadline=0.05)
+        elapsed = loop.time() - start
+
+        assert elapsed < 1.0
+        assert report.outcomes[1] == DeliveryStatus.TIMED_OUT
+        assert all(report.outcomes[p.peer_id] == DeliveryStatus.DELIVERED for p in fast)
+        assert stalled.slow_strikes == 1
+
+    async def test_slow_peer_dropped_after_strikes(self) -> None:
+        """A peer that keeps missing the deadline gets its WebSocket closed."""
+        stalled = ws_peer(1, delay=5.0)
+        for _ in range(CONFIG.slow_peer_strikes):
+            await fan_out([stalled], {"t": "x"}, deadline=0.01)
+        await asyncio.sleep(0)
+
+        assert stalled.ws is not None
+        assert stalled.ws.closed
+
+
+class TestPacketTargets(TestCase):
+    """Tests for packet_targets() target resolution."""
+
+    def setUp(self) -> None:
+        self.lobby = Session.create_lobby("ABCD", "Targets", Peer(peer_id=1))
+        for peer_id in range(2, 7):
+            self.lobby.add_peer(Peer(peer_id=peer_id))
+
+    def ids(self, peers: list[Peer]) -> list[int]:
+        return [peer.peer_id for peer in peers]
+
+    def test_everyone_but_sender(self) -> None:
+        assert self.ids(packet_targets(self.lobby, 1)) == [2, 3, 4, 5, 6]
+
+    def test_single_peer(self) -> None:
+        assert self.ids(packet_targets(self.lobby, 1, 4)) == [4]
+        assert self.ids(packet_targets(self.lobby, 1, 99)) == []
+
+    def test_multicast_list(self) -> None:
+        assert self.ids(packet_targets(self.lobby, 1, [5, 3, 99])) == [3, 5]
+
+    def test_exclusion_list(self) -> None:
+        assert self.ids(packet_targets(self.lobby, 1, -1, exclude=[2, 6])) == [3, 4, 5]
+        assert self.ids(packet_targets(self.lobby, 1, [2, 3], exclude=[2])) == [3]
+
+    def test_malformed_targets_rejected(self) -> None:
+        assert valid_packet_target(-1, None) and valid_packet_target([2, 3], [4])
+        for target, exclude in ((None, None), ("2", None), ([2, "3"], None), (True, None)):
+            assert not valid_packet_target(target, exclude)
+        for exclude in (4, "4", [None], {"4": 1}):
+            assert not valid_packet_target(-1, exclude)
+
+
+class TestHttpBroadcast(AioHTTPTestCase):
+    """Tests for POST /api/lobby/broadcast."""
+
+    async def get_application(self) -> web.Application:
+        state.clear_all()
+        return create_app()
+
+    async def connect(self) -> int:
+        resp = await self.client.request("POST", "/api/lobby/connect", json={})
+        data = await resp.json()
+        return data["peer_id"]
+
+    async def lobby_pair(self) -> tuple[int, int]:
+        """Create a lobby with a host and one joined client."""
+        host_id = await self.connect()
+        client_id = await self.connect()
+
+        resp = await self.client.request(
+            "POST", "/api/lobby/create", json={"peer_id": host_id, "name": "Fanout"}
+        )
+        code = (await resp.json())["code"]
+        await self.client.request(
+            "POST", "/api/lobby/join", json={"peer_id": client_id, "code": code}
+        )
+        return host_id, client_id
+
+    async def test_broadcast_reports_outcomes(self) -> None:
+        """Broadcast should queue the packet for every other peer and report it."""
+        host_id, client_id = await self.lobby_pair()
+
+        resp = await self.client.request(
+            "POST", "/api/lobby/broadcast", json={"peer_id": host_id, "packet": "AAEC"}
+        )
+        data = await resp.json()
+
+        assert data["delivered_to"] == [client_id]
+        assert data["outcomes"] == {str(client_id): DeliveryStatus.QUEUED}
+
+        client = state.get_lobby_peer(client_id)
+        assert client is not None and client.sse_queue is not None
+        encoded = client.sse_queue.get_nowait()
+        assert encoded.event == SSEEventType.GAME_PACKET
+        assert json.loads(encoded.data)["packet"] == "AAEC"
+
+    async def test_raw_broadcast_matches_json_event(self) -> None:
+        """A raw binary body arrives as the same base64 game_packet event."""
+        host_id, client_id = await self.lobby_pair()
+
+        resp = await self.client.request(
+            "POST",
+            "/api/lobby/broadcast/raw",
+            data=b"\x00\x01\x02",
+            headers={"Content-Type": "application/octet-stream", "X-Peer-Id": str(host_id)},
+        )
+        data = await resp.json()
+        assert data["delivered_to"] == [client_id]
+
+        client = state.get_lobby_peer(client_id)
+        assert client is not None and client.sse_queue is not None
+        encoded = client.sse_queue.get_nowait()
+        assert encoded.event == SSEEventType.GAME_PACKET
+        assert json.loads(encoded.data) == {
+            "t": SSEEventType.GAME_PACKET,
+            "from": host_id,
+            "packet": "AAEC",
+        }
+
+    async def test_batch_broadcast_preserves_order(self) -> None:
+        """A batch is delivered in order and reported per entry."""
+        host_id, client_id = await self.lobby_pair()
+
+        resp = await self.client.request(
+            "POST",
+            "/api/lobby/broadcast/batch",
+            json={
+                "peer_id": host_id,
+                "packets": [
+                    {"packet": "AA"},
+                    {"packet": "BB", "target": client_id},
+                    {"packet": "CC", "target": 999},
+                ],
+            },
+        )
+        data = await resp.json()
+
+        assert data["count"] == 3
+        assert data["outcomes"] == {str(client_id): DeliveryStatus.QUEUED}
+        assert data["entries"] == [[client_id], [client_id], []]
+
+        client = state.get_lobby_peer(client_id)
+        assert client is not None and client.sse_queue is not None
+        packets = [json.loads(m.data)["packet"] for m in client.sse_queue.drain(10, 1 << 20)]
+        assert packets == ["AA", "BB"]
+
+    async def test_multicast_target_list(self) -> None:
+        """A list target reaches exactly the listed lobby members."""
+        host_id, client_id = await self.lobby_pair()
+        third_id = await self.connect()
+        host = state.get_lobby_peer(host_id)
+        assert host is not None and host.lobby_code is not None
+        await self.client.request(
+            "POST", "/api/lobby/join", json={"peer_id": third_id, "code": host.lobby_code}
+        )
+
+        resp = await self.client.request(
+            "POST",
+            "/api/lobby/broadcast",
+            json={"peer_id": host_id, "packet": "AA", "target": [client_id, third_id]},
+        )
+        assert sorted((await resp.json())["delivered_to"]) == sorted([client_id, third_id])
+
+        resp = await self.client.request(
+            "POST",
+            f"/api/lobby/broadcast/raw?peer_id={host_id}&exclude={client_id}",
+            data=b"\x00",
+        )
+        assert (await resp.json())["delivered_to"] == [third_id]
+
+    async def test_malformed_target_is_bad_request(self) -> None:
+        host_id, _ = await self.lobby_pair()
+        for extra in ({"exclude": 4}, {"target": None}, {"target": [1, "2"]}):
+            resp = await self.client.request(
+                "POST",
+                "/api/lobby/broadcast",
+                json={"peer_id": host_id, "packet": "AA", **extra},
+            )
+            assert resp.status == 400
+            assert (await resp.json())["error"] == "INVALID_REQUEST"
+
+        for entry in ({"packet": "AA", "exclude": 4}, "AA"):
+            resp = await self.client.request(
+                "POST",
+                "/api/lobby/broadcast/batch",
+                json={"peer_id": host_id, "packets": [{"packet": "AA"}, entry]},
+            )
+            assert resp.status == 400
+            assert (await resp.json())["error"] == "INVALID_REQUEST"
+
+    async def test_raw_broadcast_requires_peer_id(self) -> None:
+        resp = await self.client.request("POST", "/api/lobby/broadcast/raw", data=b"\x00")
+        assert resp.status == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
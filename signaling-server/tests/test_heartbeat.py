@@ -0,0 +1,123 @@
+# pyright: strict
+
+"""
+Tests for the shared SSE heartbeat ticker.
+
+Run with: uv run pytest tests/ -v
+"""
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import AioHTTPTestCase
+
+from server.app import create_app
+from server.frames import EncodedMessage
+from server.heartbeat import SUBTICKS, HeartbeatTicker, heartbeats
+from server.metrics import metrics
+from server.peer_queue import PeerQueue, PeerQueueIdle
+from server.state import state
+
+
+class TestHeartbeatTicker(IsolatedAsyncioTestCase):
+    """Only streams idle for a full interval are woken, all with the same frame."""
+
+    async def test_wakes_idle_streams_only(self) -> None:
+        ticker = HeartbeatTicker(interval=15.0)
+        idle, busy = PeerQueue(), PeerQueue()
+        ticker.add(idle)
+        ticker.add(busy)
+
+        for _ in range(2):
+            waiting = asyncio.ensure_future(idle.get())
+            await asyncio.sleep(0)
+            for _ in range(SUBTICKS):
+                assert ticker.advance() == 0
+                ticker.touch(busy)
+            assert ticker.advance() == 1  # A full interval of ticks after the last write
+            with pytest.raises(PeerQueueIdle):
+                await waiting
+
+        ticker.remove(idle)
+        ticker.remove(busy)
+        assert len(ticker) == 0
+
+    async def test_stream_not_waiting_is_not_counted(self) -> None:
+        ticker = HeartbeatTicker(interval=15.0)
+        ticker.add(PeerQueue())  # Its stream is busy writing, not waiting on the queue
+        assert [ticker.advance() for _ in range(SUBTICKS + 1)] == [0] * (SUBTICKS + 1)
+
+    async def test_ticks_check_due_streams_only(self) -> None:
+        ticker = HeartbeatTicker(interval=15.0)
+        queues = [PeerQueue() for _ in range(3)]
+        for queue in queues:
+            ticker.add(queue)
+            ticker.advance()
+        wheel = ticker._wheel  # pyright: ignore[reportPrivateUsage]
+
+        # Each stream sits in one slot, however often it writes
+        for _ in range(SUBTICKS * 4):
+            ticker.advance()
+            for queue in queues:
+                ticker.touch(queue)
+            assert sum(len(slot) for slot in wheel.values()) == len(queues)
+            assert len(wheel) == len(queues)
+
+        # A removed and re-added stream is checked only at its new slot
+        ticker.remove(queues[0])
+        ticker.add(queues[0])
+        assert sum(len(slot) for slot in wheel.values()) == len(queues) + 1
+        for _ in range(SUBTICKS + 1):
+            ticker.advance()
+        assert sum(len(slot) for slot in wheel.values()) == len(queues)
+
+    async def test_interrupt_keeps_messages(self) -> None:
+        queue = PeerQueue()
+        waiting = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0)
+        queue.interrupt()
+        queue.put_nowait(EncodedMessage.encode({"t": "game_packet"}))
+        with pytest.raises(PeerQueueIdle):
+            await waiting
+        assert (await queue.get()).data == b'{"t":"game_packet"}'
+
+        # Nothing waiting: nothing to interrupt
+        queue.interrupt()
+        queue.put_nowait(EncodedMessage.encode({"t": "game_packet"}))
+        assert await queue.get()
+
+
+class TestStreamHeartbeat(AioHTTPTestCase):
+    """An idle event stream writes the ticker's shared heartbeat frame."""
+
+    async def get_application(self) -> web.Application:
+        state.clear_all()
+        return create_app()
+
+    async def test_idle_stream_gets_shared_frame(self) -> None:
+        resp = await self.client.post("/api/lobby/connect", json={})
+        peer_id = (await resp.json())["peer_id"]
+
+        async with self.client.get(f"/api/lobby/events?peer_id={peer_id}") as events:
+            assert (await events.content.readuntil(b"\n\n")).startswith(b"event: welcome")
+            while not heartbeats:
+                await asyncio.sleep(0)
+            before = metrics.sse_heartbeats
+            for _ in range(SUBTICKS + 1):
+                heartbeats.advance()
+            frame = await asyncio.wait_for(events.content.readuntil(b"\n\n"), 2)
+            assert frame == heartbeats.frame
+            assert metrics.sse_heartbeats == before + 1
+            assert frame.startswith(b'event: heartbeat\ndata: {"ts":')
+
+        for _ in range(10):
+            if not heartbeats:
+                break
+            await asyncio.sleep(0.01)
+        assert len(heartbeats) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -6,11 +6,18 @@ Tests for HTTP endpoints.
 Run with: uv run pytest tests/ -v
 """
 
+import asyncio
+import re
+from dataclasses import replace
+from unittest.mock import patch
+
 import pytest
 from aiohttp import web
 from aiohttp.test_utils import AioHTTPTestCase
 
+from server import http_lobby_handlers
 from server.app import create_app
+from server.config import CONFIG
 from server.enums import ErrorCode
 from server.state import state
 
@@ -184,6 +191,73 @@ class TestLobbiesEndpoint(AioHTTPTestCase):
         assert len(data["lobbies"]) == 1
         assert data["lobbies"][0]["Name"] == "PublicLobby"
 
+    async def connect(self) -> int:
+        resp = await self.client.request("POST", "/api/lobby/connect", json={})
+        return (await resp.json())["peer_id"]
+
+    async def test_lobby_list_tracks_changes(self) -> None:
+        """Both list formats follow create, join, leave and close."""
+        host_id = await self.connect()
+        guest_id = await self.connect()
+        resp = await self.client.request(
+            "POST", "/api/lobby/create", json={"peer_id": host_id, "name": "Indexed"}
+        )
+        code = (await resp.json())["code"]
+        await self.client.request(
+            "POST",
+            "/api/lobby/create",
+            json={"peer_id": guest_id, "name": "Hidden", "public": False},
+        )
+
+        data = await (await self.client.request("GET", "/api/lobby/list")).json()
+        assert [(item["code"], item["players"]) for item in data["lobbies"]] == [(code, 1)]
+
+        await self.client.request("POST", "/api/lobby/leave", json={"peer_id": guest_id})
+        await self.client.request(
+            "POST", "/api/lobby/join", json={"peer_id": guest_id, "code": code}
+        )
+        data = await (await self.client.request("GET", "/lobbies")).json()
+        assert [(item["Code"], item["PlayerCount"]) for item in data["lobbies"]] == [(code, 2)]
+
+        await self.client.request("POST", "/api/lobby/leave", json={"peer_id": host_id})
+        data = await (await self.client.request("GET", "/api/lobby/list")).json()
+        assert data["lobbies"] == []
+
+    async def test_unchanged_list_is_served_from_cache(self) -> None:
+        """Polls without changes reuse the same serialized payload."""
+        host_id = await self.connect()
+        await self.client.request(
+            "POST", "/api/lobby/create", json={"peer_id": host_id, "name": "Cached"}
+        )
+        first = await (await self.client.request("GET", "/api/lobby/list")).read()
+        version = state.lobby_list_version
+        second = await (await self.client.request("GET", "/api/lobby/list")).read()
+
+        assert first == second
+        assert state.lobby_list_version == version
+        assert state.lobby_list_payload("list", lambda _: b"stale") == first
+
+    async def test_conditional_lobby_list(self) -> None:
+        """A matching If-None-Match gets a 304 until the list changes."""
+        host_id = await self.connect()
+        resp = await self.client.request("GET", "/api/lobby/list")
+        etag = resp.headers["ETag"]
+        assert resp.headers["Access-Control-Expose-Headers"] == "ETag"
+
+        resp = await self.client.request(
+            "GET", "/api/lobby/list", headers={"If-None-Match": f'W/"x", {etag}'}
+        )
+        assert resp.status == 304
+        assert await resp.read() == b""
+
+        await self.client.request(
+            "POST", "/api/lobby/create", json={"peer_id": host_id, "name": "Changed"}
+        )
+        resp = await self.client.request("GET", "/api/lobby/list", headers={"If-None-Match": etag})
+        assert resp.status == 200
+        assert resp.headers["ETag"] != etag
+        assert len((await resp.json())["lobbies"]) == 1
+
 
 class TestRoomsEndpoint(AioHTTPTestCase):
     """Tests for /rooms endpoint (debug)."""
@@ -204,6 +278,19 @@ class TestRoomsEndpoint(AioHTTPTestCase):
         data = await resp.json()
         assert len(data["rooms"]) == 2
 
+    async def test_rooms_not_modified(self) -> None:
+        """/rooms answers 304 until a room changes."""
+        resp = await self.client.request("GET", "/rooms")
+        etag = resp.headers["ETag"]
+
+        resp = await self.client.request("GET", "/rooms", headers={"If-None-Match": etag})
+        assert resp.status == 304
+
+        await self.client.request("POST", "/session/host", json={"lobby_name": "NewRoom"})
+        resp = await self.client.request("GET", "/rooms", headers={"If-None-Match": etag})
+        assert resp.status == 200
+        assert len((await resp.json())["rooms"]) == 1
+
 
 class TestPlayerCountEndpoint(AioHTTPTestCase):
     """Tests for /session/players endpoint."""
@@ -255,6 +342,106 @@ class TestUpdateEndpoint(AioHTTPTestCase):
         assert data["lobby_name"] == "NewName"
         assert data["public"] is False
 
+    async def test_update_lobby_reindexes_list(self) -> None:
+        """Updating a lobby through /session/update changes the lobby list and its ETag."""
+        resp = await self.client.request("POST", "/api/lobby/connect", json={})
+        host_id = (await resp.json())["peer_id"]
+        resp = await self.client.request(
+            "POST",
+            "/api/lobby/create",
+            json={"peer_id": host_id, "name": "Alpha", "player_limit": 4},
+        )
+        code = (await resp.json())["code"]
+        etag = (await self.client.request("GET", "/api/lobby/list")).headers["ETag"]
+
+        await self.client.request(
+            "POST", f"/session/update/{code}", json={"lobby_name": "Beta", "player_limit": 8}
+        )
+        resp = await self.client.request("GET", "/api/lobby/list", headers={"If-None-Match": etag})
+        assert resp.status == 200
+        etag = resp.headers["ETag"]
+        [listed] = (await resp.json())["lobbies"]
+        assert listed["name"] == "Beta" and listed["player_limit"] == 8
+        resp = await self.client.request("GET", "/api/lobby/list?name=be")
+        assert [lobby["code"] for lobby in (await resp.json())["lobbies"]] == [code]
+        resp = await self.client.request("GET", "/api/lobby/list?name=al")
+        assert (await resp.json())["lobbies"] == []
+
+        await self.client.request("POST", f"/session/update/{code}", json={"public": False})
+        resp = await self.client.request("GET", "/api/lobby/list", headers={"If-None-Match": etag})
+        assert resp.status == 200
+        assert (await resp.json())["lobbies"] == []
+        assert code not in state.public_lobbies
+
+
+class TestEventStreamWrites(AioHTTPTestCase):
+    """Events queued before the stream attaches are flushed together, in order."""
+
+    async def get_application(self) -> web.Application:
+        state.clear_all()
+        return create_app()
+
+    async def queue_packets(self, count: int) -> int:
+        """Queue `count` game packets for a peer that has not opened its stream; returns its ID."""
+        ids: list[int] = []
+        for _ in range(2):
+            resp = await self.client.request("POST", "/api/lobby/connect", json={})
+            ids.append((await resp.json())["peer_id"])
+        host_id, client_id = ids
+        resp = await self.client.request(
+            "POST", "/api/lobby/create", json={"peer_id": host_id, "name": "Writes"}
+        )
+        code = (await resp.json())["code"]
+        await self.client.request(
+            "POST", "/api/lobby/join", json={"peer_id": client_id, "code": code}
+        )
+        for n in range(count):
+            await self.client.request(
+                "POST", "/api/lobby/broadcast", json={"peer_id": host_id, "packet": f"P{n}"}
+            )
+        return client_id
+
+    async def read_packets(self, peer_id: int, count: int) -> list[bytes]:
+        """Open the stream and return the writes that carried the first `count` game packets."""
+        writes: list[bytes] = []
+        write = web.StreamResponse.write
+
+        async def record(response: web.StreamResponse, data: bytes) -> None:
+            writes.append(bytes(data))
+            await write(response, data)
+
+        with patch.object(web.StreamResponse, "write", record):
+            stream = await self.client.request("GET", f"/api/lobby/events?peer_id={peer_id}")
+            body = b""
+            while body.count(b"event: game_packet") < count:
+                body += await asyncio.wait_for(stream.content.readuntil(b"\n\n"), 2)
+            stream.close()
+
+        frames = re.findall(rb"id: (\d+)\nevent: game_packet\ndata: [^\n]*\"(P\d+)\"", body)
+        ids = [int(seq) for seq, _ in frames]
+        assert [packet for _, packet in frames] == [b"P%d" % n for n in range(count)]
+        assert ids == sorted(ids) and len(set(ids)) == count
+        return [chunk for chunk in writes if b"game_packet" in chunk]
+
+    async def test_queued_events_share_one_write(self) -> None:
+        peer_id = await self.queue_packets(5)
+        [chunk] = await self.read_packets(peer_id, 5)
+        assert chunk.count(b"event: game_packet") == 5
+
+    async def test_write_batches_are_capped(self) -> None:
+        peer_id = await self.queue_packets(5)
+        with patch.object(http_lobby_handlers, "CONFIG", replace(CONFIG, sse_write_max_messages=2)):
+            chunks = await self.read_packets(peer_id, 5)
+        assert [chunk.count(b"event: game_packet") for chunk in chunks] == [2, 2, 1]
+
+        frame_size = len(chunks[2])
+        peer_id = await self.queue_packets(5)
+        with patch.object(
+            http_lobby_handlers, "CONFIG", replace(CONFIG, sse_write_max_bytes=frame_size * 3)
+        ):
+            chunks = await self.read_packets(peer_id, 5)
+        assert [chunk.count(b"event: game_packet") for chunk in chunks] == [3, 2]
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
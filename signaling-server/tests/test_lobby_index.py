@@ -0,0 +1,147 @@
+# pyright: strict
+
+"""
+Tests for lobby search: sorted indexes, filters and cursor pagination.
+
+Run with: uv run pytest tests/ -v
+"""
+
+from unittest import TestCase
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import AioHTTPTestCase
+
+from server.app import create_app
+from server.enums import LobbySort
+from server.lobby_index import LobbyQuery, parse_cursor
+from server.models import Peer, Session
+from server.state import State, state
+
+
+class TestLobbySearch(TestCase):
+    """Searches over a State with a handful of lobbies."""
+
+    def setUp(self) -> None:
+        self.state = State()
+        self.next_id = 1
+        # name -> (players, player_limit), created in this order
+        self.lobbies = {
+            name: self.create(name, players, limit)
+            for name, (players, limit) in {
+                "Alpha": (1, 4),
+                "Beta": (4, 4),
+                "alpine": (3, 0),
+                "Gamma": (2, 8),
+                "Delta": (2, 2),
+            }.items()
+        }
+
+    def create(self, name: str, players: int, limit: int) -> Session:
+        lobby = self.state.create_lobby(name, self.peer(), player_limit=limit)
+        for _ in range(players - 1):
+            self.state.join_lobby(lobby, self.peer())
+        return lobby
+
+    def peer(self) -> Peer:
+        peer = Peer(peer_id=self.next_id)
+        self.next_id += 1
+        return peer
+
+    def names(self, query: LobbyQuery) -> list[str]:
+        return [lobby.name for lobby in self.state.search_lobbies(query)[0]]
+
+    def test_sort_orders(self) -> None:
+        assert self.names(LobbyQuery()) == ["Delta", "Gamma", "alpine", "Beta", "Alpha"]
+        assert self.names(LobbyQuery(sort=LobbySort.MOST_PLAYERS)) == [
+            "Beta",
+            "alpine",
+            "Delta",
+            "Gamma",
+            "Alpha",
+        ]
+        assert self.names(LobbyQuery(sort=LobbySort.FEWEST_PLAYERS)) == [
+            "Alpha",
+            "Gamma",
+            "Delta",
+            "alpine",
+            "Beta",
+        ]
+
+    def test_filters(self) -> None:
+        assert self.names(LobbyQuery(not_full=True)) == ["Gamma", "alpine", "Alpha"]
+        assert self.names(LobbyQuery(min_free=3)) == ["Gamma", "alpine", "Alpha"]
+        assert self.names(LobbyQuery(min_free=4)) == ["Gamma", "alpine"]
+        assert self.names(LobbyQuery(name_prefix="ALP")) == ["alpine", "Alpha"]
+        assert self.names(LobbyQuery(min_limit=4, max_limit=4)) == ["Beta", "Alpha"]
+        assert self.names(LobbyQuery(min_limit=5)) == ["Gamma", "alpine"]
+
+    def test_cursor_pagination(self) -> None:
+        for sort in LobbySort:
+            expected = self.names(LobbyQuery(sort=sort))
+            seen: list[str] = []
+            cursor = None
+            while True:
+                page, next_cursor = self.state.search_lobbies(
+                    LobbyQuery(sort=sort, limit=2, cursor=cursor)
+                )
+                seen += [lobby.name for lobby in page]
+                if next_cursor is None:
+                    break
+                cursor = parse_cursor(sort, next_cursor)
+            assert seen == expected
+
+    def test_index_follows_joins_and_closes(self) -> None:
+        alpha = self.lobbies["Alpha"]
+        for _ in range(4):
+            self.state.join_lobby(alpha, self.peer())
+        assert self.names(LobbyQuery(sort=LobbySort.MOST_PLAYERS, limit=1)) == ["Alpha"]
+
+        self.state.remove_session(alpha.code)
+        assert "Alpha" not in self.names(LobbyQuery())
+        assert self.names(LobbyQuery(name_prefix="alp")) == ["alpine"]
+
+    def test_bad_cursor(self) -> None:
+        with pytest.raises(ValueError):
+            parse_cursor(LobbySort.NEWEST, "1.2.ABCD")
+        with pytest.raises(ValueError):
+            parse_cursor(LobbySort.MOST_PLAYERS, "x.1.ABCD")
+
+
+class TestLobbySearchEndpoint(AioHTTPTestCase):
+    """Tests for GET /api/lobby/list search parameters."""
+
+    async def get_application(self) -> web.Application:
+        state.clear_all()
+        return create_app()
+
+    async def create_lobby(self, name: str) -> None:
+        resp = await self.client.request("POST", "/api/lobby/connect", json={})
+        peer_id = (await resp.json())["peer_id"]
+        await self.client.request(
+            "POST", "/api/lobby/create", json={"peer_id": peer_id, "name": name}
+        )
+
+    async def test_paginated_search(self) -> None:
+        for i in range(5):
+            await self.create_lobby(f"Room {i}")
+
+        resp = await self.client.request("GET", "/api/lobby/list?limit=3")
+        data = await resp.json()
+        assert [item["name"] for item in data["lobbies"]] == ["Room 4", "Room 3", "Room 2"]
+
+        resp = await self.client.request(
+            "GET", "/api/lobby/list", params={"limit": "3", "cursor": data["next_cursor"]}
+        )
+        data = await resp.json()
+        assert [item["name"] for item in data["lobbies"]] == ["Room 1", "Room 0"]
+        assert data["next_cursor"] is None
+
+    async def test_invalid_parameters(self) -> None:
+        for query in ("sort=random", "limit=many", "cursor=nope"):
+            resp = await self.client.request("GET", f"/api/lobby/list?{query}")
+            assert resp.status == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
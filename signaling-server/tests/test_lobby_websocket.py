@@ -262,6 +262,76 @@ class TestLobbyWebSocket(AioHTTPTestCase):
             assert msg["t"] == ResponseType.ERROR
             assert msg["code"] == ErrorCode.INVALID_JSON
 
+    async def test_broadcast_game_packet(self) -> None:
+        """Broadcast over the WebSocket reaches other lobby members and is acknowledged."""
+        async with self.client.ws_connect("/lobby") as host_ws:
+            await host_ws.receive_json()  # skip welcome
+
+            await host_ws.send_json({"t": MessageType.CREATE_LOBBY, "name": "PacketLobby"})
+            created = await host_ws.receive_json()
+
+            async with self.client.ws_connect("/lobby") as client_ws:
+                client_welcome = await client_ws.receive_json()
+                client_id = client_welcome["your_id"]
+
+                await client_ws.send_json({"t": MessageType.JOIN_LOBBY, "code": created["code"]})
+                await client_ws.receive_json()  # skip lobby_joined
+                await host_ws.receive_json()  # skip peer_joined
+
+                await client_ws.send_json({"t": MessageType.BROADCAST, "packet": "AAEC"})
+
+                packet = await host_ws.receive_json()
+                assert packet["t"] == ResponseType.GAME_PACKET
+                assert packet["from"] == client_id
+                assert packet["packet"] == "AAEC"
+
+                ack = await client_ws.receive_json()
+                assert ack["t"] == ResponseType.BROADCAST_SENT
+                assert ack["delivered_to"] == [created["host_id"]]
+
+    async def test_broadcast_when_not_in_lobby(self) -> None:
+        """Should return error when broadcasting without being in a lobby."""
+        async with self.client.ws_connect("/lobby") as ws:
+            await ws.receive_json()  # skip welcome
+
+            await ws.send_json({"t": MessageType.BROADCAST, "packet": "AA"})
+            msg = await ws.receive_json()
+
+            assert msg["t"] == ResponseType.ERROR
+            assert msg["code"] == ErrorCode.NOT_IN_LOBBY
+
+    async def test_broadcast_malformed_target(self) -> None:
+        """A malformed target or exclude gets an error frame and the socket stays open."""
+        async with self.client.ws_connect("/lobby") as ws:
+            await ws.receive_json()  # skip welcome
+            await ws.send_json({"t": MessageType.CREATE_LOBBY, "name": "BadTargets"})
+            await ws.receive_json()  # skip lobby_created
+
+            for extra in ({"exclude": 4}, {"target": None}):
+                await ws.send_json({"t": MessageType.BROADCAST, "packet": "AA", **extra})
+                msg = await ws.receive_json()
+                assert msg["t"] == ResponseType.ERROR
+                assert msg["code"] == ErrorCode.INVALID_REQUEST
+
+            await ws.send_json({"t": MessageType.PING})
+            assert (await ws.receive_json())["t"] == ResponseType.PONG
+
+    async def test_broadcast_non_string_packet(self) -> None:
+        """A packet that is not a string gets an error frame and the socket stays open."""
+        async with self.client.ws_connect("/lobby") as ws:
+            await ws.receive_json()  # skip welcome
+            await ws.send_json({"t": MessageType.CREATE_LOBBY, "name": "BadPackets"})
+            await ws.receive_json()  # skip lobby_created
+
+            for packet in (5, None, ["AA"]):
+                await ws.send_json({"t": MessageType.BROADCAST, "packet": packet})
+                msg = await ws.receive_json()
+                assert msg["t"] == ResponseType.ERROR
+                assert msg["code"] == ErrorCode.INVALID_REQUEST
+
+            await ws.send_json({"t": MessageType.PING})
+            assert (await ws.receive_json())["t"] == ResponseType.PONG
+
     async def test_host_disconnect_closes_lobby(self) -> None:
         """When host disconnects, lobby should close and clients notified."""
         async with self.client.ws_connect("/lobby") as host_ws:
@@ -0,0 +1,104 @@
+# pyright: strict
+
+"""
+Tests for the queue-backed logging layer.
+
+Run with: uv run pytest tests/ -v
+"""
+
+import io
+import logging
+import re
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import TestCase
+
+import pytest
+
+from server.log import (
+    ROOT,
+    get_logger,
+    parse_level,
+    parse_levels,
+    setup_logging,
+    shutdown_logging,
+)
+
+
+class CountingArg:
+    """Log argument that records how often it is formatted."""
+
+    def __init__(self) -> None:
+        self.formatted = 0
+
+    def __str__(self) -> str:
+        self.formatted += 1
+        return "arg"
+
+
+class TestLevels(TestCase):
+    """Level parsing from the environment format."""
+
+    def test_parse_level(self) -> None:
+        assert parse_level("debug") == logging.DEBUG
+        assert parse_level(" WARNING ") == logging.WARNING
+        with pytest.raises(ValueError):
+            parse_level("loud")
+
+    def test_parse_levels(self) -> None:
+        assert parse_levels("lobby=DEBUG, sse=warning,") == {
+            "lobby": logging.DEBUG,
+            "sse": logging.WARNING,
+        }
+        assert parse_levels("") == {}
+        with pytest.raises(ValueError):
+            parse_levels("nope=DEBUG")
+
+    def test_every_logger_is_configurable(self) -> None:
+        source = Path(__file__).parent.parent / "server"
+        used = {
+            name
+            for path in source.glob("*.py")
+            for name in re.findall(r'get_logger\("(\w+)"\)', path.read_text())
+        }
+        assert "bus" in used
+        spec = ",".join(f"{name}=DEBUG" for name in sorted(used))
+        assert parse_levels(spec) == dict.fromkeys(used, logging.DEBUG)
+
+
+class TestQueuedLogging(TestCase):
+    """Records are written by the background listener in the [SUBSYSTEM] style."""
+
+    def tearDown(self) -> None:
+        shutdown_logging()
+        for name in ("lobby", "sse"):
+            get_logger(name).setLevel(logging.NOTSET)
+        logging.getLogger(ROOT).setLevel(logging.NOTSET)
+
+    def test_prefix_and_subsystem_levels(self) -> None:
+        out = io.StringIO()
+        with redirect_stdout(out):
+            setup_logging("INFO", "lobby=DEBUG,sse=WARNING")
+            get_logger("lobby").debug("Queued %s for peer %s", "game_packet", 2)
+            get_logger("sse").info("Peer %s connected", 2)
+            get_logger("http").info("Peer %s joined %s", 3, "ABCD")
+            shutdown_logging()
+
+        assert out.getvalue().splitlines() == [
+            "[LOBBY] Queued game_packet for peer 2",
+            "[HTTP] Peer 3 joined ABCD",
+        ]
+
+    def test_disabled_records_are_never_formatted(self) -> None:
+        arg = CountingArg()
+        with redirect_stdout(io.StringIO()):
+            setup_logging("INFO")
+            get_logger("lobby").debug("Sent %s", arg)
+            get_logger("lobby").info("Sent %s", arg)
+            shutdown_logging()
+
+        assert arg.formatted == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
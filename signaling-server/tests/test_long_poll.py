@@ -0,0 +1,145 @@
+# pyright: strict
+
+"""
+Tests for the long-poll event endpoint.
+
+Run with: uv run pytest tests/ -v
+"""
+
+import asyncio
+from typing import Any
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import AioHTTPTestCase
+
+from server.app import create_app
+from server.state import state
+
+
+def packets(body: dict[str, Any]) -> list[str]:
+    return [e["data"]["packet"] for e in body["events"] if e["event"] == "game_packet"]
+
+
+class TestLongPoll(AioHTTPTestCase):
+    """Polls return every pending event at once and share IDs with the SSE stream."""
+
+    async def get_application(self) -> web.Application:
+        state.clear_all()
+        return create_app()
+
+    async def connect(self) -> int:
+        resp = await self.client.request("POST", "/api/lobby/connect", json={})
+        return (await resp.json())["peer_id"]
+
+    async def lobby_pair(self) -> tuple[int, int]:
+        """Create a lobby with a host and one joined client."""
+        host_id = await self.connect()
+        client_id = await self.connect()
+        resp = await self.client.request(
+            "POST", "/api/lobby/create", json={"peer_id": host_id, "name": "Poll"}
+        )
+        code = (await resp.json())["code"]
+        await self.client.request(
+            "POST", "/api/lobby/join", json={"peer_id": client_id, "code": code}
+        )
+        return host_id, client_id
+
+    async def poll(self, peer_id: int, cursor: int | None = None, timeout: float = 0) -> Any:
+        query = f"peer_id={peer_id}&timeout={timeout}"
+        if cursor is not None:
+            query += f"&cursor={cursor}"
+        resp = await self.client.request("GET", f"/api/lobby/poll?{query}")
+        assert resp.status == 200
+        assert resp.headers["Cache-Control"] == "no-store"
+        return await resp.json()
+
+    async def send(self, sender_id: int, packet: str) -> None:
+        await self.client.request(
+            "POST", "/api/lobby/broadcast", json={"peer_id": sender_id, "packet": packet}
+        )
+
+    async def test_returns_all_queued_events(self) -> None:
+        host_id, client_id = await self.lobby_pair()
+        for packet in ("AA", "BB", "CC"):
+            await self.send(host_id, packet)
+
+        body = await self.poll(client_id)
+        assert body["peer_id"] == client_id and body["resumed"] is True
+        assert packets(body) == ["AA", "BB", "CC"]
+        ids = [e["id"] for e in body["events"]]
+        assert ids == sorted(ids) and body["cursor"] == ids[-1]
+
+        body = await self.poll(client_id, body["cursor"])
+        assert body["events"] == [] and body["cursor"] == ids[-1]
+
+    async def test_waits_for_next_event(self) -> None:
+        host_id, client_id = await self.lobby_pair()
+        cursor = (await self.poll(client_id))["cursor"]
+
+        pending = asyncio.ensure_future(self.poll(client_id, cursor, timeout=5))
+        await asyncio.sleep(0.1)
+        assert not pending.done()
+        await self.send(host_id, "AA")
+        body = await asyncio.wait_for(pending, 2)
+        assert packets(body) == ["AA"]
+
+    async def test_timeout_returns_empty(self) -> None:
+        _, client_id = await self.lobby_pair()
+        cursor = (await self.poll(client_id))["cursor"]
+        body = await self.poll(client_id, cursor, timeout=0.1)
+        assert body["events"] == [] and body["cursor"] == cursor
+
+    async def test_lost_response_is_repeated(self) -> None:
+        host_id, client_id = await self.lobby_pair()
+        cursor = (await self.poll(client_id))["cursor"]
+        await self.send(host_id, "AA")
+        first = await self.poll(client_id, cursor)
+        await self.send(host_id, "BB")
+
+        # The client never saw `first`, so it polls again with the old cursor
+        again = await self.poll(client_id, cursor)
+        assert again["resumed"] is True
+        assert packets(again) == ["AA", "BB"]
+        assert again["events"][0] == first["events"][0]
+
+    async def test_switch_to_event_stream(self) -> None:
+        host_id, client_id = await self.lobby_pair()
+        cursor = (await self.poll(client_id))["cursor"]
+        await self.send(host_id, "AA")
+
+        stream = await self.client.request(
+            "GET",
+            f"/api/lobby/events?peer_id={client_id}",
+            headers={"Last-Event-ID": str(cursor)},
+        )
+        assert await stream.content.readline() == b"event: welcome\n"
+        assert b'"resumed":true' in await stream.content.readuntil(b"\n\n")
+        frame = await asyncio.wait_for(stream.content.readuntil(b"\n\n"), 2)
+        assert b"event: game_packet" in frame and b"AA" in frame
+        stream.close()
+
+    async def test_new_poll_ends_pending_one(self) -> None:
+        _, client_id = await self.lobby_pair()
+        cursor = (await self.poll(client_id))["cursor"]
+        pending = asyncio.ensure_future(self.poll(client_id, cursor, timeout=5))
+        await asyncio.sleep(0.1)
+        await self.poll(client_id, cursor)
+        assert (await asyncio.wait_for(pending, 2))["events"] == []
+
+        # Still seated in the lobby between polls
+        peer = state.get_lobby_peer(client_id)
+        assert peer is not None and peer.lobby_code is not None
+
+    async def test_bad_requests(self) -> None:
+        _, client_id = await self.lobby_pair()
+        resp = await self.client.request("GET", "/api/lobby/poll")
+        assert resp.status == 400
+        resp = await self.client.request("GET", f"/api/lobby/poll?peer_id={client_id}&timeout=x")
+        assert resp.status == 400
+        resp = await self.client.request("GET", "/api/lobby/poll?peer_id=999")
+        assert resp.status == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
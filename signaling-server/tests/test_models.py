@@ -0,0 +1,53 @@
+# pyright: strict
+
+"""
+Tests for the compact data models.
+
+Run with: uv run pytest tests/ -v
+"""
+
+import time
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+import pytest
+
+from server.models import Peer, Session
+from server.peer_queue import PeerQueue
+
+
+class TestModels(TestCase):
+    """Slots, lazy player data and monotonic timestamps."""
+
+    def test_no_instance_dict(self) -> None:
+        peer = Peer(peer_id=1, sse_queue=PeerQueue())
+        for obj in (peer, peer.sse_queue, Session.create_lobby("ABCD", "Lobby", peer)):
+            assert not hasattr(obj, "__dict__")
+
+    def test_default_player_data(self) -> None:
+        peer = Peer(peer_id=7)
+        assert peer.to_dict() == {"id": 7, "player": {"name": "Player 7"}}
+        peer.player_data = {"name": "Ann"}
+        assert peer.player_data == {"name": "Ann"}
+        peer.player_data = {}
+        assert peer.player_data == {"name": "Player 7"}
+
+    def test_created_at_serialized_as_iso(self) -> None:
+        room = Session("ABCD")
+        assert room.created_at <= time.monotonic()
+        created = datetime.fromisoformat(room.to_room_dict()["created_at"])
+        assert abs(created - datetime.now()) < timedelta(seconds=5)
+
+    def test_player_count_derived(self) -> None:
+        lobby = Session.create_lobby("ABCD", "Lobby", Peer(peer_id=1))
+        lobby.add_peer(Peer(peer_id=2))
+        assert lobby.is_lobby and lobby.player_count == 2
+        lobby.reported_players = 9  # Only plain rooms report their own count
+        assert lobby.to_room_dict()["player_count"] == 2
+
+        room = Session("WXYZ", reported_players=3)
+        assert not room.is_lobby and room.player_count == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
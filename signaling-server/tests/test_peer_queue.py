@@ -0,0 +1,113 @@
+# pyright: strict
+
+"""
+Tests for bounded per-peer SSE queues.
+
+Run with: uv run pytest tests/ -v
+"""
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import AioHTTPTestCase
+
+from server.app import create_app
+from server.enums import OverflowPolicy
+from server.frames import EncodedMessage
+from server.peer_queue import PeerQueue, PeerQueueClosed
+from server.state import state
+
+
+def packet(n: int, key: str | None = None) -> EncodedMessage:
+    return EncodedMessage.encode({"t": "game_packet", "n": n}, key=key)
+
+
+def numbers(queue: PeerQueue) -> list[int]:
+    out: list[int] = []
+    while not queue.empty():
+        out.append(int(queue.get_nowait().data.split(b'"n":')[1].rstrip(b"}")))
+    return out
+
+
+class TestOverflowPolicies(IsolatedAsyncioTestCase):
+    """Each overflow policy keeps the queue within its limits."""
+
+    async def test_drop_oldest(self) -> None:
+        queue = PeerQueue(max_messages=3, policy=OverflowPolicy.DROP_OLDEST)
+        results = [queue.put_nowait(packet(i)) for i in range(5)]
+
+        assert results == [True] * 5
+        assert queue.dropped == 2
+        assert numbers(queue) == [2, 3, 4]
+
+    async def test_drop_newest(self) -> None:
+        queue = PeerQueue(max_messages=3, policy=OverflowPolicy.DROP_NEWEST)
+        results = [queue.put_nowait(packet(i)) for i in range(5)]
+
+        assert results == [True, True, True, False, False]
+        assert numbers(queue) == [0, 1, 2]
+
+    async def test_disconnect_closes_queue(self) -> None:
+        queue = PeerQueue(max_messages=2, policy=OverflowPolicy.DISCONNECT)
+        reader = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0)
+
+        for i in range(3):
+            queue.put_nowait(packet(i))
+
+        assert queue.closed
+        assert not queue.put_nowait(packet(9))
+        with pytest.raises(PeerQueueClosed):
+            await reader
+
+    async def test_coalesce_replaces_same_key(self) -> None:
+        queue = PeerQueue(max_messages=3, policy=OverflowPolicy.COALESCE)
+        queue.put_nowait(packet(0, key="1:pos"))
+        queue.put_nowait(packet(1))
+        queue.put_nowait(packet(2))
+        queue.put_nowait(packet(3, key="1:pos"))
+
+        assert numbers(queue) == [1, 2, 3]
+
+    async def test_byte_limit(self) -> None:
+        size = len(packet(0).sse)
+        queue = PeerQueue(max_messages=100, max_bytes=size * 2)
+        for i in range(4):
+            queue.put_nowait(packet(i))
+
+        assert queue.nbytes <= size * 2
+        assert numbers(queue) == [2, 3]
+
+    async def test_drain_respects_budget(self) -> None:
+        size = len(packet(0).sse)
+        queue = PeerQueue()
+        for i in range(10):
+            queue.put_nowait(packet(i))
+
+        assert len(queue.drain(max_messages=4, max_bytes=size * 100)) == 4
+        assert len(queue.drain(max_messages=100, max_bytes=size * 2)) == 2
+        assert numbers(queue) == [6, 7, 8, 9]
+
+
+class TestHealthQueueCounters(AioHTTPTestCase):
+    """Dropped-message counters are visible on /health."""
+
+    async def get_application(self) -> web.Application:
+        state.clear_all()
+        return create_app()
+
+    async def test_health_reports_queue_metrics(self) -> None:
+        await self.client.request("POST", "/api/lobby/connect", json={})
+
+        resp = await self.client.request("GET", "/health")
+        data = await resp.json()
+
+        assert data["sse_queued_messages"] == 0
+        assert "sse_dropped_oldest" in data["metrics"]
+        assert "sse_dropped_newest" in data["metrics"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,156 @@
+# pyright: strict
+
+"""
+Tests for per-peer and per-lobby packet rate limits.
+
+Run with: uv run pytest tests/ -v
+"""
+
+from dataclasses import replace
+from typing import Any
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import AioHTTPTestCase
+
+from server import ratelimit
+from server.app import create_app
+from server.config import CONFIG
+from server.metrics import metrics
+from server.ratelimit import TokenBucket, admit
+from server.state import state
+
+# Two packets per second for a peer, three for a lobby, with 1 KB/s per peer
+LIMITS = replace(
+    CONFIG,
+    peer_packet_rate=2.0,
+    peer_byte_rate=1000.0,
+    lobby_packet_rate=3.0,
+    lobby_byte_rate=0.0,
+    rate_limit_burst=1.0,
+)
+
+
+class TestTokenBucket(TestCase):
+    """Buckets refill over time and a rejection takes nothing from either bucket."""
+
+    def setUp(self) -> None:
+        patcher = patch.object(ratelimit, "CONFIG", LIMITS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_packets_per_second(self) -> None:
+        sender, lobby = TokenBucket.for_peer(), TokenBucket.for_lobby()
+        assert admit(sender, lobby, 1, 10) == 0.0
+        assert admit(sender, lobby, 1, 10) == 0.0
+        wait = admit(sender, lobby, 1, 10)
+        assert 0 < wait <= 0.5
+
+        # Half a second later one more packet is allowed
+        sender.stamp -= 0.5
+        lobby.stamp -= 0.5
+        assert admit(sender, lobby, 1, 10) == 0.0
+
+    def test_bytes_per_second(self) -> None:
+        sender, lobby = TokenBucket.for_peer(), TokenBucket.for_lobby()
+        assert admit(sender, lobby, 1, 900) == 0.0
+        wait = admit(sender, lobby, 1, 300)
+        assert abs(wait - 0.2) < 0.01
+
+    def test_lobby_limit_spans_senders(self) -> None:
+        lobby = TokenBucket.for_lobby()
+        senders = [TokenBucket.for_peer() for _ in range(4)]
+        before = metrics.rate_limited_lobby
+        results = [admit(sender, lobby, 1, 10) for sender in senders]
+        assert results[:3] == [0.0, 0.0, 0.0] and results[3] > 0
+        assert metrics.rate_limited_lobby == before + 1
+        # The rejected sender was not charged
+        assert senders[3].packets > 1.99
+
+    def test_oversized_request_admitted_when_full(self) -> None:
+        sender, lobby = TokenBucket.for_peer(), TokenBucket(0.0, 0.0)
+        assert admit(sender, lobby, 5, 10) == 0.0
+        assert admit(sender, lobby, 1, 10) > 1.0  # Paying off the debt
+
+    def test_unlimited(self) -> None:
+        sender, lobby = TokenBucket(0.0, 0.0), TokenBucket(0.0, 0.0)
+        assert all(admit(sender, lobby, 100, 10**6) == 0.0 for _ in range(100))
+
+
+class TestRateLimitedEndpoints(AioHTTPTestCase):
+    """Packets over the limit are refused before fan-out, with a retry hint."""
+
+    async def get_application(self) -> web.Application:
+        state.clear_all()
+        patcher = patch.object(ratelimit, "CONFIG", LIMITS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return create_app()
+
+    async def lobby_pair(self) -> tuple[int, int]:
+        """Create a lobby with a host and one joined client."""
+        ids: list[int] = []
+        for _ in range(2):
+            resp = await self.client.request("POST", "/api/lobby/connect", json={})
+            ids.append((await resp.json())["peer_id"])
+        resp = await self.client.request(
+            "POST", "/api/lobby/create", json={"peer_id": ids[0], "name": "Limits"}
+        )
+        code = (await resp.json())["code"]
+        await self.client.request("POST", "/api/lobby/join", json={"peer_id": ids[1], "code": code})
+        return ids[0], ids[1]
+
+    async def test_http_broadcast_429(self) -> None:
+        host_id, _ = await self.lobby_pair()
+        responses = [
+            await self.client.request(
+                "POST", "/api/lobby/broadcast", json={"peer_id": host_id, "packet": "AA"}
+            )
+            for _ in range(3)
+        ]
+        assert [resp.status for resp in responses] == [200, 200, 429]
+        resp = responses[2]
+        assert resp.headers["Retry-After"] == "1"
+        body = await resp.json()
+        assert body["error"] == "RATE_LIMITED" and 0 < body["retry_after"] <= 0.5
+
+    async def test_batch_counts_every_entry(self) -> None:
+        host_id, _ = await self.lobby_pair()
+        packets = [{"packet": "AA"}] * 2
+        resp = await self.client.request(
+            "POST", "/api/lobby/broadcast/batch", json={"peer_id": host_id, "packets": packets}
+        )
+        assert resp.status == 200
+        resp = await self.client.request(
+            "POST", "/api/lobby/broadcast/raw", params={"peer_id": host_id}, data=b"\x00"
+        )
+        assert resp.status == 429
+
+    async def test_lobby_websocket_error_frame(self) -> None:
+        async with self.client.ws_connect("/lobby") as ws:
+            await ws.receive_json()
+            await ws.send_json({"t": "create_lobby", "name": "Limits"})
+            await ws.receive_json()
+            replies: list[Any] = []
+            for _ in range(3):
+                await ws.send_json({"t": "broadcast", "packet": "AA"})
+                replies.append(await ws.receive_json())
+            assert [r["t"] for r in replies] == ["broadcast_sent", "broadcast_sent", "error"]
+            assert replies[2]["code"] == "RATE_LIMITED" and replies[2]["retry_after"] > 0
+
+    async def test_signaling_error_frame(self) -> None:
+        resp = await self.client.request("POST", "/session/host", json={})
+        code = (await resp.json())["code"]
+        async with self.client.ws_connect(f"/ws/{code}") as ws:
+            await ws.receive_json()
+            for _ in range(2):
+                await ws.send_json({"data_type": "ready"})
+            await ws.send_json({"data_type": "offer", "to": 9, "sdp": "x"})
+            error = await ws.receive_json(timeout=2)
+            assert error["data_type"] == "error" and error["code"] == "RATE_LIMITED"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
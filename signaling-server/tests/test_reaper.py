@@ -0,0 +1,172 @@
+# pyright: strict
+
+"""
+Tests for the timer wheel and the idle peer and session reaper.
+
+Run with: uv run pytest tests/ -v
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any
+from unittest import TestCase
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import AioHTTPTestCase
+
+from server.app import create_app
+from server.config import CONFIG
+from server.metrics import metrics
+from server.models import Peer
+from server.reaper import reap_peers, reap_sessions
+from server.state import state
+from server.timer_wheel import TimerWheel
+
+
+class TestTimerWheel(TestCase):
+    """Peers come out of the wheel once their tick has passed."""
+
+    def test_expires_by_tick(self) -> None:
+        wheel = TimerWheel(tick=1.0, span=10.0, now=100.0)
+        early, late = Peer(peer_id=1), Peer(peer_id=2)
+        wheel.add(early, 102.5)
+        wheel.add(late, 105.0)
+        assert wheel.advance(102.9) == []
+        assert wheel.advance(103.0) == [early]
+        assert wheel.advance(104.0) == []
+        assert wheel.advance(105.0) == [late]
+        assert len(wheel) == 0
+
+    def test_past_and_far_deadlines(self) -> None:
+        wheel = TimerWheel(tick=1.0, span=10.0, now=100.0)
+        past, far = Peer(peer_id=1), Peer(peer_id=2)
+        wheel.add(past, 50.0)
+        wheel.add(far, 1000.0)
+        assert wheel.advance(100.0) == [past]
+        # Beyond the span: comes out at the end of the wheel for the caller to re-check
+        assert wheel.advance(111.0) == [far]
+
+    def test_stall_visits_every_slot_once(self) -> None:
+        wheel = TimerWheel(tick=1.0, span=5.0, now=0.0)
+        peers = [Peer(peer_id=i) for i in range(5)]
+        for i, peer in enumerate(peers):
+            wheel.add(peer, float(i))
+        assert sorted(p.peer_id for p in wheel.advance(1000.0)) == [0, 1, 2, 3, 4]
+        wheel.add(peers[0], 1001.0)
+        assert wheel.advance(1001.0) == [peers[0]]
+
+
+class TestReaper(AioHTTPTestCase):
+    """Abandoned HTTP peers are disconnected like an explicit disconnect."""
+
+    async def get_application(self) -> web.Application:
+        state.clear_all()
+        return create_app()
+
+    async def connect(self) -> int:
+        resp = await self.client.request("POST", "/api/lobby/connect", json={})
+        return (await resp.json())["peer_id"]
+
+    async def test_unattached_peer_reaped(self) -> None:
+        before = metrics.peers_reaped_unattached
+        peer_id = await self.connect()
+
+        assert await reap_peers(time.monotonic() + CONFIG.peer_attach_ttl - 5) == 0
+        assert state.get_lobby_peer(peer_id) is not None
+
+        assert await reap_peers(time.monotonic() + CONFIG.peer_attach_ttl + 5) == 1
+        assert state.get_lobby_peer(peer_id) is None
+        assert metrics.peers_reaped_unattached == before + 1
+
+    async def test_idle_host_reaped_and_lobby_closed(self) -> None:
+        before = metrics.peers_reaped_idle
+        host_id = await self.connect()
+        host = state.get_lobby_peer(host_id)
+        assert host is not None
+        host.sse_replay = deque()  # Had an event stream that has since ended
+        resp = await self.client.request(
+            "POST", "/api/lobby/create", json={"peer_id": host_id, "name": "Idle"}
+        )
+        code = (await resp.json())["code"]
+
+        # The create request counts as activity: not due at the attach deadline
+        now = time.monotonic()
+        assert await reap_peers(now + CONFIG.peer_attach_ttl + 5) == 0
+        assert await reap_peers(now + CONFIG.peer_idle_ttl + 5) == 1
+        assert state.get_lobby_peer(host_id) is None
+        assert state.get_lobby(code) is None
+        assert metrics.peers_reaped_idle == before + 1
+
+    async def test_connected_peer_kept(self) -> None:
+        peer_id = await self.connect()
+        peer = state.get_lobby_peer(peer_id)
+        assert peer is not None
+        peer.sse_stream = stream = asyncio.create_task(asyncio.sleep(3600))
+
+        assert await reap_peers(time.monotonic() + CONFIG.peer_idle_ttl * 10) == 0
+        assert state.get_lobby_peer(peer_id) is peer
+        stream.cancel()
+
+
+class TestSessionReaper(AioHTTPTestCase):
+    """Abandoned lobbies and idle rooms are collected by the sweep."""
+
+    async def get_application(self) -> web.Application:
+        state.clear_all()
+        return create_app()
+
+    async def host(self, **body: Any) -> str:
+        resp = await self.client.request("POST", "/session/host", json=body)
+        return (await resp.json())["code"]
+
+    async def test_idle_room_reaped(self) -> None:
+        before = metrics.rooms_reaped
+        idle = await self.host(lobby_name="Idle")
+        busy = await self.host(lobby_name="Busy")
+        for room in state.sessions.values():
+            room.last_activity -= CONFIG.room_idle_ttl + 1
+        await self.client.request("POST", f"/session/players/{busy}", json={"player_count": 2})
+
+        assert await reap_sessions(time.monotonic()) == 1
+        assert state.get_room(idle) is None and state.get_room(busy) is not None
+        assert "idle" not in state.session_names
+        assert idle not in state.codes
+        assert metrics.rooms_reaped == before + 1
+
+    async def test_lobby_without_host_reaped(self) -> None:
+        before = metrics.lobbies_reaped
+        resp = await self.client.request("POST", "/api/lobby/connect", json={})
+        host_id = (await resp.json())["peer_id"]
+        resp = await self.client.request(
+            "POST", "/api/lobby/create", json={"peer_id": host_id, "name": "Orphan"}
+        )
+        code = (await resp.json())["code"]
+
+        assert await reap_sessions(time.monotonic()) == 0
+        state.remove_lobby_peer(host_id)  # Host record gone without leaving the lobby
+        assert await reap_sessions(time.monotonic()) == 1
+        assert state.get_lobby(code) is None and state.get_room(code) is None
+        assert "orphan" not in state.session_names
+        assert metrics.lobbies_reaped == before + 1
+
+    async def test_debug_room_reused(self) -> None:
+        first = await self.host(is_debug=True, lobby_name="Debug")
+        room = state.get_room(first)
+        assert await self.host(is_debug=True) == first == "TEST"
+        assert state.get_room(first) is room
+        assert room is not None and room.name == "Debug"
+
+    async def test_rename_keeps_other_rooms_name(self) -> None:
+        first = await self.host(lobby_name="Shared")
+        second = await self.host()
+        await self.client.request(
+            "POST", f"/session/update/{second}", json={"lobby_name": "Shared"}
+        )
+        await self.client.request("POST", f"/session/update/{first}", json={"lobby_name": "Other"})
+        assert state.session_names == {"shared": second, "other": first}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
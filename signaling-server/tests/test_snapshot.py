@@ -0,0 +1,183 @@
+# pyright: strict
+
+"""
+Tests for state snapshots: dump and load round trips, and a restored peer
+resuming its event stream.
+
+Run with: uv run pytest tests/ -v
+"""
+
+import json
+import marshal
+import os
+import tempfile
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import AioHTTPTestCase
+
+from server import frames, snapshot
+from server.app import create_app
+from server.config import CONFIG
+from server.frames import EncodedMessage
+from server.models import Peer
+from server.reaper import reap_peers
+from server.state import State, state
+
+
+def _populated() -> State:
+    """A state with a public and a private lobby, a lone peer and a plain room."""
+    source = State()
+    peers = [Peer(peer_id=source.get_next_peer_id()) for _ in range(4)]
+    for peer in peers:
+        source.add_lobby_peer(peer)
+    peers[0].player_data = {"name": "Host", "color": [1, 2, 3]}
+
+    public = source.create_lobby("Public", peers[0], public=True, player_limit=4)
+    source.join_lobby(public, peers[1])
+    private = source.create_lobby("Private", peers[2], public=False)
+    private.open = False
+    source.update_lobby_index(private)
+
+    room = source.create_room(channel="chan", lobby_name="Room", player_limit=8)
+    room.reported_players = 3
+    room.next_peer_id = 7
+    source.add_signaling_peer(room, 6)
+    return source
+
+
+class TestSnapshot(TestCase):
+    """load(dump(state)) gives back the same lobbies, rooms and peers."""
+
+    def test_round_trip(self) -> None:
+        source = _populated()
+        restored = State()
+        assert snapshot.load(restored, snapshot.dump(source)) == (3, 4)
+
+        assert list(restored.sessions) == list(source.sessions)
+        for code, original in source.sessions.items():
+            session = restored.sessions[code]
+            assert session.to_dict() == original.to_dict()
+            assert session.to_room_dict()["next_peer_id"] == original.next_peer_id
+            assert session.channel == original.channel
+            assert abs(session.created_at - original.created_at) < 0.01
+            assert list(session.peers) == list(original.peers)
+            assert not session.signaling_peers  # Signaling connections do not survive
+
+        # Indexes and lookups are rebuilt
+        assert list(restored.public_lobbies) == list(source.public_lobbies)
+        assert restored.find_session("room") is restored.sessions[list(source.sessions)[2]]
+        for code in source.sessions:
+            assert code in restored.codes
+
+        # Peers keep their lobby and data, and come back waiting for their stream
+        host = restored.lobby_peers[1]
+        assert host.player_data == {"name": "Host", "color": [1, 2, 3]}
+        assert host.lobby_code == list(source.sessions)[0]
+        assert restored.lobby_peers[2].sent_player_data is None
+        assert restored.lobby_peers[4].lobby_code is None
+        assert all(peer.sse_queue is not None for peer in restored.lobby_peers.values())
+        assert len(restored.peer_timers) == 4
+
+        assert restored.get_next_peer_id() == 5
+        assert restored.generate_unique_code() not in source.sessions
+
+    def test_event_ids_continue_after_restore(self) -> None:
+        source = _populated()
+        before = EncodedMessage.encode({"t": "game_packet"}).seq
+        data = snapshot.dump(source)
+
+        # A new process starts its event IDs from 1
+        with patch.object(frames, "_next_seq", 1):
+            snapshot.load(State(), data)
+            after = EncodedMessage.encode({"t": "game_packet"}).seq
+        assert after > before
+
+    def test_event_id_peek_and_resume(self) -> None:
+        with patch.object(frames, "_next_seq", 10):
+            assert frames.next_event_id() == frames.next_event_id() == 10
+            assert EncodedMessage.encode({"t": "game_packet"}).seq == 10
+            frames.resume_event_ids(5)  # Never goes back
+            assert frames.next_event_id() == 11
+            frames.resume_event_ids(40)
+            assert EncodedMessage.encode({"t": "game_packet"}).seq == 40
+
+    def test_reads_format_1(self) -> None:
+        _, written_at, next_peer_id, peers, sessions, _ = marshal.loads(snapshot.dump(_populated()))
+        old = marshal.dumps((1, written_at, next_peer_id, peers, sessions))
+        assert snapshot.load(State(), old) == (3, 4)
+
+    def test_rejects_other_data(self) -> None:
+        with pytest.raises(ValueError):
+            snapshot.load(State(), b"not a snapshot")
+        with pytest.raises(ValueError):
+            snapshot.load(State(), marshal.dumps((snapshot.SNAPSHOT_FORMAT + 1, 0.0, 1, [], [])))
+
+    def test_save_and_restore_file(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "state.snapshot")
+            assert not snapshot.restore(State(), path)
+
+            snapshot.save(_populated(), path)
+            restored = State()
+            assert snapshot.restore(restored, path)
+            assert len(restored.sessions) == 3
+
+            with open(path, "wb") as f:
+                f.write(b"\x00garbage")
+            broken = State()
+            assert not snapshot.restore(broken, path)
+            assert not broken.sessions
+
+    def test_ten_thousand_lobbies(self) -> None:
+        source = State()
+        for i in range(10_000):
+            host, guest = Peer(peer_id=2 * i + 1), Peer(peer_id=2 * i + 2)
+            host.player_data = {"name": f"Host {i}"}
+            source.add_lobby_peer(host)
+            source.add_lobby_peer(guest)
+            source.join_lobby(source.create_lobby(f"Lobby {i}", host), guest)
+
+        start = time.perf_counter()
+        restored = State()
+        snapshot.load(restored, snapshot.dump(source))
+        elapsed = time.perf_counter() - start
+        assert len(restored.public_lobbies) == 10_000
+        assert elapsed < 1.0
+
+
+class TestRestoredPeerResumes(AioHTTPTestCase):
+    """A peer restored from a snapshot reopens its stream and is still in its lobby."""
+
+    async def get_application(self) -> web.Application:
+        state.clear_all()
+        snapshot.load(state, snapshot.dump(_populated()))
+        return create_app()
+
+    async def test_resume_and_broadcast(self) -> None:
+        async with self.client.get(
+            "/api/lobby/events?peer_id=2", headers={"Last-Event-ID": "41"}
+        ) as events:
+            assert await events.content.readline() == b"event: welcome\n"
+            welcome = json.loads((await events.content.readline()).removeprefix(b"data: "))
+            assert welcome == {"peer_id": 2, "resumed": False}
+            await events.content.readline()
+
+            resp = await self.client.post(
+                "/api/lobby/broadcast", json={"peer_id": 1, "packet": "aGk="}
+            )
+            assert (await resp.json())["outcomes"] == {"2": "queued"}
+            assert (await events.content.readline()).startswith(b"id: ")
+            assert await events.content.readline() == b"event: game_packet\n"
+
+    async def test_unclaimed_peers_are_reaped(self) -> None:
+        later = time.monotonic() + CONFIG.peer_attach_ttl + CONFIG.reaper_tick
+        assert await reap_peers(later) == 4
+        assert not state.lobby_peers
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,138 @@
+# pyright: strict
+
+"""
+Tests for SSE event IDs and Last-Event-ID resume.
+
+Run with: uv run pytest tests/ -v
+"""
+
+import asyncio
+import json
+from dataclasses import replace
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from aiohttp import ClientResponse, web
+from aiohttp.test_utils import AioHTTPTestCase
+
+from server import http_lobby_handlers
+from server.app import create_app
+from server.config import CONFIG
+from server.state import state
+
+
+def parse_frame(frame: bytes) -> tuple[int | None, str, dict[str, Any]]:
+    """Split an SSE frame into (id, event, data)."""
+    fields = dict(line.split(": ", 1) for line in frame.decode().strip().split("\n"))
+    seq = int(fields["id"]) if "id" in fields else None
+    return seq, fields["event"], json.loads(fields["data"])
+
+
+class TestSseResume(AioHTTPTestCase):
+    """A dropped event stream resumes from Last-Event-ID within the grace window."""
+
+    async def get_application(self) -> web.Application:
+        state.clear_all()
+        return create_app()
+
+    async def connect(self) -> int:
+        resp = await self.client.request("POST", "/api/lobby/connect", json={})
+        return (await resp.json())["peer_id"]
+
+    async def lobby_pair(self) -> tuple[int, int]:
+        """Create a lobby with a host and one joined client."""
+        host_id = await self.connect()
+        client_id = await self.connect()
+        resp = await self.client.request(
+            "POST", "/api/lobby/create", json={"peer_id": host_id, "name": "Resume"}
+        )
+        code = (await resp.json())["code"]
+        await self.client.request(
+            "POST", "/api/lobby/join", json={"peer_id": client_id, "code": code}
+        )
+        return host_id, client_id
+
+    async def open_stream(
+        self, peer_id: int, last_event_id: int | None = None
+    ) -> tuple[ClientResponse, dict[str, Any]]:
+        headers = {} if last_event_id is None else {"Last-Event-ID": str(last_event_id)}
+        stream = await self.client.request(
+            "GET", f"/api/lobby/events?peer_id={peer_id}", headers=headers
+        )
+        _, event, welcome = await self.read(stream)
+        assert event == "welcome"
+        return stream, welcome
+
+    async def read(self, stream: ClientResponse) -> tuple[int | None, str, dict[str, Any]]:
+        return parse_frame(await asyncio.wait_for(stream.content.readuntil(b"\n\n"), 2))
+
+    async def send(self, sender_id: int, packet: str) -> None:
+        await self.client.request(
+            "POST", "/api/lobby/broadcast", json={"peer_id": sender_id, "packet": packet}
+        )
+
+    async def test_events_carry_increasing_ids(self) -> None:
+        host_id, client_id = await self.lobby_pair()
+        stream, welcome = await self.open_stream(client_id)
+        assert welcome == {"peer_id": client_id, "resumed": False}
+
+        await self.send(host_id, "AA")
+        await self.send(host_id, "BB")
+        first, _, _ = await self.read(stream)
+        second, _, _ = await self.read(stream)
+        assert first is not None and second is not None
+        assert second > first
+        stream.close()
+
+    async def test_resume_replays_missed_events(self) -> None:
+        host_id, client_id = await self.lobby_pair()
+        stream, _ = await self.open_stream(client_id)
+        await self.send(host_id, "AA")
+        last_id, _, data = await self.read(stream)
+        assert data["packet"] == "AA"
+
+        stream.close()
+        await asyncio.sleep(0.05)
+        for packet in ("BB", "CC", "DD"):
+            await self.send(host_id, packet)
+
+        # Still seated in the lobby while the stream is down
+        peer = state.get_lobby_peer(client_id)
+        assert peer is not None and peer.lobby_code is not None
+
+        stream, welcome = await self.open_stream(client_id, last_id)
+        assert welcome["resumed"] is True
+        packets = [(await self.read(stream))[2]["packet"] for _ in range(3)]
+        assert packets == ["BB", "CC", "DD"]
+        stream.close()
+
+    async def test_unknown_event_id_is_not_an_exact_resume(self) -> None:
+        _, client_id = await self.lobby_pair()
+        stream, _ = await self.open_stream(client_id)
+        stream.close()
+
+        stream, welcome = await self.open_stream(client_id, 10**9)
+        assert welcome["resumed"] is False
+        stream.close()
+
+    async def test_peer_disconnected_after_grace_window(self) -> None:
+        host_id, client_id = await self.lobby_pair()
+        host_stream, _ = await self.open_stream(host_id)
+        stream, _ = await self.open_stream(client_id)
+        assert (await self.read(host_stream))[1] == "peer_joined"
+
+        with patch.object(http_lobby_handlers, "CONFIG", replace(CONFIG, sse_resume_grace=0.05)):
+            stream.close()
+            await asyncio.sleep(0.05)
+            await self.send(host_id, "AA")  # the failed write ends the server-side stream
+            await asyncio.sleep(0.2)
+
+        assert state.get_lobby_peer(client_id) is None
+        _, event, data = await self.read(host_stream)
+        assert (event, data["id"]) == ("peer_left", client_id)
+        host_stream.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])